@@ -1,22 +1,62 @@
-"""Algorithm encoding module."""
+"""Algorithm encoding module.
+
+Exports are imported on first access, so importing the package (or one of its
+modules) doesn't pay for the others, and node schemas are only built when first used.
+No logging is configured, the "algencode" logger only has a {logging.NullHandler}.
+"""
 from __future__ import annotations
 
 import logging
+from importlib import import_module
+from typing import TYPE_CHECKING, Any
 
-from .node import Node, Procs
-from .subnodes import NumberNode, ProcNode, StringNode, VariableNode
-from .types import Vals
-
-logging.basicConfig(level=logging.DEBUG)
+if TYPE_CHECKING:
+    from .intern import InternTable
+    from .node import Node
+    from .registry import ProcRegistry
+    from .store import ProcStore
+    from .subnodes import BranchNode, NumberNode, ProcNode, StringNode, VariableNode
+    from .types import Procs, Vals
 
 logger = logging.getLogger("algencode")
+logger.addHandler(logging.NullHandler())
+
+_EXPORTS = {
+    "BranchNode": ".subnodes",
+    "InternTable": ".intern",
+    "Node": ".node",
+    "NumberNode": ".subnodes",
+    "ProcNode": ".subnodes",
+    "ProcRegistry": ".registry",
+    "ProcStore": ".store",
+    "Procs": ".types",
+    "StringNode": ".subnodes",
+    "Vals": ".types",
+    "VariableNode": ".subnodes",
+}
+
+
+def __getattr__(name: str) -> Any:
+    try:
+        module = _EXPORTS[name]
+    except KeyError:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}") from None
+    value = globals()[name] = getattr(import_module(module, __name__), name)
+    return value
+
+
+def __dir__() -> list[str]:
+    return sorted([*globals(), *_EXPORTS])
 
-Node.model_rebuild()
 
 __all__ = [
+    "BranchNode",
+    "InternTable",
     "Node",
     "NumberNode",
     "ProcNode",
+    "ProcRegistry",
+    "ProcStore",
     "Procs",
     "StringNode",
     "Vals",
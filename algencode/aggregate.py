@@ -0,0 +1,300 @@
+"""Cross-row aggregates.
+
+Aggregates node results over a row stream (or file, see {algencode.stream}), grouped
+by columns or by the results of other nodes, in a single pass with one accumulator
+per group and aggregate, so memory is proportional to the number of groups rather
+than of rows.
+
+```python
+tax = Node.model_validate({"key": "tax"})
+totals = aggregate(
+    {"tax": Aggregate("sum", tax), "parcels": Aggregate("count")},
+    "91750_FY_2021_2022.csv",
+    by=["roll code"],
+    converters={"tax": Decimal},
+)
+# [{"roll code": "I-CFD04-1", "tax": Decimal("4025.50"), "parcels": 3}, ...]
+```
+
+Sums are exact: ints are summed as ints, {Decimal} values without rounding, and
+floats through {math.fsum} style partials (correctly rounded once, at the end, ints
+included). As with {math.fsum}, infinities that cancel raise {ValueError} and sums
+overflowing the float range {OverflowError}. Means
+divide the same sums by the number of values. None results are skipped, as SQL skips
+nulls, and aggregates of no values are None (0 for sums and counts).
+"""
+from __future__ import annotations
+
+import math
+from dataclasses import dataclass
+from decimal import MAX_EMAX, MAX_PREC, MIN_EMIN, Context, Decimal
+from operator import itemgetter
+from typing import TYPE_CHECKING, Any, Callable, Literal, Mapping, Sequence, get_args
+
+from .node import Node
+from .stream import CHUNK_SIZE, Converters, Row, Source, chunked, read_source
+from .types import Procs, Reduced
+
+if TYPE_CHECKING:
+    from .compiler import Compiled
+
+AggregateOp = Literal["sum", "mean", "min", "max", "count"]
+
+_EXACT = Context(prec=MAX_PREC, Emax=MAX_EMAX, Emin=MIN_EMIN)
+"""Context in which adding {Decimal} values never rounds."""
+
+
+@dataclass(frozen=True)
+class Aggregate:
+    """Aggregate of the results of a node over rows."""
+
+    op: AggregateOp
+    node: Node | None = None
+    """Node evaluated for each row (None to count rows)."""
+
+    def __post_init__(self):
+        if self.op not in get_args(AggregateOp):
+            raise ValueError(f"unknown aggregate op {self.op!r}")
+        if self.node is None and self.op != "count":
+            raise ValueError(f"{self.op} aggregate expects a node")
+
+
+def aggregate(
+    aggregates: Mapping[str, Aggregate],
+    source: Source,
+    procs: Procs | None = None,
+    *,
+    by: Sequence[str] | Mapping[str, Node] = (),
+    chunk_size: int = CHUNK_SIZE,
+    fieldnames: Sequence[str] | None = None,
+    converters: Converters | None = None,
+) -> list[dict[str, Any]]:
+    """Aggregate node results over every row of a row iterator or file, per group.
+
+    Args:
+        aggregates: Named aggregates.
+        source: Rows, or the path of a CSV, XLSX or JSONL file.
+        procs: Procs map.
+        by: Columns, or named nodes, whose values (results) group rows.
+        chunk_size: Number of rows read and evaluated at a time.
+        fieldnames: Column names, if a file source has no header row.
+        converters: Per column value converters, applied when reading.
+
+    Returns:
+        One dict per group, in order of first appearance, holding the group's values
+        and its aggregates (a single group, possibly of no rows, if {by} is empty).
+
+    Raises:
+        TypeError: If a value can't be aggregated (e.g. summing strings, or floats
+            with {Decimal} values).
+    """
+    by_nodes = dict(by) if isinstance(by, Mapping) else {}
+    columns = [] if isinstance(by, Mapping) else list(by)
+    group_fs = [n.compile() for n in by_nodes.values()]
+    fs = [None if a.node is None else a.node.compile() for a in aggregates.values()]
+    ops = [a.op for a in aggregates.values()]
+    nodes = [*by_nodes.values(), *(a.node for a in aggregates.values() if a.node)]
+    rows = read_source(
+        source,
+        nodes,
+        procs,
+        keep=columns,
+        fieldnames=fieldnames,
+        converters=converters,
+    )
+
+    group_of = _grouping(columns, group_fs, procs)
+    groups: dict[Any, list[_Accumulator]] = {}
+    # Per group, bound {add} methods paired with the compiled node feeding them.
+    adders: dict[Any, list[tuple[Callable[[Any], None], Compiled | None]]] = {}
+
+    def new_group(group: Any) -> list[tuple[Callable[[Any], None], Compiled | None]]:
+        accs = groups[group] = [_ACCUMULATORS[op]() for op in ops]
+        res = adders[group] = [(acc.add, f) for acc, f in zip(accs, fs)]
+        return res
+
+    if not by:
+        new_group(())
+    for chunk in chunked(rows, chunk_size):
+        for r in chunk:
+            group = group_of(r)
+            if (adds := adders.get(group)) is None:
+                adds = new_group(group)
+            for add, f in adds:
+                add(True if f is None else f(r, procs))
+
+    names = [*columns, *by_nodes]
+    return [
+        {
+            **dict(zip(names, group if len(names) != 1 else (group,))),
+            **{name: acc.result() for name, acc in zip(aggregates, accs)},
+        }
+        for group, accs in groups.items()
+    ]
+
+
+def _grouping(
+    columns: list[str],
+    fs: list[Compiled],
+    procs: Procs | None,
+) -> Callable[[Row], Any]:
+    """Group of a row, a tuple of column values and node results (or the one value)."""
+    if not fs:
+        return itemgetter(*columns) if columns else lambda r: ()
+    if not columns and len(fs) == 1:
+        (f,) = fs
+        return lambda r: f(r, procs)
+    return lambda r: (*[r[k] for k in columns], *[f(r, procs) for f in fs])
+
+
+class _Accumulator:
+    __slots__ = ()
+
+    def add(self, x: Any):
+        raise NotImplementedError
+
+    def result(self) -> Reduced:
+        raise NotImplementedError
+
+
+class _Count(_Accumulator):
+    __slots__ = ("count",)
+
+    def __init__(self):
+        self.count = 0
+
+    def add(self, x: Any):
+        if x is not None:
+            self.count += 1
+
+    def result(self) -> Reduced:
+        return self.count
+
+
+class _Sum(_Accumulator):
+    __slots__ = ("count", "ints", "decimal", "partials", "special", "infs")
+
+    def __init__(self):
+        self.count = 0
+        self.ints = 0
+        self.decimal: Decimal | None = None
+        self.partials: list[float] | None = None
+        self.special = 0.0
+        """Sum of the non-finite floats."""
+        self.infs = 0.0
+        """Sum of the infinite floats (NaN if they cancel)."""
+
+    def add(self, x: Any):
+        # Exact type checks first, as this runs for every row.
+        t = type(x)
+        if t is Decimal or (t is not float and isinstance(x, Decimal)):
+            if self.partials is not None:
+                raise TypeError("can't aggregate float and Decimal values")
+            self.decimal = x if self.decimal is None else _EXACT.add(self.decimal, x)
+        elif t is float or isinstance(x, float):
+            if self.decimal is not None:
+                raise TypeError("can't aggregate float and Decimal values")
+            if self.partials is None:
+                self.partials = []
+            if math.isfinite(x):
+                _add_partial(self.partials, x)
+            else:
+                self.special += x
+                if math.isinf(x):
+                    self.infs += x
+        elif isinstance(x, int):
+            self.ints += x
+        elif x is None:
+            return
+        else:
+            raise TypeError(f"expected {int | float | Decimal}, found {t} {x}")
+        self.count += 1
+
+    def result(self) -> Reduced:
+        if self.decimal is not None:
+            return _EXACT.add(self.decimal, self.ints) if self.ints else self.decimal
+        if self.partials is not None:
+            # Non-finite and overflowing sums as math.fsum treats them.
+            if self.special:
+                if math.isnan(self.infs):
+                    raise ValueError("-inf + inf in sum")
+                return self.special
+            return math.fsum([*self.partials, *_float_parts(self.ints)])
+        return self.ints
+
+
+class _Mean(_Sum):
+    __slots__ = ()
+
+    def result(self) -> Reduced:
+        if not self.count:
+            return None
+        return super().result() / self.count  # type: ignore
+
+
+class _Min(_Accumulator):
+    __slots__ = ("value",)
+
+    def __init__(self):
+        self.value: Any = None
+
+    def add(self, x: Any):
+        if x is not None and (self.value is None or x < self.value):
+            self.value = x
+
+    def result(self) -> Reduced:
+        return self.value
+
+
+class _Max(_Min):
+    __slots__ = ()
+
+    def add(self, x: Any):
+        if x is not None and (self.value is None or x > self.value):
+            self.value = x
+
+
+_ACCUMULATORS: dict[str, type[_Accumulator]] = {
+    "sum": _Sum,
+    "mean": _Mean,
+    "min": _Min,
+    "max": _Max,
+    "count": _Count,
+}
+
+
+def _add_partial(partials: list[float], x: float):
+    """Add a finite float to non-overlapping partial sums (Shewchuk's algorithm).
+
+    The exact sum of the partials is kept, as {math.fsum} does, so it's only rounded
+    once when they're summed.
+    """
+    i = 0
+    for y in partials:
+        if abs(x) < abs(y):
+            x, y = y, x
+        hi = x + y
+        lo = y - (hi - x)
+        if lo:
+            partials[i] = lo
+            i += 1
+        x = hi
+    if math.isinf(x):
+        raise OverflowError("intermediate overflow in sum")
+    partials[i:] = [x]
+
+
+def _float_parts(i: int) -> list[float]:
+    """Floats summing exactly to an int, each its next (up to) 53 significant bits.
+
+    Raises:
+        OverflowError: If the int is beyond the float range.
+    """
+    parts = []
+    while i:
+        shift = max(abs(i).bit_length() - 53, 0)
+        top = abs(i) >> shift << shift
+        part = float(top if i > 0 else -top)
+        parts.append(part)
+        i -= int(part)
+    return parts
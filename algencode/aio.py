@@ -0,0 +1,162 @@
+"""Async evaluation with awaitable resolvers.
+
+Vals and procs can be given as async resolvers (e.g. lookups against a remote store)
+rather than mappings. Every key and proc a tree can read is resolved up front,
+concurrently, each distinct key or proc name only once, then the tree is evaluated as
+usual. Procs are resolved as soon as a caller is found, and the keys and procs of
+their bodies as soon as they arrive, so independent lookups always overlap. Both
+branches of conditionals are resolved, as which is taken is only known once evaluated.
+
+```python
+async def val(key: str) -> Reduced:
+    return await store.get(key)  # raises KeyError if missing
+
+res = await n.areduce(val, proc)
+```
+"""
+from __future__ import annotations
+
+import asyncio
+from typing import Any, Awaitable, Callable, TypeAlias
+
+from .base_node import BaseNode
+from .node import Node
+from .subnodes import BranchNode, NumberNode, ProcNode, StringNode, VariableNode
+from .types import Json, LiteralNode, Procs, Reduced, Vals
+
+ValResolver: TypeAlias = Callable[[str], Awaitable[Reduced]]
+"""Async val lookup, raising {KeyError} for missing keys."""
+
+ProcResolver: TypeAlias = Callable[[str], Awaitable[Node | dict[str, Json] | None]]
+"""Async proc lookup, returning None (or raising {KeyError}) for missing procs."""
+
+
+async def areduce(
+    n: LiteralNode | Node,
+    vals: Vals | ValResolver | None = None,
+    procs: Procs | ProcResolver | None = None,
+) -> Reduced:
+    """Reduce a node, resolving vals and procs through async resolvers first.
+
+    Args:
+        n: Node to reduce.
+        vals: Vals, or an async resolver of a single val.
+        procs: Procs, or an async resolver of a single proc.
+
+    Returns:
+        What {Node.reduce} returns given the resolved vals and procs (missing keys and
+        procs raise the same errors).
+    """
+    if callable(vals) or callable(procs):
+        vals, procs = await resolve(n, vals, procs)
+    if not isinstance(n, Node):
+        return n
+    return n.compile()(vals, procs)  # type: ignore
+
+
+async def resolve(
+    n: LiteralNode | Node,
+    vals: Vals | ValResolver | None,
+    procs: Procs | ProcResolver | None,
+) -> tuple[Vals | None, Procs | None]:
+    """Resolve the vals and procs a node can read, concurrently.
+
+    Returns:
+        Vals and procs mappings holding what was found (as given if not resolvers).
+    """
+    r = _Resolver(vals, procs)
+    r.walk(n, False)
+    await r.wait()
+    resolved_vals = r.vals if callable(vals) else vals
+    resolved_procs = r.procs if callable(procs) else procs
+    return resolved_vals, resolved_procs  # type: ignore
+
+
+class _Resolver:
+    def __init__(
+        self,
+        vals: Vals | ValResolver | None,
+        procs: Procs | ProcResolver | None,
+    ):
+        self.val_resolver = vals if callable(vals) else None
+        self.proc_source = procs
+        self.vals: dict[str, Reduced] = {}
+        self.procs: dict[str, Node] = {}
+        self.tasks: dict[tuple[str, str], asyncio.Task[Any]] = {}
+        self.walked: set[tuple[str, bool]] = set()
+
+    async def wait(self):
+        """Wait for every lookup, including those started by earlier ones."""
+        done: set[asyncio.Task[Any]] = set()
+        try:
+            while pending := [t for t in self.tasks.values() if t not in done]:
+                await asyncio.gather(*pending)
+                done.update(pending)
+        except BaseException:
+            for t in self.tasks.values():
+                t.cancel()
+            raise
+
+    def walk(self, n: object, args: bool, debug: bool = False):
+        """Start the lookups of a node, in a proc called with args ({args}).
+
+        In {debug} nodes, "_res" is the result of the node being debugged.
+        """
+        if isinstance(n, Node):
+            n = n.root
+        if not isinstance(n, BaseNode):
+            return
+        if n.debug is not None:
+            self.walk(n.debug, args, True)
+        match n:
+            case VariableNode():
+                if not args and not (debug and n.key == "_res"):
+                    self.key(n.key)
+            case NumberNode(args=VariableNode()):
+                self.walk(n.args, args, debug)
+            case NumberNode() | StringNode() | BranchNode():
+                for a in n.args:
+                    self.walk(a, args, debug)
+            case ProcNode():
+                # Procs called in a proc called with args are called without procs.
+                if not args:
+                    for a in n.args or ():
+                        self.walk(a, args, debug)
+                    self.proc(n.proc, bool(n.args))
+
+    def key(self, key: str):
+        if self.val_resolver is None or ("key", key) in self.tasks:
+            return
+        self.tasks["key", key] = asyncio.ensure_future(self._key(key))
+
+    async def _key(self, key: str):
+        assert self.val_resolver is not None
+        try:
+            self.vals[key] = await self.val_resolver(key)
+        except KeyError:
+            pass
+
+    def proc(self, name: str, args: bool):
+        if (name, args) in self.walked:
+            return
+        self.walked.add((name, args))
+        if not callable(self.proc_source):
+            if self.proc_source is not None and (p := self.proc_source.get(name)):
+                self.walk(Node.model_validate(p) if isinstance(p, dict) else p, args)
+            return
+        if (task := self.tasks.get(("proc", name))) is None:
+            task = self.tasks["proc", name] = asyncio.ensure_future(self._proc(name))
+        task.add_done_callback(lambda t: self._walk_proc(t, name, args))
+
+    async def _proc(self, name: str):
+        assert callable(self.proc_source)
+        try:
+            p = await self.proc_source(name)
+        except KeyError:
+            return
+        if p:
+            self.procs[name] = Node.model_validate(p) if isinstance(p, dict) else p
+
+    def _walk_proc(self, task: asyncio.Task[Any], name: str, args: bool):
+        if not task.cancelled() and task.exception() is None and name in self.procs:
+            self.walk(self.procs[name], args)
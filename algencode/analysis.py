@@ -0,0 +1,96 @@
+"""Static node analysis (free variables and called procs)."""
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from typing import Mapping, TypeVar
+
+from .base_node import BaseNode
+from .node import Node
+from .subnodes import BranchNode, NumberNode, ProcNode, StringNode, VariableNode
+from .types import LiteralNode, Procs
+
+V = TypeVar("V")
+
+
+@dataclass
+class Dependencies:
+    """What reducing a node can read."""
+
+    keys: set[str] = field(default_factory=set)
+    """Keys of vals that can be read."""
+    procs: set[str] = field(default_factory=set)
+    """Names of procs that can be called."""
+    missing: set[str] = field(default_factory=set)
+    """Names of called procs that read the caller's vals but couldn't be resolved."""
+
+
+def dependencies(n: LiteralNode | Node, procs: Procs | None = None) -> Dependencies:
+    """Find the vals keys and procs a node can read, following procs through {procs}.
+
+    Procs called without args read the caller's vals, so their keys are included when
+    the proc can be resolved (and recorded as missing otherwise). Procs called with args
+    only see their args ("_0", "_1", ...), so contribute no keys of their own.
+    """
+    deps = Dependencies()
+    _walk(n, procs, deps, set())
+    return deps
+
+
+def required_keys(n: LiteralNode | Node, procs: Procs | None = None) -> frozenset[str]:
+    """Keys of vals a node can read.
+
+    Raises:
+        KeyError: If a proc reading the caller's vals can't be found in {procs}.
+    """
+    deps = dependencies(n, procs)
+    if deps.missing:
+        name = min(deps.missing)
+        raise KeyError(f'failed to find proc node "{name}"')
+    return frozenset(deps.keys)
+
+
+def project(
+    n: LiteralNode | Node,
+    vals: Mapping[str, V],
+    procs: Procs | None = None,
+) -> dict[str, V]:
+    """Subset of vals (or columns) a node can read."""
+    return {k: vals[k] for k in required_keys(n, procs) if k in vals}
+
+
+def _walk(n: object, procs: Procs | None, deps: Dependencies, seen: set[str]):
+    if isinstance(n, Node):
+        n = n.root
+    if not isinstance(n, BaseNode):
+        return
+    if n.debug is not None and isinstance(n.debug.root, BaseNode):
+        debug = Dependencies()
+        _walk(n.debug, procs, debug, seen)
+        debug.keys.discard("_res")
+        deps.keys |= debug.keys
+        deps.procs |= debug.procs
+        deps.missing |= debug.missing
+    match n:
+        case VariableNode():
+            deps.keys.add(n.key)
+        case NumberNode() | StringNode() | BranchNode():
+            if isinstance(n.args, VariableNode):
+                deps.keys.add(n.args.key)
+            else:
+                for a in n.args:
+                    _walk(a, procs, deps, seen)
+        case ProcNode():
+            deps.procs.add(n.proc)
+            if n.args:
+                for a in n.args:
+                    _walk(a, procs, deps, seen)
+            elif n.proc in seen:
+                pass
+            elif procs is None or not (p := procs.get(n.proc)):
+                deps.missing.add(n.proc)
+            else:
+                if isinstance(p, dict):
+                    p = Node.model_validate(p)
+                _walk(p, procs, deps, seen | {n.proc})
+        case _:
+            raise NotImplementedError(str(n))
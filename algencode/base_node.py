@@ -3,10 +3,11 @@ from __future__ import annotations
 
 import logging
 from abc import ABC
-from typing import TYPE_CHECKING
+from typing import TYPE_CHECKING, Any
 
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, ConfigDict, Field
 
+from .scope import Scope
 from .types import Procs, Reduced, Vals
 
 if TYPE_CHECKING:
@@ -16,10 +17,25 @@ logger = logging.getLogger("algencode.subnodes.base_node")
 
 
 class BaseNode(BaseModel, ABC):
-    """Subnode base type."""
+    """Subnode base type.
+
+    Nodes are immutable, so validated trees can be shared and cached safely.
+    """
+
+    model_config = ConfigDict(frozen=True, defer_build=True)
 
     debug: Node | None = Field(default=None, repr=False)
 
+    @classmethod
+    def model_rebuild(
+        cls, *, force: bool = False, raise_errors: bool = True, **kwargs: Any
+    ) -> bool | None:
+        """Build the schema, which pydantic does when a node is first validated."""
+        from .node import bind_types
+
+        bind_types()
+        return super().model_rebuild(force=force, raise_errors=raise_errors, **kwargs)
+
     def reduce(
         self,
         vals: Vals | None = None,
@@ -37,10 +53,27 @@ class BaseNode(BaseModel, ABC):
             KeyError: If "_res_lhs" or "_res_rhs" not present in vals.
         """
         assert vals is not None
-        res = vals["_res"]
-        if force_debug or (self.debug is not None and self.debug.root is not False):
+        return self._reduced(vals["_res"], vals, procs, force_debug=force_debug)
+
+    def _reduced(
+        self,
+        res: Reduced,
+        vals: Vals | None,
+        procs: Procs | None,
+        *,
+        force_debug: bool = False,
+    ) -> Reduced:
+        """Finish reducing this base node with its result.
+
+        Like {reduce}, but takes the result directly instead of through "_res", so
+        subclasses never copy vals. The debug node still sees "_res", layered on top of
+        vals via a {Scope}, and is only reduced when debug logging is enabled.
+        """
+        if not (force_debug or (self.debug is not None and self.debug.root is not False)):
+            return res
+        if logger.isEnabledFor(logging.DEBUG):
             if self.debug is None or self.debug.root is True:
-                logger.debug(f"{repr(self)} -> {res}")
+                logger.debug("%r -> %s", self, res)
             else:
-                logger.debug(self.debug.reduce(vals, procs))
+                logger.debug("%s", self.debug.reduce(Scope({"_res": res}, vals), procs))
         return res
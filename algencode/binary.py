@@ -0,0 +1,423 @@
+"""Compact binary node serialization.
+
+Encodes node trees (and whole proc maps) as tagged opcodes: one byte per node or
+literal, operations folded into the tag, every string (keys, proc names and string
+literals) interned in a table up front, and {Decimal} and {date} literals typed.
+Decoding builds nodes directly, skipping generic pydantic validation, while checking
+every tag, count, index and literal so malformed input raises {ValueError}.
+
+Layout: magic ({MAGIC} for a node, {PROCS_MAGIC} for a proc map), the string table
+(count, then length prefixed UTF-8 strings) and the body. Integers are LEB128
+varints, signed ones zigzag encoded, floats are 8 byte little endian doubles.
+"""
+from __future__ import annotations
+
+import struct
+from datetime import date
+from decimal import Decimal, InvalidOperation
+from typing import Any, Callable
+
+from .base_node import BaseNode
+from .node import Node
+from .subnodes import BranchNode, NumberNode, ProcNode, StringNode, VariableNode
+from .subnodes import branch_node, string_node
+from .types import LiteralNode, Procs
+
+MAGIC = b"AEN\x01"
+"""Header of an encoded node (format version 1)."""
+
+PROCS_MAGIC = b"AEP\x01"
+"""Header of an encoded proc map (format version 1)."""
+
+# Wire opcodes, append only: tags (and op indices) must keep their meaning.
+NUMBER_OPS = ("add", "sub", "mul", "mod", "div", "min", "max", "round", "len", "mean")
+STRING_OPS = ("slice", "fmt", "rep", "join", "date")
+BRANCH_OPS = ("if", "and", "or", "not", "eq", "ne", "lt", "le", "gt", "ge")
+
+NONE = 0x00
+FALSE = 0x01
+TRUE = 0x02
+INT = 0x03
+FLOAT = 0x04
+STR = 0x05
+DECIMAL = 0x06
+DATE = 0x07
+BOXED = 0x0E
+"""A literal wrapped in a {Node} (rather than a bare literal argument)."""
+DEBUG = 0x0F
+"""Debug node, followed by the subnode it belongs to."""
+VARIABLE = 0x10
+PROC = 0x11
+NUMBER = 0x20
+"""First number op tag, {NUMBER + NUMBER_OPS.index(op)}."""
+STRING = 0x40
+"""First string op tag, {STRING + STRING_OPS.index(op)}."""
+BRANCH = 0x60
+"""First branch op tag, {BRANCH + BRANCH_OPS.index(op)}."""
+
+_FLOAT = struct.Struct("<d")
+_NUMBER_OP_INDEX = {op: i for i, op in enumerate(NUMBER_OPS)}
+_STRING_OP_INDEX = {op: i for i, op in enumerate(STRING_OPS)}
+_BRANCH_OP_INDEX = {op: i for i, op in enumerate(BRANCH_OPS)}
+
+
+def to_bytes(n: LiteralNode | Node) -> bytes:
+    """Encode a node."""
+    e = _Encoder()
+    e.node(n)
+    return e.finish(MAGIC)
+
+
+def from_bytes(data: bytes) -> Node:
+    """Decode a node.
+
+    Raises:
+        ValueError: If the data is malformed.
+    """
+    d = _Decoder(data, MAGIC)
+    n = d.node()
+    d.end()
+    return n
+
+
+def procs_to_bytes(procs: Procs) -> bytes:
+    """Encode a proc map, with one string table shared by every proc."""
+    e = _Encoder()
+    e.uint(len(procs))
+    for name in procs:
+        p = procs[name]
+        e.string(name)
+        e.node(p if isinstance(p, Node) else Node.model_validate(p))
+    return e.finish(PROCS_MAGIC)
+
+
+def procs_from_bytes(data: bytes) -> dict[str, Node]:
+    """Decode a proc map.
+
+    Raises:
+        ValueError: If the data is malformed.
+    """
+    d = _Decoder(data, PROCS_MAGIC)
+    procs = {}
+    for _ in range(d.uint()):
+        name = d.string()
+        procs[name] = d.node()
+    d.end()
+    return procs
+
+
+class _Encoder:
+    def __init__(self):
+        self.out = bytearray()
+        self.strings: dict[str, int] = {}
+
+    def finish(self, magic: bytes) -> bytes:
+        head = _Encoder()
+        head.uint(len(self.strings))
+        for s in self.strings:
+            b = s.encode()
+            head.uint(len(b))
+            head.out += b
+        return magic + bytes(head.out) + bytes(self.out)
+
+    def uint(self, i: int):
+        out = self.out
+        while i > 0x7F:
+            out.append(i & 0x7F | 0x80)
+            i >>= 7
+        out.append(i)
+
+    def string(self, s: str):
+        if (i := self.strings.get(s)) is None:
+            i = self.strings[s] = len(self.strings)
+        self.uint(i)
+
+    def node(self, n: LiteralNode | Node):
+        r = n.root if isinstance(n, Node) else n
+        if isinstance(r, BaseNode):
+            self.subnode(r)
+        else:
+            if isinstance(n, Node):
+                self.out.append(BOXED)
+            self.literal(r)
+
+    def literal(self, v: LiteralNode):
+        out = self.out
+        match v:
+            case None:
+                out.append(NONE)
+            case bool():
+                out.append(TRUE if v else FALSE)
+            case int():
+                out.append(INT)
+                self.uint(v << 1 if v >= 0 else (-v << 1) - 1)
+            case float():
+                out.append(FLOAT)
+                out += _FLOAT.pack(v)
+            case str():
+                out.append(STR)
+                self.string(v)
+            case Decimal():
+                out.append(DECIMAL)
+                self.string(str(v))
+            case date():
+                out.append(DATE)
+                self.uint(v.toordinal())
+            case _:
+                raise TypeError(f"can't encode literal of type {type(v).__name__}")
+
+    def args(self, args: tuple[LiteralNode | Node, ...]):
+        self.uint(len(args))
+        for a in args:
+            self.node(a)
+
+    def subnode(self, n: BaseNode):
+        out = self.out
+        if n.debug is not None:
+            out.append(DEBUG)
+            self.node(n.debug)
+        match n:
+            case VariableNode():
+                out.append(VARIABLE)
+                self.string(n.key)
+            case NumberNode():
+                out.append(NUMBER + _NUMBER_OP_INDEX[n.op])
+                if isinstance(n.args, VariableNode):
+                    # Args looked up from vals, marked by a zero count + 1.
+                    self.uint(0)
+                    self.subnode(n.args)
+                else:
+                    self.uint(len(n.args) + 1)
+                    for a in n.args:
+                        self.node(a)
+            case StringNode():
+                out.append(STRING + _STRING_OP_INDEX[n.op])
+                self.args(n.args)
+            case BranchNode():
+                out.append(BRANCH + _BRANCH_OP_INDEX[n.op])
+                self.args(n.args)
+            case ProcNode():
+                out.append(PROC)
+                self.string(n.proc)
+                # None and () args are told apart by a zero count + 1.
+                self.uint(0 if n.args is None else len(n.args) + 1)
+                for a in n.args or ():
+                    self.node(a)
+            case _:
+                raise NotImplementedError(str(n))
+
+
+class _Decoder:
+    def __init__(self, data: bytes, magic: bytes):
+        if not isinstance(data, (bytes, bytearray, memoryview)):
+            raise TypeError(f"expected bytes, found {type(data).__name__}")
+        self.data = bytes(data)
+        if not self.data.startswith(magic):
+            raise ValueError(f"expected data starting with {magic!r}")
+        self.pos = len(magic)
+        self.strings: list[str] = []
+        for _ in range(self.uint()):
+            size = self.uint()
+            self.strings.append(self.take(size).decode())
+        self.subnodes: dict[int, Callable[[int, dict[str, Any]], Any]] = {
+            VARIABLE: self.variable,
+            PROC: self.proc,
+            **{NUMBER + i: self.number for i in range(len(NUMBER_OPS))},
+            **{STRING + i: self.string_op for i in range(len(STRING_OPS))},
+            **{BRANCH + i: self.branch for i in range(len(BRANCH_OPS))},
+        }
+
+    def end(self):
+        if self.pos != len(self.data):
+            raise ValueError(f"trailing data at offset {self.pos}")
+
+    def take(self, size: int) -> bytes:
+        end = self.pos + size
+        if end > len(self.data):
+            raise ValueError("unexpected end of data")
+        b = self.data[self.pos : end]
+        self.pos = end
+        return b
+
+    def byte(self) -> int:
+        try:
+            b = self.data[self.pos]
+        except IndexError:
+            raise ValueError("unexpected end of data") from None
+        self.pos += 1
+        return b
+
+    def uint(self) -> int:
+        data = self.data
+        res = shift = 0
+        try:
+            while True:
+                b = data[self.pos]
+                self.pos += 1
+                res |= (b & 0x7F) << shift
+                if b < 0x80:
+                    return res
+                shift += 7
+        except IndexError:
+            raise ValueError("unexpected end of data") from None
+
+    def string(self) -> str:
+        i = self.uint()
+        if i >= len(self.strings):
+            raise ValueError(f"string index {i} out of range")
+        return self.strings[i]
+
+    def node(self) -> Node:
+        """Decode a node, literals included (as {Node(literal)})."""
+        return _boxed(self.decode(self.arg))
+
+    def decode(self, start: Callable[[], Any]) -> Any:
+        """Decode a tree from {start}, with an explicit stack of pending nodes (rather
+        than recursion) so arbitrarily deep input decodes without {RecursionError}."""
+        stack: list[_Pending] = []
+        item = start()
+        while True:
+            while isinstance(item, _Pending):
+                if len(item.values) < item.count:
+                    stack.append(item)
+                    item = item.child()
+                else:
+                    item = item.build(item.values)
+            if not stack:
+                return item
+            parent = stack.pop()
+            parent.values.append(item)
+            item = parent
+
+    def arg(self) -> LiteralNode | Node | _Pending:
+        """Decode an argument, literals are kept bare unless boxed."""
+        tag = self.byte()
+        if tag < BOXED:
+            return self.literal(tag)
+        if tag == BOXED:
+            tag = self.byte()
+            if tag >= BOXED:
+                raise ValueError(f"expected literal, found tag {tag:#04x}")
+            return Node.model_construct(self.literal(tag))
+        return _then(self.subnode(tag), Node.model_construct)
+
+    def literal(self, tag: int) -> LiteralNode:
+        if tag == NONE:
+            return None
+        if tag == FALSE:
+            return False
+        if tag == TRUE:
+            return True
+        if tag == INT:
+            i = self.uint()
+            return -((i + 1) >> 1) if i & 1 else i >> 1
+        if tag == FLOAT:
+            return _FLOAT.unpack(self.take(_FLOAT.size))[0]
+        if tag == STR:
+            return self.string()
+        if tag == DECIMAL:
+            s = self.string()
+            try:
+                return Decimal(s)
+            except InvalidOperation:
+                raise ValueError(f"invalid decimal {s!r}") from None
+        if tag == DATE:
+            try:
+                return date.fromordinal(self.uint())
+            except (ValueError, OverflowError):
+                raise ValueError("invalid date ordinal") from None
+        raise ValueError(f"unknown literal tag {tag:#04x}")
+
+    def subnode(self, tag: int, fields: dict[str, Any] | None = None) -> Any:
+        if tag == DEBUG and fields is None:
+
+            def debugged(vs: list[Any]) -> Any:
+                # The debug node precedes the subnode it belongs to.
+                return self.subnode(self.byte(), {"debug": _boxed(vs[0])})
+
+            return _Pending(1, self.arg, debugged)
+        try:
+            f = self.subnodes[tag]
+        except KeyError:
+            raise ValueError(f"unknown node tag {tag:#04x}") from None
+        return f(tag, fields or {})
+
+    def args(self, count: int, build: Callable[[tuple[Any, ...]], Any]) -> _Pending:
+        if count > len(self.data) - self.pos:
+            raise ValueError(f"arg count {count} exceeds the remaining data")
+        return _Pending(count, self.arg, lambda vs: build(tuple(vs)))
+
+    def variable(self, tag: int, fields: dict[str, Any]) -> VariableNode:
+        return VariableNode.model_construct(key=self.string(), **fields)
+
+    def proc(self, tag: int, fields: dict[str, Any]) -> ProcNode | _Pending:
+        name = self.string()
+        if not (count := self.uint()):
+            return ProcNode.model_construct(proc=name, args=None, **fields)
+        return self.args(
+            count - 1,
+            lambda args: ProcNode.model_construct(proc=name, args=args, **fields),
+        )
+
+    def number(self, tag: int, fields: dict[str, Any]) -> _Pending:
+        op = NUMBER_OPS[tag - NUMBER]
+        if count := self.uint():
+            return self.args(
+                count - 1,
+                lambda args: NumberNode.model_construct(op=op, args=args, **fields),
+            )
+
+        def variable(vs: list[Any]) -> NumberNode:
+            if not isinstance(args := vs[0], VariableNode):
+                raise ValueError(f"expected variable node args, found {args}")
+            return NumberNode.model_construct(op=op, args=args, **fields)
+
+        return _Pending(1, lambda: self.subnode(self.byte()), variable)
+
+    def string_op(self, tag: int, fields: dict[str, Any]) -> _Pending:
+        op = STRING_OPS[tag - STRING]
+        # Checked here as validation would, since decoded nodes skip it.
+        if message := string_node.arity_error(op, count := self.uint()):
+            raise ValueError(message)
+        return self.args(
+            count, lambda args: StringNode.model_construct(op=op, args=args, **fields)
+        )
+
+    def branch(self, tag: int, fields: dict[str, Any]) -> _Pending:
+        op = BRANCH_OPS[tag - BRANCH]
+        if message := branch_node.arity_error(op, count := self.uint()):
+            raise ValueError(message)
+        return self.args(
+            count, lambda args: BranchNode.model_construct(op=op, args=args, **fields)
+        )
+
+
+class _Pending:
+    """Node being decoded, waiting for its children to be."""
+
+    __slots__ = ("count", "child", "build", "values")
+
+    def __init__(
+        self, count: int, child: Callable[[], Any], build: Callable[[list[Any]], Any]
+    ):
+        self.count = count
+        """Number of children."""
+        self.child = child
+        """Starts decoding the next child."""
+        self.build = build
+        """Builds the node (or further pending node) from the decoded children."""
+        self.values: list[Any] = []
+        """Children decoded so far."""
+
+
+def _then(item: Any, f: Callable[[Any], Any]) -> Any:
+    """Apply f to a decoded item, once built if it's pending."""
+    if isinstance(item, _Pending):
+        build = item.build
+        item.build = lambda vs: _then(build(vs), f)
+        return item
+    return f(item)
+
+
+def _boxed(v: LiteralNode | Node) -> Node:
+    return v if isinstance(v, Node) else Node.model_construct(v)
@@ -0,0 +1,94 @@
+"""Content-addressed node parse cache."""
+from __future__ import annotations
+
+import hashlib
+import json
+from datetime import date
+from decimal import Decimal
+
+from pydantic import BaseModel
+
+from .lru import CacheInfo, LRUCache
+from .node import Node
+from .types import Json
+
+
+def content_key(data: str | bytes | Json) -> bytes:
+    """Canonical content hash of a node document (JSON text or Python object).
+
+    Documents equal up to whitespace and key order hash equal, whether given as text
+    or as an object. Python only literals ({Decimal}, {date}) are tagged, and hashed in
+    a separate namespace, so they never hash like the JSON they'd dump to.
+    """
+    if isinstance(data, (str, bytes)):
+        data = json.loads(data)
+    tagged = False
+
+    def tag(o: object) -> Json:
+        nonlocal tagged
+        match o:
+            case Decimal():
+                tagged = True
+                return ["$decimal", str(o)]
+            case date():
+                tagged = True
+                return ["$date", o.isoformat()]
+            case BaseModel():
+                return o.model_dump(exclude_defaults=True)
+        raise TypeError(f"Object of type {type(o).__name__} is not JSON serializable")
+
+    text = json.dumps(
+        data,
+        sort_keys=True,
+        separators=(",", ":"),
+        ensure_ascii=False,
+        default=tag,
+    )
+    prefix = b"p" if tagged else b"j"
+    return hashlib.blake2b(prefix + text.encode(), digest_size=16).digest()
+
+
+class ParseCache:
+    """Content-addressed node parse cache.
+
+    Keeps up to {maxsize} parsed nodes keyed by the {content_key} of their document.
+    Nodes are immutable, so cached trees are safe to share between callers.
+    """
+
+    def __init__(self, maxsize: int | None = 1024):
+        self._cache: LRUCache[bytes, Node] = LRUCache(maxsize)
+
+    @property
+    def maxsize(self) -> int | None:
+        """Maximum number of cached nodes."""
+        return self._cache.maxsize
+
+    @maxsize.setter
+    def maxsize(self, maxsize: int | None):
+        self._cache.maxsize = maxsize
+
+    def parse(self, data: str | bytes | Json | Node) -> Node:
+        """Parse a node from JSON text or a Python object, reusing cached nodes."""
+        if isinstance(data, Node):
+            return data
+        key = content_key(data)
+        if (n := self._cache.get(key)) is not None:
+            return n
+        if isinstance(data, (str, bytes)):
+            n = Node.model_validate_json(data)
+        else:
+            n = Node.model_validate(data)
+        self._cache.put(key, n)
+        return n
+
+    def info(self) -> CacheInfo:
+        """Hit, miss and eviction counters (and sizes)."""
+        return self._cache.info()
+
+    def clear(self):
+        """Drop every cached node."""
+        self._cache.clear()
+
+
+parse_cache = ParseCache()
+"""Default parse cache used by {Node.parse_cached}."""
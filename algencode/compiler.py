@@ -0,0 +1,398 @@
+"""Node compiler.
+
+Lowers a validated node tree into plain Python closures with every operation and
+arity resolved ahead of time, so evaluation skips the per-node dispatch of
+{Node.reduce}.
+"""
+from __future__ import annotations
+
+import weakref
+from contextvars import ContextVar
+from datetime import date
+from functools import partial, reduce
+from typing import (
+    TYPE_CHECKING,
+    Callable,
+    Hashable,
+    Sequence,
+    Type,
+    TypeAlias,
+    get_args,
+)
+
+from .base_node import BaseNode
+from .cse import CSEAnalysis, analyze
+from .infer import ANY, Schema, Types, infer_all, proves
+from .kernels import strftime, template
+from .node import Node
+from .scope import ArgScope
+from .subnodes import BranchNode, NumberNode, ProcNode, StringNode, VariableNode
+from .subnodes.branch_node import BRANCH_OP_COMPARISONS
+from .subnodes.number_node import NUMBER_OP_BUILTINreduce_nodeRS
+from .types import LiteralNode, Number, Procs, Reduced, T, Vals
+from .utils import call_attr_op, reduce_node_to
+
+if TYPE_CHECKING:
+    from .profiler import Path, Profiler
+
+Compiled: TypeAlias = Callable[[Vals | None, Procs | None], Reduced]
+"""Compiled node, called as {f(vals, procs)}."""
+
+_compiled: dict[tuple[int, bool], Compiled] = {}
+
+_memo: ContextVar[dict[object, Reduced]] = ContextVar("algencode.compiler.memo")
+
+
+def compile_cached(n: Node, *, cse: bool = False) -> Compiled:
+    """Compile a node once, reusing the result for as long as the node is alive."""
+    key = (id(n), cse)
+    try:
+        return _compiled[key]
+    except KeyError:
+        pass
+    f = _compiled[key] = compile_node(n, cse=cse)
+    weakref.finalize(n, _compiled.pop, key, None)
+    return f
+
+
+def compile_node(
+    n: LiteralNode | Node,
+    *,
+    cse: bool = False,
+    profiler: Profiler | None = None,
+    path: Path = (),
+    schema: Schema | None = None,
+    memo: dict[int, Compiled] | None = None,
+) -> Compiled:
+    """Compile a node (or literal) into a callable returning what {reduce} returns.
+
+    With {cse}, structurally identical subtrees are evaluated once per call and their
+    result reused (see {algencode.cse}). With a {profiler}, every subnode is timed under
+    its path, rooted at {path} (see {algencode.profiler}). Type checks of args that
+    inference proves (given the declared types of vals in {schema}) are skipped, see
+    {algencode.infer}.
+
+    With a {memo} of compiled subnodes by id, subnodes found there are reused and the
+    others added. The caller keeps those subnodes alive (see {algencode.intern}), and
+    can't combine a memo with the other options, which compile subnodes differently.
+
+    Raises:
+        ValueError: If a memo is given with {cse}, a profiler or a schema.
+    """
+    if memo is not None:
+        if cse or profiler is not None or schema is not None:
+            raise ValueError("can't compile with a memo and cse, a profiler or a schema")
+        if isinstance(n, Node) and (f := memo.get(id(n.root))) is not None:
+            return f
+    paths = profiler.paths(n, path) if profiler is not None else None
+    types = infer_all(n, schema)
+    if not cse or not isinstance(n, Node):
+        return Compiler(profiler=profiler, paths=paths, types=types, memo=memo).node(n)
+    analysis = analyze(n)
+    f = Compiler(analysis, profiler=profiler, paths=paths, types=types).node(n)
+    if not analysis.shared:
+        return f
+
+    def memoized(vals: Vals | None, procs: Procs | None) -> Reduced:
+        token = _memo.set({})
+        try:
+            return f(vals, procs)
+        finally:
+            _memo.reset(token)
+
+    return memoized
+
+
+class Compiler:
+    """Node compiler."""
+
+    def __init__(
+        self,
+        cse: CSEAnalysis | None = None,
+        *,
+        profiler: Profiler | None = None,
+        paths: dict[int, Path] | None = None,
+        types: dict[int, Types] | None = None,
+        memo: dict[int, Compiled] | None = None,
+    ):
+        self.cse = cse
+        self.profiler = profiler
+        self.paths = paths or {}
+        self.types = types or {}
+        self.memo = memo
+        self._slots: dict[Hashable, object] = {}
+
+    def node(self, n: LiteralNode | Node | BaseNode) -> Compiled:
+        """Compile a node (or literal)."""
+        if isinstance(n, Node):
+            n = n.root
+        if not isinstance(n, BaseNode):
+            return partial(_literal, n)
+        if self.memo is not None:
+            try:
+                return self.memo[id(n)]
+            except KeyError:
+                pass
+            f = self.memo[id(n)] = self._subnode(n)
+            return f
+        f = self._subnode(n)
+        if self.profiler is not None:
+            f = self.profiler.instrument(n, self.paths[id(n)], f)
+        if self.cse is not None and (k := self.cse.keys.get(id(n))) in self.cse.shared:
+            f = _shared(self._slots.setdefault(k, object()), f)
+        return f
+
+    def _subnode(self, n: BaseNode) -> Compiled:
+        if n.debug is not None and n.debug.root is not False:
+            # Keep debug logging intact by deferring to the tree-walking reducer.
+            return n.reduce
+        match n:
+            case VariableNode():
+                return self.variable(n)
+            case NumberNode():
+                return self.number(n)
+            case StringNode():
+                return self.string(n)
+            case BranchNode():
+                return self.branch(n)
+            case ProcNode():
+                return self.proc(n)
+        raise NotImplementedError(str(n))
+
+    def to(
+        self,
+        n: LiteralNode | Node,
+        t: Type[T],
+    ) -> Callable[[Vals | None, Procs | None], T]:
+        """Compile an argument that {reduce_node_to} would check against {t}."""
+        check = get_args(t) or t
+        if not isinstance(n, Node):
+            if isinstance(n, check):
+                return partial(_literal, n)  # type: ignore
+
+            def mistyped(vals: Vals | None, procs: Procs | None) -> T:
+                raise TypeError(
+                    f"node {n} expected to reduce to {t}, found {type(n)} {n}"
+                )
+
+            return mistyped
+
+        f = self.node(n)
+        if proves(self.types.get(id(n.root), ANY), t):
+            return f
+
+        def checked(vals: Vals | None, procs: Procs | None) -> T:
+            res = f(vals, procs)
+            if not isinstance(res, check):
+                raise TypeError(
+                    f"node {n} expected to reduce to {t}, found {type(res)} {res}"
+                )
+            return res  # type: ignore
+
+        return checked
+
+    def variable(self, n: VariableNode) -> Compiled:
+        """Compile a variable node."""
+        key = n.key
+
+        def variable(vals: Vals | None, procs: Procs | None) -> Reduced:
+            if vals is None:
+                raise RuntimeError(
+                    f"value node with key={key} expected dictionary of values"
+                )
+            try:
+                return vals[key]
+            except KeyError:
+                pass
+            raise KeyError(f"key={key} not found in values")
+
+        return variable
+
+    def number(self, n: NumberNode) -> Compiled:
+        """Compile a numeric operation node."""
+        if isinstance(n.args, VariableNode):
+            return self.number_seq(n)
+        args = n.args
+        op = n.op
+        if f := NUMBER_OP_BUILTINreduce_nodeRS.get(op):
+            fs = [self.to(a, Number) for a in args]
+            match fs:
+                case [a]:
+                    return a
+                case [a, b]:
+                    return lambda vals, procs: f(a(vals, procs), b(vals, procs))
+                case _:
+                    # Folding as operands are produced, so errors raise in reduce's order.
+                    return lambda vals, procs: reduce(f, (g(vals, procs) for g in fs))
+        match op, args:
+            case "round", [x]:
+                x_ = self.to(x, Number)
+                return lambda vals, procs: round(x_(vals, procs))
+            case "round", [x, ndigits]:
+                x_ = self.to(x, Number)
+                nd_ = self.to(ndigits, int | None)
+                return lambda vals, procs: round(x_(vals, procs), nd_(vals, procs))
+            case "len", _:
+                length = len(args)
+                return lambda vals, procs: length
+            case "mean", _:
+                fs = [self.to(a, Number) for a in args]
+                count = len(fs)
+                return lambda vals, procs: sum([g(vals, procs) for g in fs]) / count
+        # Malformed arity, raise the same error as the tree-walking reducer.
+        return partial(call_attr_op, n)
+
+    def number_seq(self, n: NumberNode) -> Compiled:
+        """Compile a numeric node whose args are a sequence looked up from vals."""
+        assert isinstance(n.args, VariableNode)
+        seq = self.variable(n.args)
+        if f := NUMBER_OP_BUILTINreduce_nodeRS.get(n.op):
+
+            def builtin(vals: Vals | None, procs: Procs | None) -> Reduced:
+                args = _as_sequence(seq(vals, procs))
+                return reduce(f, (reduce_node_to(a, Number, vals, procs) for a in args))
+
+            return builtin
+        return partial(call_attr_op, n)
+
+    def string(self, n: StringNode) -> Compiled:
+        """Compile a string operation node."""
+        match n.op, n.args:
+            case "slice", [s, stop]:
+                s_ = self.to(s, str)
+                stop_ = self.to(stop, int | None)
+                return lambda vals, procs: s_(vals, procs)[: stop_(vals, procs)]
+            case "slice", [s, start, stop]:
+                s_ = self.to(s, str)
+                start_ = self.to(start, int | None)
+                stop_ = self.to(stop, int | None)
+                return lambda vals, procs: s_(vals, procs)[
+                    start_(vals, procs) : stop_(vals, procs)
+                ]
+            case "slice", [s, start, stop, step]:
+                s_ = self.to(s, str)
+                start_ = self.to(start, int | None)
+                stop_ = self.to(stop, int | None)
+                step_ = self.to(step, int | None)
+                return lambda vals, procs: s_(vals, procs)[
+                    start_(vals, procs) : stop_(vals, procs) : step_(vals, procs)
+                ]
+            case "fmt", [str() as fmt, *args]:
+                t = template(fmt)
+                fs = [self.node(a) for a in args]
+                return lambda vals, procs: t([g(vals, procs) for g in fs])
+            case "fmt", [fmt, *args]:
+                fmt_ = self.to(fmt, str)
+                fs = [self.node(a) for a in args]
+                return lambda vals, procs: template(fmt_(vals, procs))(
+                    [g(vals, procs) for g in fs]
+                )
+            case "rep", [s, count]:
+                s_ = self.to(s, str)
+                count_ = self.to(count, int)
+                return lambda vals, procs: s_(vals, procs) * count_(vals, procs)
+            case "join", [delim, *args]:
+                delim_ = self.to(delim, str)
+                fs = [self.to(a, str) for a in args]
+                return lambda vals, procs: delim_(vals, procs).join(
+                    [g(vals, procs) for g in fs]
+                )
+            case "date", [fmt, d]:
+                fmt_ = self.to(fmt, str)
+                d_ = self.to(d, date)
+
+                def date_(vals: Vals | None, procs: Procs | None) -> str:
+                    f = fmt_(vals, procs)
+                    return strftime(d_(vals, procs), f)
+
+                return date_
+        # Malformed arity, raise the same error as the tree-walking reducer.
+        return partial(call_attr_op, n)
+
+    def branch(self, n: BranchNode) -> Compiled:
+        """Compile a branch node, reducing only the args {reduce} would."""
+        fs = [self.node(a) for a in n.args]
+        compare = BRANCH_OP_COMPARISONS.get(n.op)
+        match n.op, fs:
+            case _, [lhs, rhs] if compare is not None:
+                return lambda vals, procs: compare(lhs(vals, procs), rhs(vals, procs))
+            case "if", [cond, if_true, if_false]:
+                return lambda vals, procs: (
+                    if_true(vals, procs) if cond(vals, procs) else if_false(vals, procs)
+                )
+            case "not", [a]:
+                return lambda vals, procs: not a(vals, procs)
+            case ("and" | "or"), [a]:
+                return a
+            case "and", [a, b]:
+                return lambda vals, procs: a(vals, procs) and b(vals, procs)
+            case "or", [a, b]:
+                return lambda vals, procs: a(vals, procs) or b(vals, procs)
+            case "and", _:
+
+                def and_(vals: Vals | None, procs: Procs | None) -> Reduced:
+                    for g in fs:
+                        if not (res := g(vals, procs)):
+                            return res
+                    return res
+
+                return and_
+            case "or", _:
+
+                def or_(vals: Vals | None, procs: Procs | None) -> Reduced:
+                    for g in fs:
+                        if res := g(vals, procs):
+                            return res
+                    return res
+
+                return or_
+        # Malformed arity, raise the same error as the tree-walking reducer.
+        return partial(call_attr_op, n)
+
+    def proc(self, n: ProcNode) -> Compiled:
+        """Compile a stored procedure node (procs are looked up when called)."""
+        name = n.proc
+        fs = [self.node(a) for a in n.args] if n.args else None
+        profiler = self.profiler
+        path = self.paths.get(id(n), ())
+
+        def proc(vals: Vals | None, procs: Procs | None) -> Reduced:
+            if procs is None:
+                raise RuntimeError("expected proc map, found None")
+            if p := procs.get(name):
+                if profiler is not None:
+                    f = profiler.proc(path, p)
+                elif isinstance(p, dict):
+                    f = compile_node(Node.model_validate(p))
+                else:
+                    f = compile_cached(p)
+                if fs:
+                    return f(ArgScope([g(vals, procs) for g in fs]), None)
+                return f(vals, procs)
+            raise KeyError(f'failed to find proc node "{name}"')
+
+        return proc
+
+
+def _literal(value: LiteralNode, vals: Vals | None, procs: Procs | None) -> Reduced:
+    return value
+
+
+def _shared(slot: object, f: Compiled) -> Compiled:
+    """Evaluate a shared subtree once per (memoized) call."""
+
+    def shared(vals: Vals | None, procs: Procs | None) -> Reduced:
+        memo = _memo.get()
+        try:
+            return memo[slot]
+        except KeyError:
+            pass
+        res = memo[slot] = f(vals, procs)
+        return res
+
+    return shared
+
+
+def _as_sequence(args: Reduced) -> Sequence[LiteralNode | Node]:
+    assert isinstance(args, list) or isinstance(args, tuple)
+    return args
@@ -0,0 +1,132 @@
+"""Common subexpression analysis.
+
+Finds structurally identical subtrees of a node, so each can be evaluated once per
+reduction and its result reused (see {compile_node} with {cse=True}).
+"""
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from typing import Hashable, Iterator
+
+from pydantic import BaseModel
+
+from .base_node import BaseNode
+from .node import Node
+from .subnodes import VariableNode
+from .types import LiteralNode
+
+
+@dataclass
+class CSEStats:
+    """Common subexpression statistics."""
+
+    shared: int = 0
+    """Distinct subtrees that occur more than once (and are evaluated once)."""
+    deduplicated: int = 0
+    """Node evaluations removed by reusing shared subtrees."""
+
+
+@dataclass
+class CSEAnalysis:
+    """Common subexpression analysis of a node tree."""
+
+    keys: dict[int, Hashable] = field(default_factory=dict)
+    """Structural key by subnode id."""
+    shared: set[Hashable] = field(default_factory=set)
+    """Structural keys of subtrees to evaluate once and reuse."""
+    stats: CSEStats = field(default_factory=CSEStats)
+
+
+def structural_key(n: LiteralNode | Node | BaseNode) -> Hashable:
+    """Structural key of a node, equal for (and only for) identical trees.
+
+    Literals are keyed by type and repr, so e.g. {1}, {1.0}, {True} and {-0.0}/{0.0} are
+    told apart even though they compare equal.
+    """
+    return _Analyzer().key(n)
+
+
+def analyze(n: Node) -> CSEAnalysis:
+    """Find the subtrees of a node worth evaluating once and reusing."""
+    a = _Analyzer()
+    a.key(n)
+    counts: dict[Hashable, int] = {}
+    for r in a.subnodes(n):
+        k = a.keys[id(r)]
+        counts[k] = counts.get(k, 0) + 1
+
+    res = CSEAnalysis(keys=a.keys)
+    seen: set[Hashable] = set()
+
+    def visit(x: Node):
+        r = x.root
+        if not isinstance(r, BaseNode):
+            return
+        k = a.keys[id(r)]
+        if counts[k] > 1 and not _trivial(r):
+            if k in seen:
+                res.shared.add(k)
+                res.stats.deduplicated += a.sizes[id(r)]
+                return
+            seen.add(k)
+        for c in _children(r):
+            visit(c)
+
+    visit(n)
+    res.stats.shared = len(res.shared)
+    return res
+
+
+def _trivial(r: BaseNode) -> bool:
+    """Whether reusing a subtree isn't worth it (or would drop debug logging)."""
+    if isinstance(r, VariableNode):
+        return True
+    return r.debug is not None and r.debug.root is not False
+
+
+def _children(r: BaseNode) -> Iterator[Node]:
+    for name in type(r).model_fields:
+        if name == "debug":
+            continue
+        v = getattr(r, name)
+        if isinstance(v, Node):
+            yield v
+        elif isinstance(v, tuple):
+            yield from (a for a in v if isinstance(a, Node))
+
+
+class _Analyzer:
+    def __init__(self):
+        self.keys: dict[int, Hashable] = {}
+        self.sizes: dict[int, int] = {}
+
+    def subnodes(self, n: Node) -> Iterator[BaseNode]:
+        r = n.root
+        if isinstance(r, BaseNode):
+            yield r
+            for c in _children(r):
+                yield from self.subnodes(c)
+
+    def key(self, n: object) -> Hashable:
+        match n:
+            case Node():
+                return self.key(n.root)
+            case BaseNode():
+                try:
+                    return self.keys[id(n)]
+                except KeyError:
+                    pass
+                fields = type(n).model_fields
+                k = (type(n), tuple(self.key(getattr(n, f)) for f in fields))
+                self.keys[id(n)] = k
+                self.sizes[id(n)] = 1 + sum(
+                    self.sizes[id(c.root)]
+                    for c in _children(n)
+                    if isinstance(c.root, BaseNode)
+                )
+                return k
+            case tuple():
+                return tuple(self.key(a) for a in n)
+            case BaseModel():  # pragma: no cover
+                raise NotImplementedError(str(n))
+        return (type(n), repr(n))
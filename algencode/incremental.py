@@ -0,0 +1,249 @@
+"""Incremental re-evaluation.
+
+An {Incremental} evaluator expands a node (and the procs it calls) into a graph of
+cells, one per subnode, each remembering its last result and knowing the cells it
+reads. Updating some vals only recomputes the cells downstream of them, in dependency
+order, and stops propagating wherever a recomputed result is unchanged.
+
+```python
+levy = Incremental(n, vals, procs)
+levy.value
+levy.update({"rate": Decimal("0.0125")})  # recomputes only what reads "rate"
+```
+
+Procs are expanded in place: procs called without args read the caller's vals, and
+the args of procs called with args ({_0}, {_1}, ...) are cells of their own, so a
+changed val only recomputes the args (and proc bodies) that depend on it. Every
+branch of a conditional is a cell kept up to date, and a cell that raises keeps the
+error as its result, only raised when read: branches that aren't taken never fail the
+evaluation. Nodes with debug enabled, sequence args, malformed arity or recursive
+proc calls are single cells reduced through {Node.reduce}. Procs are resolved once,
+when the evaluator is built.
+"""
+from __future__ import annotations
+
+import heapq
+from typing import Any, Callable, Mapping
+
+from .analysis import dependencies
+from .base_node import BaseNode
+from .ir import Apply
+from .node import Node
+from .scope import ArgScope
+from .subnodes import BranchNode, NumberNode, ProcNode, StringNode, VariableNode
+from .types import LiteralNode, Procs, Reduced, Vals
+
+
+class _Missing:
+    """Value of the cell of a key missing from vals."""
+
+    __slots__ = ("key",)
+
+    def __init__(self, key: str):
+        self.key = key
+
+
+class _Raised:
+    """Value of a cell that raised."""
+
+    __slots__ = ("error",)
+
+    def __init__(self, error: Exception):
+        self.error = error
+
+
+class Incremental:
+    """Incremental node evaluator over vals that change a few keys at a time."""
+
+    def __init__(self, n: LiteralNode | Node, vals: Vals, procs: Procs | None = None):
+        self.vals: dict[str, Any] = dict(vals)
+        """Current vals."""
+        self.procs = procs
+        self.recomputed = 0
+        """Number of cells computed since the last update (or since built)."""
+        self._fs: list[Callable[[], Any]] = []
+        self._values: list[Any] = []
+        self._parents: list[list[int]] = []
+        self._inputs: dict[str, int] = {}
+        self._pending: list[int] = []
+        self._root = self._cell(n, None, procs, ())
+        self._pending = list(range(len(self._fs)))
+
+    def __len__(self) -> int:
+        """Number of cells."""
+        return len(self._fs)
+
+    @property
+    def value(self) -> Reduced:
+        """Result of the node for the current vals, as {Node.reduce} returns."""
+        self._evaluate()
+        return self._get(self._root)
+
+    def update(self, vals: Mapping[str, Any]) -> Reduced:
+        """Change some vals, recompute the cells reading them and return the result."""
+        self.recomputed = 0
+        for k, v in vals.items():
+            old = self.vals.get(k, _Missing)
+            self.vals[k] = v
+            if (i := self._inputs.get(k)) is not None and not _same(old, v):
+                heapq.heappush(self._pending, i)
+        return self.value
+
+    def _evaluate(self):
+        pending = self._pending
+        seen: set[int] = set()
+        while pending:
+            i = pending[0]
+            if i in seen:
+                heapq.heappop(pending)
+                continue
+            try:
+                value = self._fs[i]()
+            except Exception as e:
+                value = _Raised(e)
+            heapq.heappop(pending)
+            seen.add(i)
+            self.recomputed += 1
+            if not _same(self._values[i], value):
+                self._values[i] = value
+                for p in self._parents[i]:
+                    heapq.heappush(pending, p)
+
+    def _get(self, i: int) -> Any:
+        v = self._values[i]
+        if isinstance(v, (_Missing, _Raised)):
+            if isinstance(v, _Raised):
+                raise v.error
+            raise KeyError(f"key={v.key} not found in values")
+        return v
+
+    def _add(self, f: Callable[[], Any], children: list[int] | tuple[int, ...]) -> int:
+        """Add a cell computed by {f} from {children} (added before it)."""
+        i = len(self._fs)
+        self._fs.append(f)
+        self._values.append(_Unset)
+        self._parents.append([])
+        for c in set(children):
+            self._parents[c].append(i)
+        return i
+
+    def _input(self, key: str) -> int:
+        if (i := self._inputs.get(key)) is None:
+            vals = self.vals
+            i = self._inputs[key] = self._add(lambda: vals.get(key, _Missing(key)), ())
+        return i
+
+    def _error(self, e: Callable[[], Exception]) -> int:
+        def error() -> Any:
+            raise e()
+
+        return self._add(error, ())
+
+    def _cell(
+        self,
+        n: LiteralNode | Node,
+        args: tuple[int, ...] | None,
+        procs: Procs | None,
+        calls: tuple[str, ...],
+    ) -> int:
+        """Add the cells of a node, in the vals ({args} is None) or a proc's args."""
+        r = n.root if isinstance(n, Node) else n
+        if not isinstance(r, BaseNode):
+            return self._add(lambda: r, ())
+        if r.debug is not None and r.debug.root is not False:
+            return self._opaque(r, args, procs)
+        match r:
+            case VariableNode():
+                if args is None:
+                    return self._input(r.key)
+                try:
+                    return ArgScope(args)[r.key]  # type: ignore
+                except KeyError:
+                    key = r.key
+                    return self._error(lambda: KeyError(f"key={key} not found in values"))
+            case NumberNode(op="len", args=tuple()):
+                length = len(r.args)
+                return self._add(lambda: length, ())
+            case BranchNode(op="if", args=(_, _, _)):
+                c, t, f = [self._cell(x, args, procs, calls) for x in r.args]
+                get = self._get
+                return self._add(lambda: get(t) if get(c) else get(f), (c, t, f))
+            case BranchNode(op="and" | "or", args=(_, *_)):
+                cs = [self._cell(x, args, procs, calls) for x in r.args]
+                get, stop = self._get, r.op == "or"
+
+                def short_circuit() -> Any:
+                    for c in cs:
+                        if bool(res := get(c)) is stop:
+                            return res
+                    return res
+
+                return self._add(short_circuit, cs)
+            case NumberNode(args=tuple()) | StringNode() | BranchNode():
+                if (a := Apply.of(r)) is not None:
+                    cs = [self._cell(x, args, procs, calls) for x in r.args]
+                    get, checked = self._get, list(zip(cs, a.checks))
+
+                    def apply() -> Any:
+                        # Checking each arg before getting the next (and folding them as
+                        # they're got), as reduce does.
+                        args = (get(c) if t is None else t(get(c)) for c, t in checked)
+                        return a(args if a.fold else list(args))
+
+                    return self._add(apply, cs)
+            case ProcNode():
+                return self._proc(r, args, procs, calls)
+        return self._opaque(r, args, procs)
+
+    def _proc(
+        self,
+        r: ProcNode,
+        args: tuple[int, ...] | None,
+        procs: Procs | None,
+        calls: tuple[str, ...],
+    ) -> int:
+        if procs is None:
+            return self._error(lambda: RuntimeError("expected proc map, found None"))
+        name = r.proc
+        if not (p := procs.get(name)):
+            return self._error(lambda: KeyError(f'failed to find proc node "{name}"'))
+        if name in calls:
+            return self._opaque(r, args, procs)
+        if isinstance(p, dict):
+            p = Node.model_validate(p)
+        if not r.args:
+            return self._cell(p, args, procs, (*calls, name))
+        cs = tuple(self._cell(a, args, procs, calls) for a in r.args)
+        body = self._cell(p, cs, None, (*calls, name))
+        get = self._get
+
+        def call() -> Any:
+            for c in cs:
+                get(c)
+            return get(body)
+
+        return self._add(call, (*cs, body))
+
+    def _opaque(
+        self,
+        r: BaseNode,
+        args: tuple[int, ...] | None,
+        procs: Procs | None,
+    ) -> int:
+        """Add a cell reducing a node through {Node.reduce}."""
+        if args is not None:
+            get = self._get
+            return self._add(
+                lambda: r.reduce(ArgScope([get(c) for c in args]), procs), args
+            )
+        vals = self.vals
+        keys = dependencies(r, procs).keys
+        return self._add(lambda: r.reduce(vals, procs), [self._input(k) for k in keys])
+
+
+class _Unset:
+    """Value of a cell that hasn't been computed."""
+
+
+def _same(a: Any, b: Any) -> bool:
+    return a is b or (type(a) is type(b) and a == b)
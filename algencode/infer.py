@@ -0,0 +1,250 @@
+"""Static type inference.
+
+Infers the types a node (and each of its subtrees) can reduce to from literal types, op
+signatures and, optionally, a schema declaring the types of vals:
+
+```python
+schema = {"tax": Decimal, "units": int}
+n.infer(schema)  # frozenset({Decimal}), or TypeError if ill-typed
+f = n.compile(schema=schema)  # skips the type checks inference proved
+```
+
+Inferred types are sets of Python types, {object} standing for "unknown": keys missing
+from the schema, proc results (procs are looked up when called) and comparisons of
+values of unknown types. A tree is ill-typed if an arg can't possibly have the type its
+op expects (e.g. {add} of a string); args of unknown type are never rejected, so
+inference only rejects trees whose reduction is bound to fail once that arg is reduced.
+Like any static check, both branches of an {if} are checked, and the args of {len}
+(which are counted, not reduced) aren't.
+
+Compiled nodes trust the schema: vals of another type than declared may then raise
+another error than {reduce} would, or none at all.
+"""
+from __future__ import annotations
+
+from datetime import date, datetime
+from decimal import Decimal
+from itertools import chain, product
+from types import NoneType, UnionType
+from typing import Any, Mapping, TypeAlias, Union, get_args, get_origin
+
+from .base_node import BaseNode
+from .node import Node
+from .subnodes import BranchNode, NumberNode, ProcNode, StringNode, VariableNode
+from .subnodes.branch_node import BRANCH_OP_COMPARISONS
+from .types import LiteralNode, Number
+
+Types: TypeAlias = frozenset[type]
+"""Types a node can reduce to."""
+
+Schema: TypeAlias = Mapping[str, Any]
+"""Declared types of vals by key, as types or unions of types (e.g. {int | None})."""
+
+ANY: Types = frozenset({object})
+"""Unknown type."""
+
+_BOOL: Types = frozenset({bool})
+_INT: Types = frozenset({int})
+_STR: Types = frozenset({str})
+_NUMBER: Types = frozenset(get_args(Number))
+_SCALARS = frozenset({*_NUMBER, bool, str, date, datetime, NoneType})
+"""Types whose comparisons are known to return a {bool}."""
+
+
+def infer(n: LiteralNode | Node, schema: Schema | None = None) -> Types:
+    """Types a node can reduce to, given the declared types of vals.
+
+    Raises:
+        TypeError: If the node is ill-typed.
+    """
+    return _Inference(schema, strict=True).types(n)
+
+
+def infer_all(n: LiteralNode | Node, schema: Schema | None = None) -> dict[int, Types]:
+    """Types every subnode of a tree can reduce to, by subnode id.
+
+    Ill-typed subtrees aren't rejected, their types are only not proven.
+    """
+    inference = _Inference(schema, strict=False)
+    inference.types(n)
+    return inference.inferred
+
+
+def proves(types: Types, t: Any) -> bool:
+    """Whether a value of any of {types} passes {isinstance} against {t}."""
+    check = get_args(t) or t
+    return all(issubclass(x, check) for x in types)
+
+
+def schema_types(t: Any) -> Types:
+    """Types of a schema entry (a type, {None}, or a union or tuple of those)."""
+    if isinstance(t, tuple):
+        return frozenset(chain.from_iterable(map(schema_types, t)))
+    origin = get_origin(t)
+    if origin is Union or origin is UnionType:
+        return schema_types(get_args(t))
+    if t is None:
+        return frozenset({NoneType})
+    if isinstance(origin, type):
+        return frozenset({origin})
+    if isinstance(t, type):
+        return frozenset({t})
+    raise TypeError(f"expected a type or union of types in schema, found {t}")
+
+
+class _Inference:
+    def __init__(self, schema: Schema | None, *, strict: bool):
+        self.schema = {k: schema_types(t) for k, t in (schema or {}).items()}
+        self.strict = strict
+        self.inferred: dict[int, Types] = {}
+
+    def types(self, n: LiteralNode | Node | BaseNode) -> Types:
+        if isinstance(n, Node):
+            n = n.root
+        if not isinstance(n, BaseNode):
+            return frozenset({type(n)})
+        try:
+            return self.inferred[id(n)]
+        except KeyError:
+            pass
+        res = self.inferred[id(n)] = self._subnode(n)
+        return res
+
+    def arg(self, n: LiteralNode | Node, t: Any) -> Types:
+        """Types of an arg checked against {t}, narrowed to those passing the check."""
+        check = get_args(t) or (t,)
+        types = self.types(n)
+        res = frozenset(
+            chain.from_iterable(
+                [x] if issubclass(x, check) else [c for c in check if issubclass(c, x)]
+                for x in types
+            )
+        )
+        if not res and self.strict:
+            raise TypeError(
+                f"node {n} expected to reduce to {t}, inferred {_names(types)}"
+            )
+        return res or frozenset(check)
+
+    def _subnode(self, n: BaseNode) -> Types:
+        match n:
+            case VariableNode():
+                return self.schema.get(n.key, ANY)
+            case NumberNode(op="len"):
+                return _INT
+            case NumberNode(args=VariableNode() as seq):
+                self.types(seq)
+                return _NUMBER
+            case NumberNode():
+                return self.number(n)
+            case StringNode():
+                self.string(n)
+                return _STR
+            case BranchNode():
+                return self.branch(n)
+            case ProcNode():
+                for a in n.args or ():
+                    self.types(a)
+                return ANY
+        raise NotImplementedError(str(n))
+
+    def number(self, n: NumberNode) -> Types:
+        match n.op, n.args:
+            case "round", [x]:
+                self.arg(x, Number)
+                return _INT
+            case "round", [x, ndigits]:
+                xs = _numeric(self.arg(x, Number))
+                none = NoneType in self.arg(ndigits, int | None)
+                return xs | _INT if none else xs
+            case "round", _:
+                # Malformed arity, raised when reduced.
+                return _NUMBER
+        ts = [self.arg(a, Number) for a in n.args]  # type: ignore
+        match n.op, ts:
+            case _, []:
+                return _NUMBER
+            case ("min" | "max"), _:
+                return frozenset().union(*ts)
+            case ("add" | "sub" | "mul" | "mod" | "div"), [t]:
+                return t
+            case "div", _:
+                return _divided(_promoted(ts))
+            case "mean", _:
+                return _divided(_promoted(ts))
+        return _promoted(ts)
+
+    def string(self, n: StringNode):
+        args = n.args
+        match n.op, args:
+            case "slice", [s, *bounds] if len(bounds) <= 3:
+                self.arg(s, str)
+                for b in bounds:
+                    self.arg(b, int | None)
+            case "fmt", [fmt, *rest]:
+                self.arg(fmt, str)
+                for a in rest:
+                    self.types(a)
+            case "rep", [s, count]:
+                self.arg(s, str)
+                self.arg(count, int)
+            case "join", _:
+                for a in args:
+                    self.arg(a, str)
+            case "date", [fmt, d]:
+                self.arg(fmt, str)
+                self.arg(d, date)
+            case _:
+                # Malformed arity, raised when reduced.
+                for a in args:
+                    self.types(a)
+
+    def branch(self, n: BranchNode) -> Types:
+        ts = [self.types(a) for a in n.args]
+        match n.op, ts:
+            case op, [lhs, rhs] if op in BRANCH_OP_COMPARISONS:
+                if not lhs | rhs <= _SCALARS:
+                    return ANY
+                if op not in ("eq", "ne") and self.strict:
+                    if not any(_orderable(x, y) for x, y in product(lhs, rhs)):
+                        raise TypeError(
+                            f"node {n} compares unordered types "
+                            f"{_names(lhs)} and {_names(rhs)}"
+                        )
+                return _BOOL
+            case "not", _:
+                return _BOOL
+            case "if", [_, if_true, if_false]:
+                return if_true | if_false
+        return frozenset().union(*ts)
+
+
+def _numeric(types: Types) -> Types:
+    """Number types, with subclasses (like {bool}) replaced by the type they derive."""
+    return frozenset(next(t for t in _NUMBER if issubclass(x, t)) for x in types)
+
+
+def _promoted(ts: list[Types]) -> Types:
+    """Result types of an arithmetic op over args of types {ts}."""
+    kinds = [_numeric(t) for t in ts]
+    res = {t for t in (float, Decimal) if any(t in k for k in kinds)}
+    if all(int in k for k in kinds):
+        res.add(int)
+    return frozenset(res)
+
+
+def _divided(types: Types) -> Types:
+    """Result types of a true division of a number of {types}."""
+    res = {Decimal} if Decimal in types else set()
+    if int in types or float in types:
+        res.add(float)
+    return frozenset(res)
+
+
+def _orderable(x: type, y: type) -> bool:
+    numbers = _NUMBER | {bool}
+    return (x in numbers and y in numbers) or (x is y and x is not NoneType)
+
+
+def _names(types: Types) -> str:
+    return " | ".join(sorted(t.__name__ for t in types))
@@ -0,0 +1,154 @@
+"""Hash-consing of node subtrees.
+
+An {InternTable} builds nodes whose structurally identical subtrees (and literals) are
+one shared, immutable instance, across every node interned through the same table:
+
+```python
+table = InternTable()
+procs = ProcRegistry(library, table=table)  # every proc parsed through the table
+a, b = table.intern(doc), table.intern(json.dumps(doc))
+assert a is b
+```
+
+Within a table, nodes are equal if and only if they are the same instance, so {is}
+compares and {id} hashes them structurally in constant time. Artifacts cached per node
+instance (see {Node.compile}, {Node.lower}) are shared along, and {InternTable.compile}
+also reuses the compiled form of every subtree already compiled through the table.
+"""
+from __future__ import annotations
+
+from dataclasses import dataclass
+from threading import Lock
+from typing import TYPE_CHECKING, Hashable
+
+from .base_node import BaseNode
+from .node import Node
+from .types import Json, LiteralNode
+
+if TYPE_CHECKING:
+    from .compiler import Compiled
+
+
+@dataclass(frozen=True)
+class InternStats:
+    """Intern table statistics."""
+
+    subnodes: int
+    """Subnodes looked up, counting every occurrence (held subtrees count as one)."""
+    distinct: int
+    """Distinct subnodes held by the table."""
+
+    @property
+    def shared(self) -> int:
+        """Subnodes that reused an instance held by the table."""
+        return self.subnodes - self.distinct
+
+
+class InternTable:
+    """Structural intern table for nodes.
+
+    Holds every distinct subtree interned (until {clear}), keyed by its type, fields and
+    the identity of its already interned children, so interning costs one shallow key
+    per subnode (and subtrees already held none). Thread safe.
+    """
+
+    def __init__(self):
+        self._instances: dict[Hashable, object] = {}
+        self._held: set[int] = set()
+        self._compiled: dict[int, Compiled] = {}
+        self._lock = Lock()
+        self._subnodes = 0
+        self._distinct = 0
+
+    def intern(self, data: str | bytes | Json | Node) -> Node:
+        """Parse a node (from JSON text or a Python object), sharing held subtrees."""
+        if isinstance(data, Node):
+            n = data
+        elif isinstance(data, (str, bytes)):
+            n = Node.model_validate_json(data)
+        else:
+            n = Node.model_validate(data)
+        with self._lock:
+            return self._node(n)
+
+    def compile(self, data: str | bytes | Json | Node) -> Compiled:
+        """Intern and compile a node, reusing subtrees compiled through this table."""
+        from .compiler import compile_node
+
+        n = self.intern(data)
+        with self._lock:
+            return compile_node(n, memo=self._compiled)
+
+    def stats(self) -> InternStats:
+        """Subnode counts."""
+        return InternStats(subnodes=self._subnodes, distinct=self._distinct)
+
+    def clear(self):
+        """Drop every held subtree and compiled form.
+
+        Nodes interned before then stay valid, they're only no longer shared with nodes
+        interned after.
+        """
+        with self._lock:
+            self._instances.clear()
+            self._held.clear()
+            self._compiled.clear()
+            self._subnodes = self._distinct = 0
+
+    def __len__(self) -> int:
+        return self._distinct
+
+    def _node(self, n: Node) -> Node:
+        if id(n) in self._held:
+            return n
+        r = n.root
+        if isinstance(r, BaseNode):
+            r = self._subnode(r)
+            key: Hashable = (Node, id(r))
+        else:
+            r, key = self._literal(r)
+            key = (Node, key)
+        if (res := self._instances.get(key)) is None:
+            res = n if n.root is r else Node.model_construct(root=r)
+            self._instances[key] = res
+            self._held.add(id(res))
+        return res  # type: ignore
+
+    def _subnode(self, r: BaseNode) -> BaseNode:
+        self._subnodes += 1
+        if id(r) in self._held:
+            return r
+        fields = {name: self._value(getattr(r, name)) for name in type(r).model_fields}
+        key = (type(r), *(k for _, k in fields.values()))
+        if (res := self._instances.get(key)) is not None:
+            return res  # type: ignore
+        update = {
+            name: v for name, (v, _) in fields.items() if v is not getattr(r, name)
+        }
+        res = r.model_copy(update=update) if update else r
+        self._instances[key] = res
+        self._held.add(id(res))
+        self._distinct += 1
+        return res
+
+    def _value(self, v: object) -> tuple[object, Hashable]:
+        """Interned field value, and its key."""
+        match v:
+            case Node():
+                res = self._node(v)
+                return res, id(res)
+            case BaseNode():
+                res = self._subnode(v)
+                return res, id(res)
+            case tuple():
+                items = [self._value(a) for a in v]
+                if any(a is not b for (a, _), b in zip(items, v)):
+                    v = tuple(a for a, _ in items)
+                return v, tuple(k for _, k in items)
+        return self._literal(v)  # type: ignore
+
+    def _literal(self, v: LiteralNode) -> tuple[LiteralNode, Hashable]:
+        # Keyed by type and repr, so e.g. 1, 1.0 and True (or Decimal 1.1 and 1.10)
+        # are told apart even though they compare equal.
+        key = (type(v), repr(v))
+        return self._instances.setdefault(key, v), key  # type: ignore
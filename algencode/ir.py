@@ -0,0 +1,481 @@
+"""Flat postfix IR and stack machine.
+
+Lowers a node tree into a {Program}: a flat stream of opcodes with one integer
+operand each (both {array} backed) and a constant pool, in postfix order. Programs
+are evaluated by a loop based stack machine, so neither lowering nor evaluation
+recurses with the depth of the tree (proc calls push frames on the machine's own
+call stack), and arbitrarily deep formulas evaluate without {RecursionError}.
+Conditionals lower to forward jumps, so only the branch taken (and the args {and} and
+{or} need) are evaluated.
+
+```python
+program = n.lower()
+assert program(vals, procs) == n.reduce(vals, procs)
+print(program.dis())
+```
+
+Nodes with debug enabled and ops with malformed arity are evaluated (and raise)
+through {Node.reduce}, as is the compiler's convention.
+"""
+from __future__ import annotations
+
+import weakref
+from array import array
+from dataclasses import dataclass, replace
+from datetime import date
+from functools import reduce
+from typing import Any, Callable, Iterable, Sequence
+
+from .base_node import BaseNode
+from .kernels import strftime, template
+from .node import Node
+from .scope import ArgScope
+from .subnodes import BranchNode, NumberNode, ProcNode, StringNode, VariableNode
+from .subnodes.branch_node import BRANCH_OP_COMPARISONS
+from .subnodes.number_node import NUMBER_OP_BUILTINreduce_nodeRS
+from .types import LiteralNode, Number, Procs, Reduced, Reducer, Vals
+
+CONST = 0
+"""Push {consts[x]}."""
+LOAD = 1
+"""Push {vals[consts[x]]}."""
+EVAL = 2
+"""Push {consts[x].reduce(vals, procs)} (tree-walking fallback)."""
+APPLY = 3
+"""Pop {argc} values and push {kernel(values)}, {consts[x]} is an {Apply}."""
+PROC = 4
+"""Push the program of the proc named {consts[x]}."""
+CALL = 5
+"""Pop {x} args (none if {x} is -1, passing on the caller's vals) and a proc program,
+and call it, pushing its result."""
+JUMP = 6
+"""Continue at instruction {x}."""
+POP_JUMP_IF_FALSE = 7
+"""Pop a value, continuing at instruction {x} if it's falsy."""
+JUMP_IF_FALSE_OR_POP = 8
+"""Continue at instruction {x} if the top value is falsy (keeping it), else pop it."""
+JUMP_IF_TRUE_OR_POP = 9
+"""Continue at instruction {x} if the top value is truthy (keeping it), else pop it."""
+CHECK = 10
+"""Check the type of the top value, {consts[x]} is a {Check}."""
+
+MAX_CALL_DEPTH = 100_000
+"""Maximum depth of nested proc calls (catching procs that call themselves)."""
+
+OPCODES = (
+    "CONST",
+    "LOAD",
+    "EVAL",
+    "APPLY",
+    "PROC",
+    "CALL",
+    "JUMP",
+    "POP_JUMP_IF_FALSE",
+    "JUMP_IF_FALSE_OR_POP",
+    "JUMP_IF_TRUE_OR_POP",
+    "CHECK",
+)
+"""Opcode names by opcode."""
+
+_programs: dict[int, Program] = {}
+
+_OptionalInt = int | None
+
+_JUMPS = (JUMP, POP_JUMP_IF_FALSE, JUMP_IF_FALSE_OR_POP, JUMP_IF_TRUE_OR_POP)
+
+
+class _Label:
+    """Forward jump target, placed once the instructions before it are emitted."""
+
+    __slots__ = ("sites",)
+
+    def __init__(self):
+        self.sites: list[int] = []
+        """Instructions jumping to this label."""
+
+
+_Work = tuple[int, "int | _Label"] | _Label | LiteralNode | Node
+
+
+@dataclass(frozen=True)
+class Check:
+    """Type check applied by a {CHECK} instruction."""
+
+    node: Any
+    """Argument checked (for error messages)."""
+    type: Any
+    """Expected type."""
+
+    def __call__(self, value: Any) -> Any:
+        """Return a value, checking its type.
+
+        Raises:
+            TypeError: If the value is mistyped, as {Node.reduce} would.
+        """
+        if not isinstance(value, self.type):
+            raise TypeError(
+                f"node {self.node} expected to reduce to {self.type}, "
+                f"found {type(value)} {value}"
+            )
+        return value
+
+
+@dataclass(frozen=True)
+class Apply:
+    """Operation applied by an {APPLY} instruction."""
+
+    kernel: Callable[[Any], Reduced]
+    """Operation over the list of argument values (any iterable if {fold})."""
+    argc: int
+    """Number of arguments popped from the stack."""
+    checks: tuple[Check | None, ...]
+    """Check of each argument (None if unchecked), applied as soon as the argument is
+    reduced (before reducing the next), as {Node.reduce} does."""
+    node: BaseNode
+    """Node lowered into this operation (for error messages)."""
+    fold: bool = False
+    """Whether the operation folds its args pairwise, which {Node.reduce} does as each
+    argument is reduced (so errors raise in the same order)."""
+
+    def __call__(self, args: Iterable[Any]) -> Reduced:
+        """Apply the operation to argument values, already checked."""
+        return self.kernel(args)
+
+    @classmethod
+    def of(cls, n: NumberNode | StringNode | BranchNode) -> Apply | None:
+        """Operation of a node with sequence args (None if malformed or unsupported)."""
+        if not isinstance(n.args, tuple) or (spec := _apply(n.op, len(n.args))) is None:
+            return None
+        kernel, types = spec
+        if n.op == "fmt" and isinstance(n.args[0], str):
+            kernel = template(n.args[0], 1)
+        checks = tuple(
+            None if t is None else Check(a, t) for a, t in zip(n.args, types)
+        )
+        return cls(kernel, len(n.args), checks, n, fold=n.op in _FOLDS)
+
+
+@dataclass(frozen=True)
+class Program:
+    """Lowered node, called as {program(vals, procs)}."""
+
+    ops: array
+    """Opcodes."""
+    operands: array
+    """Operand of each opcode."""
+    consts: tuple[Any, ...]
+    """Constant pool (literals, keys, proc names, {Apply} operations, nodes)."""
+
+    def __call__(self, vals: Vals | None = None, procs: Procs | None = None) -> Reduced:
+        """Evaluate this program, returning what {Node.reduce} returns."""
+        return run(self, vals, procs)
+
+    def __len__(self) -> int:
+        return len(self.ops)
+
+    def dis(self) -> str:
+        """Human readable listing of the instructions."""
+        lines = []
+        for pc, (op, x) in enumerate(zip(self.ops, self.operands)):
+            if op == APPLY:
+                a = self.consts[x]
+                arg = f"{a.node.op}/{a.argc}"
+            elif op == CHECK:
+                arg = repr(self.consts[x].type)
+            elif op == CALL or op in _JUMPS:
+                arg = str(x)
+            else:
+                arg = repr(self.consts[x])
+            lines.append(f"{pc:>4} {OPCODES[op]:<6} {arg}")
+        return "\n".join(lines)
+
+
+def lower(n: LiteralNode | Node) -> Program:
+    """Lower a node (or literal) into a flat postfix {Program}."""
+    return _Lowering().lower(n)
+
+
+def lower_cached(n: Node) -> Program:
+    """Lower a node once, reusing the program for as long as the node is alive."""
+    key = id(n)
+    try:
+        return _programs[key]
+    except KeyError:
+        pass
+    p = _programs[key] = lower(n)
+    weakref.finalize(n, _programs.pop, key, None)
+    return p
+
+
+def run(
+    program: Program,
+    vals: Vals | None = None,
+    procs: Procs | None = None,
+) -> Reduced:
+    """Evaluate a program on the stack machine.
+
+    Raises:
+        RecursionError: If procs call each other deeper than {MAX_CALL_DEPTH}.
+    """
+    stack: list[Any] = []
+    frames: list[tuple[array, array, tuple[Any, ...], int, Vals | None, Procs | None]]
+    frames = []
+    ops, operands, consts = program.ops, program.operands, program.consts
+    pc, end = 0, len(ops)
+    while True:
+        if pc == end:
+            if not frames:
+                return stack.pop()
+            ops, operands, consts, pc, vals, procs = frames.pop()
+            end = len(ops)
+            continue
+        op = ops[pc]
+        x = operands[pc]
+        pc += 1
+        if op == CONST:
+            stack.append(consts[x])
+        elif op == LOAD:
+            key = consts[x]
+            if vals is None:
+                raise RuntimeError(
+                    f"value node with key={key} expected dictionary of values"
+                )
+            try:
+                stack.append(vals[key])
+            except KeyError:
+                raise KeyError(f"key={key} not found in values") from None
+        elif op == APPLY:
+            a: Apply = consts[x]
+            if a.argc:
+                args = stack[-a.argc :]
+                del stack[-a.argc :]
+            else:
+                args = []
+            stack.append(a(args))
+        elif op == CHECK:
+            consts[x](stack[-1])
+        elif op == PROC:
+            name = consts[x]
+            if procs is None:
+                raise RuntimeError("expected proc map, found None")
+            if not (p := procs.get(name)):
+                raise KeyError(f'failed to find proc node "{name}"')
+            if isinstance(p, dict):
+                stack.append(lower(Node.model_validate(p)))
+            else:
+                stack.append(lower_cached(p))
+        elif op == CALL:
+            if len(frames) >= MAX_CALL_DEPTH:
+                raise RecursionError("maximum proc call depth exceeded")
+            frames.append((ops, operands, consts, pc, vals, procs))
+            if x >= 0:
+                vals, procs = ArgScope(stack[len(stack) - x :]), None
+                del stack[len(stack) - x :]
+            callee: Program = stack.pop()
+            ops, operands, consts = callee.ops, callee.operands, callee.consts
+            pc, end = 0, len(ops)
+        elif op == POP_JUMP_IF_FALSE:
+            if not stack.pop():
+                pc = x
+        elif op == JUMP:
+            pc = x
+        elif op == JUMP_IF_FALSE_OR_POP:
+            if stack[-1]:
+                stack.pop()
+            else:
+                pc = x
+        elif op == JUMP_IF_TRUE_OR_POP:
+            if stack[-1]:
+                pc = x
+            else:
+                stack.pop()
+        elif op == EVAL:
+            stack.append(consts[x].reduce(vals, procs))
+        else:  # pragma: no cover
+            raise ValueError(f"invalid opcode {op}")
+
+
+class _Lowering:
+    def __init__(self):
+        self.ops = array("B")
+        self.operands = array("q")
+        self.consts: list[Any] = []
+        self._index: dict[tuple[type, str], int] = {}
+
+    def lower(self, n: LiteralNode | Node) -> Program:
+        # Postfix order from an explicit work stack: nodes to lower, or instructions
+        # to emit once the operands before them have been.
+        work: list[_Work] = [n]
+        while work:
+            item = work.pop()
+            if isinstance(item, tuple):
+                op, x = item
+                if isinstance(x, _Label):
+                    x.sites.append(len(self.ops))
+                    x = -1
+                self.emit(op, x)
+            elif isinstance(item, _Label):
+                for pc in item.sites:
+                    self.operands[pc] = len(self.ops)
+            else:
+                work.extend(reversed(self.node(item)))
+        return Program(self.ops, self.operands, tuple(self.consts))
+
+    def const(self, value: Any) -> int:
+        """Constant pool index of a value, shared between equal literals and keys."""
+        if isinstance(value, (BaseNode, Apply, Check)):
+            self.consts.append(value)
+            return len(self.consts) - 1
+        k = (type(value), repr(value))
+        if (i := self._index.get(k)) is None:
+            i = self._index[k] = len(self.consts)
+            self.consts.append(value)
+        return i
+
+    def emit(self, op: int, x: int):
+        self.ops.append(op)
+        self.operands.append(x)
+
+    def applied(self, args: Sequence[Any], a: Apply) -> list[_Work]:
+        """Work lowering args, each followed by its check (unless a literal passing),
+        then the operation.
+
+        Folds over more than two args apply pairwise after each arg from the second
+        on, as {Node.reduce} folds them.
+        """
+        step = (APPLY, self.const(replace(a, argc=2))) if a.fold and a.argc > 2 else None
+        work: list[_Work] = []
+        for i, (x, c) in enumerate(zip(args, a.checks)):
+            work.append(x)
+            if c is not None and (isinstance(x, Node) or not isinstance(x, c.type)):
+                work.append((CHECK, self.const(c)))
+            if step and i:
+                work.append(step)
+        if step is None:
+            work.append((APPLY, self.const(a)))
+        return work
+
+    def node(self, n: LiteralNode | Node) -> Sequence[_Work]:
+        """Lower one node, returning the work it leaves (in order)."""
+        r = n.root if isinstance(n, Node) else n
+        if not isinstance(r, BaseNode):
+            self.emit(CONST, self.const(r))
+            return ()
+        if r.debug is not None and r.debug.root is not False:
+            self.emit(EVAL, self.const(r))
+            return ()
+        match r:
+            case VariableNode():
+                self.emit(LOAD, self.const(r.key))
+                return ()
+            case ProcNode():
+                self.emit(PROC, self.const(r.proc))
+                args = r.args or ()
+                return (*args, (CALL, len(args) if r.args else -1))
+            case NumberNode(args=VariableNode()):
+                pass
+            case NumberNode(op="len"):
+                self.emit(CONST, self.const(len(r.args)))  # type: ignore
+                return ()
+            case BranchNode(op="if", args=(cond, if_true, if_false)):
+                if_false_, end = _Label(), _Label()
+                return (
+                    cond,
+                    (POP_JUMP_IF_FALSE, if_false_),
+                    if_true,
+                    (JUMP, end),
+                    if_false_,
+                    if_false,
+                    end,
+                )
+            case BranchNode(op=("and" | "or") as op, args=(first, *rest)):
+                end = _Label()
+                jump = JUMP_IF_FALSE_OR_POP if op == "and" else JUMP_IF_TRUE_OR_POP
+                return (first, *[w for a in rest for w in ((jump, end), a)], end)
+            case NumberNode() | StringNode() | BranchNode():
+                if (a := Apply.of(r)) is not None:
+                    return self.applied(r.args, a)
+        # Sequence args, malformed arity (raising the same error) or unknown nodes.
+        self.emit(EVAL, self.const(r))
+        return ()
+
+
+def _apply(op: str, argc: int) -> tuple[Callable[[list[Any]], Reduced], list[Any]] | None:
+    """Kernel and expected argument types (None if unchecked) of an op and arity."""
+    if f := _FOLDS.get(op):
+        return f, [Number] * argc
+    match op, argc:
+        case "round", 1:
+            return _round, [Number]
+        case "round", 2:
+            return _round, [Number, _OptionalInt]
+        case "mean", _:
+            return _mean, [Number] * argc
+        case "slice", 2 | 3 | 4:
+            return _slice, [str] + [_OptionalInt] * (argc - 1)
+        case "fmt", _ if argc >= 1:
+            return _fmt, [str] + [None] * (argc - 1)
+        case "rep", 2:
+            return _rep, [str, int]
+        case "join", _ if argc >= 1:
+            return _join, [str] * argc
+        case "date", 2:
+            return _date, [str, date]
+        case "not", 1:
+            return _not, [None]
+        case _, 2 if op in _COMPARISONS:
+            return _COMPARISONS[op], [None, None]
+    return None
+
+
+def _folding(f: Reducer) -> Callable[[Iterable[Any]], Reduced]:
+    def fold(args: Iterable[Any]) -> Reduced:
+        return reduce(f, args)
+
+    return fold
+
+
+_FOLDS = {op: _folding(f) for op, f in NUMBER_OP_BUILTINreduce_nodeRS.items()}
+
+
+def _comparing(f: Callable[[Any, Any], bool]) -> Callable[[list[Any]], Reduced]:
+    def compare(args: list[Any]) -> Reduced:
+        return f(args[0], args[1])
+
+    return compare
+
+
+_COMPARISONS = {op: _comparing(f) for op, f in BRANCH_OP_COMPARISONS.items()}
+
+
+def _round(args: list[Any]) -> Reduced:
+    return round(*args)
+
+
+def _mean(args: list[Any]) -> Reduced:
+    return sum(args) / len(args)
+
+
+def _slice(args: list[Any]) -> Reduced:
+    s, *bounds = args
+    return s[slice(*bounds)] if len(bounds) > 1 else s[: bounds[0]]
+
+
+def _fmt(args: list[Any]) -> Reduced:
+    return template(args[0], 1)(args)
+
+
+def _rep(args: list[Any]) -> Reduced:
+    return args[0] * args[1]
+
+
+def _join(args: list[Any]) -> Reduced:
+    return args[0].join(args[1:])
+
+
+def _date(args: list[Any]) -> Reduced:
+    return strftime(args[1], args[0])
+
+
+def _not(args: list[Any]) -> Reduced:
+    return not args[0]
@@ -0,0 +1,123 @@
+"""Precompiled string kernels.
+
+Format strings are parsed once into templates: straight-line functions formatting
+each replacement field with {format} and concatenating them with the literal text,
+which is what {str.format} does, minus parsing the format string on every call.
+Templates are cached per format string. Dates repeat heavily across rows, so
+{strftime} results are memoized in a bounded cache.
+
+```python
+t = template("{:>03}-{:>03}-{:>03}")
+t([44, 220, 87])  # "044-220-087", as "{:>03}-{:>03}-{:>03}".format(44, 220, 87)
+```
+
+Format strings using field names, attribute or index lookups ({0.year}, {0[1]}) or
+nested replacement fields in format specs ({:{}}) aren't precompiled, and neither
+are malformed ones: their templates call {str.format} (raising its errors).
+"""
+from __future__ import annotations
+
+from datetime import date, datetime
+from functools import lru_cache
+from string import Formatter
+from typing import Any, Callable, Sequence
+
+Template = Callable[[Sequence[Any]], str]
+"""Precompiled format string, called with the format args."""
+
+_CONVERSIONS = {None: None, "r": "repr", "s": "str", "a": "ascii"}
+
+
+@lru_cache(maxsize=1024)
+def template(fmt: str, offset: int = 0) -> Template:
+    """Precompiled template of a format string (cached).
+
+    Args:
+        fmt: Format string.
+        offset: Index of the first format arg in the sequences the template is called
+            with (skipping leading values, such as the format string itself).
+
+    Returns:
+        Function of {args} returning {fmt.format(*args[offset:])}.
+    """
+    return _compile(fmt, offset)
+
+
+def strftime(d: date, fmt: str) -> str:
+    """{d.strftime(fmt)}, memoized for dates and naive datetimes.
+
+    Aware datetimes aren't memoized: those at the same instant compare (and hash) equal
+    in any time zone, yet format differently.
+    """
+    if type(d) is date or (type(d) is datetime and d.tzinfo is None):
+        return _strftime(d, fmt)
+    return d.strftime(fmt)
+
+
+def cache_info() -> dict[str, Any]:
+    """Template and strftime cache statistics (as {functools.lru_cache} reports)."""
+    return {"template": template.cache_info(), "strftime": _strftime.cache_info()}
+
+
+def cache_clear():
+    """Drop every cached template and strftime result."""
+    template.cache_clear()
+    _strftime.cache_clear()
+
+
+@lru_cache(maxsize=4096)
+def _strftime(d: date, fmt: str) -> str:
+    return d.strftime(fmt)
+
+
+def _compile(fmt: str, offset: int) -> Template:
+    fallback = _fallback(fmt, offset)
+    try:
+        parsed = list(Formatter().parse(fmt))
+    except ValueError:
+        return fallback
+    ns: dict[str, Any] = {"f": format, "fmt": fallback}
+    parts: list[str] = []
+    auto = manual = False
+    argc = 0
+    for literal, field, spec, conversion in parsed:
+        if literal:
+            ns[name := f"l{len(ns)}"] = literal
+            parts.append(name)
+        if field is None:
+            continue
+        if field == "":
+            auto = True
+            i = argc
+        elif field.isascii() and field.isdigit():
+            manual = True
+            i = int(field)
+        else:
+            return fallback
+        if (auto and manual) or "{" in spec or conversion not in _CONVERSIONS:
+            return fallback
+        argc = max(argc, i + 1)
+        arg = f"a[{i + offset}]"
+        if conversion is not None:
+            arg = f"{_CONVERSIONS[conversion]}({arg})"
+        ns[name := f"s{len(ns)}"] = spec
+        parts.append(f"f({arg}, {name})")
+    # Generated from field indices and names only (format text and specs are bound
+    # as variables), so the source is safe to evaluate.
+    match parts:
+        case []:
+            body = "''"
+        case [part]:
+            body = part
+        case _:
+            body = f"''.join(({', '.join(parts)}))"
+    # Too few args raise what str.format raises.
+    src = f"lambda a: {body} if len(a) >= {argc + offset} else fmt(a)"
+    return eval(src, ns)  # noqa: S307
+
+
+def _fallback(fmt: str, offset: int) -> Template:
+    def fallback(args: Sequence[Any]) -> str:
+        return fmt.format(*args[offset:])
+
+    return fallback
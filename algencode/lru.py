@@ -0,0 +1,92 @@
+"""Bounded least-recently-used cache."""
+from __future__ import annotations
+
+from collections import OrderedDict
+from threading import Lock
+from typing import Generic, Hashable, NamedTuple, TypeVar
+
+K = TypeVar("K", bound=Hashable)
+V = TypeVar("V")
+
+
+class CacheInfo(NamedTuple):
+    """Cache statistics."""
+
+    hits: int
+    misses: int
+    evictions: int
+    maxsize: int | None
+    currsize: int
+
+
+class LRUCache(Generic[K, V]):
+    """Bounded least-recently-used cache.
+
+    Holds at most {maxsize} entries (unbounded if None), evicting the least recently
+    used entry first, and counts hits, misses and evictions.
+    """
+
+    def __init__(self, maxsize: int | None = 128):
+        self._data: OrderedDict[K, V] = OrderedDict()
+        self._lock = Lock()
+        self._maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @property
+    def maxsize(self) -> int | None:
+        """Maximum number of entries, evicting on shrink."""
+        return self._maxsize
+
+    @maxsize.setter
+    def maxsize(self, maxsize: int | None):
+        with self._lock:
+            self._maxsize = maxsize
+            self._evict()
+
+    def get(self, key: K) -> V | None:
+        """Get an entry (marking it most recently used), or None if missing."""
+        with self._lock:
+            try:
+                value = self._data[key]
+            except KeyError:
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key: K, value: V):
+        """Insert or replace an entry."""
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            self._evict()
+
+    def pop(self, key: K) -> V | None:
+        """Remove an entry, returning it (or None if missing)."""
+        with self._lock:
+            return self._data.pop(key, None)
+
+    def clear(self):
+        """Remove every entry (statistics are kept)."""
+        with self._lock:
+            self._data.clear()
+
+    def info(self) -> CacheInfo:
+        """Cache statistics."""
+        return CacheInfo(self.hits, self.misses, self.evictions, self._maxsize, len(self))
+
+    def _evict(self):
+        if self._maxsize is None:
+            return
+        while len(self._data) > self._maxsize:
+            self._data.popitem(last=False)
+            self.evictions += 1
+
+    def __contains__(self, key: object) -> bool:
+        return key in self._data
+
+    def __len__(self) -> int:
+        return len(self._data)
@@ -1,21 +1,73 @@
 """General node type."""
 from __future__ import annotations
 
+import sys
 from datetime import date
 from decimal import Decimal
-from typing import Type
+from typing import TYPE_CHECKING, Any, Mapping, Type, TypeVar
 
-from pydantic import RootModel
+from pydantic import ConfigDict, RootModel
 
 from .base_node import BaseNode
-from .types import LiteralNode, Procs, Reduced, SubNode, T, Vals
+from .types import Json, LiteralNode, Procs, Reduced, SubNode, T, Vals
+
+if TYPE_CHECKING:
+    import numpy as np
+
+    from .aio import ProcResolver, ValResolver
+    from .compiler import Compiled
+    from .infer import Schema, Types
+    from .ir import Program
+    from .profiler import Profiler
+    from .runtime import Runtime
+    from .vectorize import Columns
+
+V = TypeVar("V")
 
 
 class Node(RootModel):
-    """General node type."""
+    """General node type (immutable)."""
+
+    model_config = ConfigDict(frozen=True, defer_build=True)
 
     root: LiteralNode | SubNode
 
+    @classmethod
+    def model_rebuild(
+        cls, *, force: bool = False, raise_errors: bool = True, **kwargs: Any
+    ) -> bool | None:
+        """Build the schema, which pydantic does when a node is first validated."""
+        bind_types()
+        return super().model_rebuild(force=force, raise_errors=raise_errors, **kwargs)
+
+    @classmethod
+    def parse_cached(cls, data: str | bytes | Json) -> Node:
+        """Parse a node from JSON text or a Python object through a content cache.
+
+        Equal documents (up to whitespace and key order) share one immutable node, see
+        {algencode.cache.parse_cache} for statistics and the size limit.
+        """
+        from .cache import parse_cache
+
+        return parse_cache.parse(data)
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> Node:
+        """Decode a node from {to_bytes} output, see {algencode.binary}.
+
+        Raises:
+            ValueError: If the data is malformed.
+        """
+        from .binary import from_bytes
+
+        return from_bytes(data)
+
+    def to_bytes(self) -> bytes:
+        """Encode this node in the compact binary format, see {algencode.binary}."""
+        from .binary import to_bytes
+
+        return to_bytes(self)
+
     def reduce(
         self,
         vals: Vals | None = None,
@@ -33,6 +85,20 @@ class Node(RootModel):
             case _:
                 raise NotImplementedError
 
+    async def areduce(
+        self,
+        vals: Vals | ValResolver | None = None,
+        procs: Procs | ProcResolver | None = None,
+    ) -> Reduced:
+        """Reduce this node, resolving vals and procs through async resolvers first.
+
+        Every key and proc the node can read is looked up concurrently, each distinct
+        one once, before the node is evaluated (see {algencode.aio}).
+        """
+        from .aio import areduce
+
+        return await areduce(self, vals, procs)
+
     def reduce_to(
         self,
         t: Type[T],
@@ -48,3 +114,104 @@ class Node(RootModel):
                 f"node {self} expected to reduce to {t}, found {type(res)} {res}"
             )
         return res
+
+    def required_keys(self, procs: Procs | None = None) -> frozenset[str]:
+        """Keys of vals this node can read, including through procs resolved in {procs}.
+
+        Raises:
+            KeyError: If a proc reading the caller's vals can't be found in {procs}.
+        """
+        from .analysis import required_keys
+
+        return required_keys(self, procs)
+
+    def project(self, vals: Mapping[str, V], procs: Procs | None = None) -> dict[str, V]:
+        """Subset of vals (or columns) this node can read, see {required_keys}."""
+        from .analysis import project
+
+        return project(self, vals, procs)
+
+    def optimize(self) -> Node:
+        """Return an equivalent node with constant subtrees folded to literals."""
+        from .optimize import optimize
+
+        return optimize(self)
+
+    def infer(self, schema: Schema | None = None) -> Types:
+        """Types this node can reduce to, given the declared types of vals.
+
+        See {algencode.infer}.
+
+        Raises:
+            TypeError: If the node is ill-typed.
+        """
+        from .infer import infer
+
+        return infer(self, schema)
+
+    def compile(
+        self,
+        *,
+        cse: bool = False,
+        profiler: Profiler | None = None,
+        schema: Schema | None = None,
+    ) -> Compiled:
+        """Compile this node into a callable {f(vals, procs)} equivalent to {reduce}.
+
+        The tree is compiled once and the result reused for the lifetime of the node.
+        Nodes with debug enabled are still reduced through {reduce} so they keep logging.
+        With {cse}, identical subtrees are evaluated once per call (see {algencode.cse}).
+        With a {profiler}, a separately compiled, instrumented callable is returned (see
+        {algencode.profiler}). With a {schema} declaring the types of vals, checks that
+        args have the type their op expects are skipped when inference proves them,
+        and a separately compiled callable is returned (see {algencode.infer}).
+        """
+        from .compiler import compile_cached, compile_node
+
+        if profiler is not None:
+            return profiler.compile(self, cse=cse, schema=schema)
+        if schema is not None:
+            return compile_node(self, cse=cse, schema=schema)
+
+        return compile_cached(self, cse=cse)
+
+    def lower(self) -> Program:
+        """Lower this node into a flat postfix program run on a stack machine.
+
+        The program is built once and reused for the lifetime of the node, and
+        evaluates trees of any depth without recursing (see {algencode.ir}).
+        """
+        from .ir import lower_cached
+
+        return lower_cached(self)
+
+    def to_runtime(self) -> Runtime:
+        """Convert this node to its slim runtime form, see {algencode.runtime}."""
+        from .runtime import to_runtime
+
+        return to_runtime(self)
+
+    def reduce_many(self, columns: Columns, procs: Procs | None = None) -> np.ndarray:
+        """Reduce this node over a batch of rows, given as columns (requires numpy).
+
+        Numeric subtrees are vectorized over the whole batch, see {algencode.vectorize}.
+        """
+        from .vectorize import reduce_many
+
+        return reduce_many(self, columns, procs)
+
+
+def bind_types():
+    """Bind the node and subnode types in the globals of the modules defining them.
+
+    Forward references (e.g. in {SubNode}) resolve from those globals when a schema is
+    first built, including nested schemas built along. The subnode types are only
+    imported then (rather than at import) as they import this module.
+    """
+    from . import subnodes
+
+    types = {"Node": Node, **{k: getattr(subnodes, k) for k in subnodes.__all__}}
+    for module in {t.__module__ for t in (BaseNode, *types.values())}:
+        namespace = vars(sys.modules[module])
+        for k, v in types.items():
+            namespace.setdefault(k, v)
@@ -0,0 +1,66 @@
+"""Node tree optimizer (constant folding)."""
+from __future__ import annotations
+
+from .base_node import BaseNode
+from .node import Node
+from .subnodes import BranchNode, NumberNode, ProcNode, StringNode, VariableNode
+from .types import LiteralNode
+
+
+def optimize(n: Node) -> Node:
+    """Fold every constant subtree of a node into a literal.
+
+    A subtree is constant if it doesn't (transitively) read vals or call procs. Subtrees
+    that raise when reduced, or that have debug enabled, are kept as-is so errors and
+    logging still happen at evaluation time. Conditionals ({if}) with a constant
+    condition are replaced by the branch they take.
+    """
+    folded, _ = _fold(n)
+    if isinstance(folded, Node):
+        return folded
+    if folded is n.root:
+        return n
+    return Node.model_construct(root=folded)
+
+
+def _fold(n: LiteralNode | Node) -> tuple[LiteralNode | Node, bool]:
+    """Fold a node, returning the folded node and whether it is now a literal."""
+    if not isinstance(n, Node):
+        return n, True
+    r = n.root
+    if not isinstance(r, BaseNode):
+        return r, True
+    debug = r.debug is not None and r.debug.root is not False
+    match r:
+        case NumberNode(op="len", args=tuple()) if not debug:
+            return len(r.args), True
+        case BranchNode(op="if", args=(c, if_true, if_false)) if not debug:
+            cond, constant = _fold(c)
+            if constant:
+                return _fold(if_true if cond else if_false)
+            return _fold_args(n, r, debug)
+        case NumberNode(args=tuple()) | StringNode() | BranchNode():
+            return _fold_args(n, r, debug)
+        case ProcNode(args=tuple()):
+            return _fold_args(n, r, debug)
+        case VariableNode() | NumberNode() | ProcNode():
+            return n, False
+    raise NotImplementedError(str(r))
+
+
+def _fold_args(
+    n: Node,
+    r: NumberNode | StringNode | BranchNode | ProcNode,
+    debug: bool,
+) -> tuple[LiteralNode | Node, bool]:
+    """Fold the args of an operation or proc call, then the node if now constant."""
+    folded = [_fold(a) for a in r.args]  # type: ignore
+    args = tuple(a for a, _ in folded)
+    if any(a is not b for a, b in zip(args, r.args)):  # type: ignore
+        n = Node.model_construct(root=r.model_copy(update={"args": args}))
+    if debug or isinstance(r, ProcNode) or not all(c for _, c in folded):
+        return n, False
+    try:
+        return n.reduce(), True
+    except Exception:
+        return n, False
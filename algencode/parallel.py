@@ -0,0 +1,154 @@
+"""Multi-process batch evaluation.
+
+Evaluates node(s) over rows in a process pool: the nodes and procs are sent to each
+worker once (and compiled there), rows are sent out in chunks, and at most a few chunks
+per worker are in flight at a time, so rows can be streamed through from a generator.
+Rows are projected onto the keys the nodes can read before being sent out, so unused
+columns aren't pickled.
+"""
+from __future__ import annotations
+
+import os
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from multiprocessing.context import BaseContext
+from typing import Iterable, Iterator, Literal, overload
+
+from .node import Node
+from .stream import CHUNK_SIZE, Nodes, Row, _required_keys, chunked
+from .stream import evaluate as _evaluate
+from .types import Procs, Reduced
+
+Result = Reduced | dict[str, Reduced]
+
+_state: tuple[Nodes, Procs | None] | None = None
+
+
+@overload
+def evaluate(
+    nodes: Nodes,
+    rows: Iterable[Row],
+    procs: Procs | None = ...,
+    *,
+    workers: int | None = ...,
+    chunk_size: int = ...,
+    ordered: Literal[True] = ...,
+    mp_context: BaseContext | None = ...,
+) -> Iterator[Result]:
+    ...
+
+
+@overload
+def evaluate(
+    nodes: Nodes,
+    rows: Iterable[Row],
+    procs: Procs | None = ...,
+    *,
+    workers: int | None = ...,
+    chunk_size: int = ...,
+    ordered: Literal[False],
+    mp_context: BaseContext | None = ...,
+) -> Iterator[tuple[int, Result]]:
+    ...
+
+
+def evaluate(
+    nodes: Nodes,
+    rows: Iterable[Row],
+    procs: Procs | None = None,
+    *,
+    workers: int | None = None,
+    chunk_size: int = CHUNK_SIZE,
+    ordered: bool = True,
+    mp_context: BaseContext | None = None,
+) -> Iterator[Result] | Iterator[tuple[int, Result]]:
+    """Evaluate node(s) over rows in a pool of worker processes.
+
+    Args:
+        nodes: Node, or dict of named nodes (see {algencode.stream.evaluate}).
+        rows: Rows (vals). The columns the nodes can read must be picklable, rows are
+            only sent whole if procs the nodes call can't be resolved.
+        procs: Procs map, sent to each worker once (a file backed {ProcStore} is
+            reopened by each worker instead, loading procs as they're used).
+        workers: Number of worker processes (defaults to the CPU count).
+        chunk_size: Number of rows sent to a worker at a time.
+        ordered: Yield results in row order. Otherwise yield {(row index, result)} as
+            soon as each chunk completes.
+        mp_context: Multiprocessing context for the pool.
+
+    Yields:
+        Results in row order, or {(row index, result)} pairs if not {ordered}.
+    """
+    trees = [nodes] if isinstance(nodes, Node) else nodes.values()
+    if (keys := _required_keys(trees, procs, ())) is not None:
+        rows = ({k: r[k] for k in keys if k in r} for r in rows)
+    if procs is not None and not _shareable(procs):
+        procs = {k: procs[k] for k in procs}
+    workers = workers or os.cpu_count() or 1
+    with ProcessPoolExecutor(
+        workers,
+        mp_context=mp_context,
+        initializer=_init,
+        initargs=(nodes, procs),
+    ) as pool:
+        chunks = enumerate(chunked(rows, chunk_size))
+        window = 2 * workers
+        if ordered:
+            yield from _ordered(pool, chunks, window)
+        else:
+            yield from _unordered(pool, chunks, window, chunk_size)
+
+
+def _ordered(
+    pool: ProcessPoolExecutor,
+    chunks: Iterator[tuple[int, list[Row]]],
+    window: int,
+) -> Iterator[Result]:
+    pending: deque[Future[list[Result]]] = deque()
+    for _, chunk in chunks:
+        pending.append(pool.submit(_run, chunk))
+        if len(pending) >= window:
+            yield from pending.popleft().result()
+    while pending:
+        yield from pending.popleft().result()
+
+
+def _unordered(
+    pool: ProcessPoolExecutor,
+    chunks: Iterator[tuple[int, list[Row]]],
+    window: int,
+    chunk_size: int,
+) -> Iterator[tuple[int, Result]]:
+    pending: dict[Future[list[Result]], int] = {}
+    exhausted = False
+    while pending or not exhausted:
+        while not exhausted and len(pending) < window:
+            try:
+                i, chunk = next(chunks)
+            except StopIteration:
+                exhausted = True
+                break
+            pending[pool.submit(_run, chunk)] = i * chunk_size
+        if not pending:
+            break
+        done, _ = wait(pending, return_when=FIRST_COMPLETED)
+        for f in done:
+            start = pending.pop(f)
+            yield from enumerate(f.result(), start)
+
+
+def _init(nodes: Nodes, procs: Procs | None):
+    global _state
+    _state = (nodes, procs)
+
+
+def _run(chunk: list[Row]) -> list[Result]:
+    assert _state is not None
+    nodes, procs = _state
+    return list(_evaluate(nodes, chunk, procs, chunk_size=len(chunk)))
+
+
+def _shareable(procs: Procs) -> bool:
+    from .store import ProcStore
+
+    return isinstance(procs, ProcStore) and procs.path != ":memory:"
@@ -0,0 +1,222 @@
+"""Per-node profiling.
+
+A {Profiler} compiles nodes with every subnode wrapped in a timer, recording call
+counts, cumulative and self time, and raised exceptions per node path (including
+through the bodies of called procs). Nodes compiled without a profiler carry no
+instrumentation at all, so profiling costs nothing unless used.
+
+```python
+profiler = Profiler()
+f = levy.compile(profiler=profiler)
+for row in rows:
+    f(row, procs)
+print(profiler.collapsed())  # for flamegraph.pl / speedscope / inferno
+```
+
+Paths are tuples of frames, one per node from the root: the root frame is the node's
+label and child frames are prefixed by their argument index, e.g.
+{("add", "1:mul", "0:{rate}")}. Labels are the operation, the variable key in braces,
+or the proc name after "@".
+"""
+from __future__ import annotations
+
+import json
+from dataclasses import asdict, dataclass, field
+from time import perf_counter_ns
+from typing import Any, TypeAlias
+
+from .base_node import BaseNode
+from .compiler import Compiled, compile_node
+from .infer import Schema
+from .node import Node
+from .subnodes import BranchNode, NumberNode, ProcNode, StringNode, VariableNode
+from .types import Json, LiteralNode, Procs, Reduced, Vals
+
+Path: TypeAlias = tuple[str, ...]
+"""Node path, one frame per node from the root."""
+
+
+@dataclass
+class NodeStats:
+    """Profile of one node path."""
+
+    calls: int = 0
+    """Number of evaluations."""
+    total_ns: int = 0
+    """Cumulative time, including children."""
+    self_ns: int = 0
+    """Time excluding (profiled) children."""
+    errors: dict[str, int] = field(default_factory=dict)
+    """Evaluations that raised (or propagated) an exception, by exception type."""
+
+    def add(self, other: NodeStats):
+        """Accumulate another profile into this one."""
+        self.calls += other.calls
+        self.total_ns += other.total_ns
+        self.self_ns += other.self_ns
+        for k, v in other.errors.items():
+            self.errors[k] = self.errors.get(k, 0) + v
+
+
+class Profiler:
+    """Per-node profiler.
+
+    Not thread safe, use one profiler per thread.
+    """
+
+    def __init__(self):
+        self.stats: dict[Path, NodeStats] = {}
+        """Profile by node path."""
+        self._procs: dict[Path, str] = {}
+        self._bodies: dict[Path, tuple[Node | dict[str, Json], Compiled]] = {}
+        self._children: list[int] = []
+
+    def compile(
+        self,
+        n: LiteralNode | Node,
+        *,
+        cse: bool = False,
+        name: str | None = None,
+        schema: Schema | None = None,
+    ) -> Compiled:
+        """Compile a node with profiling.
+
+        Args:
+            n: Node to compile.
+            cse: Compile with common subexpression elimination (shared subtrees are
+                then only profiled when evaluated).
+            name: Frame prepended to the node's paths, to tell apart several nodes
+                profiled together.
+            schema: Declared types of vals, see {algencode.infer}.
+        """
+        path = (name,) if name else ()
+        return compile_node(n, cse=cse, profiler=self, path=path, schema=schema)
+
+    def paths(self, n: LiteralNode | Node, path: Path = ()) -> dict[int, Path]:
+        """Paths of the subnodes of a tree (rooted at {path}) by subnode id."""
+        res: dict[int, Path] = {}
+        _paths(n, path, None, res)
+        return res
+
+    def instrument(self, n: BaseNode, path: Path, f: Compiled) -> Compiled:
+        """Wrap the compiled form of a node with a timer recording under {path}."""
+        stats = self.stats.setdefault(path, NodeStats())
+        if isinstance(n, ProcNode):
+            self._procs[path] = n.proc
+        children = self._children
+
+        def timed(vals: Vals | None, procs: Procs | None) -> Reduced:
+            children.append(0)
+            start = perf_counter_ns()
+            try:
+                return f(vals, procs)
+            except Exception as e:
+                name = type(e).__name__
+                stats.errors[name] = stats.errors.get(name, 0) + 1
+                raise
+            finally:
+                elapsed = perf_counter_ns() - start
+                stats.calls += 1
+                stats.total_ns += elapsed
+                stats.self_ns += elapsed - children.pop()
+                if children:
+                    children[-1] += elapsed
+
+        return timed
+
+    def proc(self, path: Path, p: Node | dict[str, Json]) -> Compiled:
+        """Compiled (profiled) body of a proc called from the proc node at {path}."""
+        if (cached := self._bodies.get(path)) is not None and cached[0] is p:
+            return cached[1]
+        n = Node.model_validate(p) if isinstance(p, dict) else p
+        f = compile_node(n, profiler=self, path=path)
+        self._bodies[path] = (p, f)
+        return f
+
+    def by_proc(self) -> dict[str, NodeStats]:
+        """Profile by proc name, summed over every call site.
+
+        Calls, cumulative time and errors are those of the calling proc nodes (so nested
+        recursive calls are also counted in their callers' time), self time is that of
+        the nodes of the proc's body, excluding any procs it calls in turn.
+        """
+        res: dict[str, NodeStats] = {}
+        for path, s in self.stats.items():
+            if (name := self._procs.get(path)) is not None:
+                p = res.setdefault(name, NodeStats())
+                p.calls += s.calls
+                p.total_ns += s.total_ns
+                for k, v in s.errors.items():
+                    p.errors[k] = p.errors.get(k, 0) + v
+            for i in range(len(path) - 1, 0, -1):
+                if (name := self._procs.get(path[:i])) is not None:
+                    res.setdefault(name, NodeStats()).self_ns += s.self_ns
+                    break
+        return res
+
+    def reset(self):
+        """Zero every recorded profile (compiled nodes keep recording)."""
+        for s in self.stats.values():
+            s.calls = s.total_ns = s.self_ns = 0
+            s.errors.clear()
+
+    def to_dict(self) -> dict[str, Any]:
+        """Machine-readable profile, with times in nanoseconds."""
+        return {
+            "nodes": [
+                {"path": list(path), **asdict(s)}
+                for path, s in self.stats.items()
+                if s.calls
+            ],
+            "procs": {k: asdict(s) for k, s in self.by_proc().items() if s.calls},
+        }
+
+    def to_json(self, **kwargs: Any) -> str:
+        """JSON profile (see {to_dict}), {kwargs} are passed to {json.dumps}."""
+        return json.dumps(self.to_dict(), **kwargs)
+
+    def collapsed(self) -> str:
+        """Profile in collapsed stack format (self time in nanoseconds per path).
+
+        One {frame;frame;... count} line per path, as read by flamegraph tools.
+        """
+        lines = [
+            ";".join(_frame(f) for f in path) + f" {s.self_ns}"
+            for path, s in self.stats.items()
+            if s.calls
+        ]
+        return "\n".join(lines) + "\n" if lines else ""
+
+
+def _label(n: BaseNode) -> str:
+    match n:
+        case VariableNode():
+            return f"{{{n.key}}}"
+        case NumberNode() | StringNode() | BranchNode():
+            return n.op
+        case ProcNode():
+            return f"@{n.proc}"
+    return type(n).__name__
+
+
+def _frame(f: str) -> str:
+    return f.replace(";", ":").replace(" ", "_")
+
+
+def _paths(n: object, path: Path, index: int | None, res: dict[int, Path]):
+    if isinstance(n, Node):
+        n = n.root
+    if not isinstance(n, BaseNode):
+        return
+    label = _label(n)
+    path = (*path, label if index is None else f"{index}:{label}")
+    res.setdefault(id(n), path)
+    for name in type(n).model_fields:
+        if name == "debug":
+            continue
+        v = getattr(n, name)
+        if isinstance(v, Node):
+            _paths(v, path, 0, res)
+        elif isinstance(v, tuple):
+            for i, a in enumerate(v):
+                _paths(a, path, i, res)
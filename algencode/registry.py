@@ -0,0 +1,82 @@
+"""Proc registry."""
+from __future__ import annotations
+
+from typing import TYPE_CHECKING, Iterator, Mapping
+
+from .lru import CacheInfo, LRUCache
+from .node import Node
+from .types import Json, Procs
+
+if TYPE_CHECKING:
+    from .compiler import Compiled
+    from .intern import InternTable
+
+
+class ProcRegistry(Mapping[str, Node]):
+    """Proc registry.
+
+    A procs mapping that validates each proc once (rather than on every {ProcNode}
+    reduction when given raw dictionaries) and keeps the parsed, and once used the
+    compiled, form of up to {maxsize} recently used procs. Usable anywhere a {Procs}
+    mapping is accepted. With a {table}, procs are parsed and compiled through it, so
+    identical subtrees are shared across procs (and registries sharing the table), see
+    {algencode.intern}.
+    """
+
+    def __init__(
+        self,
+        procs: Procs | None = None,
+        *,
+        maxsize: int | None = 1024,
+        table: InternTable | None = None,
+    ):
+        self._sources: dict[str, Node | dict[str, Json]] = dict(procs or {})
+        self._cache: LRUCache[str, Node] = LRUCache(maxsize)
+        self._table = table
+
+    def register(self, name: str, proc: Node | dict[str, Json]):
+        """Add or replace a proc."""
+        self._sources[name] = proc
+        self._cache.pop(name)
+
+    def unregister(self, name: str):
+        """Remove a proc."""
+        del self._sources[name]
+        self._cache.pop(name)
+
+    def invalidate(self, name: str | None = None):
+        """Drop the parsed/compiled form of one proc (or of every proc if None)."""
+        if name is None:
+            self._cache.clear()
+        else:
+            self._cache.pop(name)
+
+    def compiled(self, name: str) -> Compiled:
+        """Compiled form of a proc."""
+        if self._table is not None:
+            return self._table.compile(self[name])
+        return self[name].compile()
+
+    def info(self) -> CacheInfo:
+        """Parse cache statistics."""
+        return self._cache.info()
+
+    def __getitem__(self, name: str) -> Node:
+        if (n := self._cache.get(name)) is not None:
+            return n
+        n = self._sources[name]
+        if self._table is not None:
+            n = self._table.intern(n)
+        elif not isinstance(n, Node):
+            n = Node.model_validate(n)
+        self._cache.put(name, n)
+        return n
+
+    def __contains__(self, name: object) -> bool:
+        return name in self._sources
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._sources)
+
+    def __len__(self) -> int:
+        return len(self._sources)
@@ -0,0 +1,372 @@
+"""Slim runtime nodes.
+
+Validated nodes converted to plain, immutable {__slots__} objects, for holding large
+numbers of nodes in memory: no pydantic model, attribute dictionary, fields set or
+{debug} field per node, and no {Node} wrapper around each arg. Pydantic stays at the
+boundary, nodes are validated (and serialized) as models:
+
+```python
+r = Node.model_validate(doc).to_runtime()
+r.reduce(vals, procs)  # same result as the model's reduce
+r.to_node().model_dump_json()
+```
+
+Shared subtrees (e.g. interned, see {algencode.intern}) stay shared once converted.
+Subnodes with debug enabled are kept as models (see {RuntimeModel}), so they keep
+logging. Procs are looked up when called, and may be models, dictionaries or runtime
+nodes (or literals, which is what constant nodes convert to).
+"""
+from __future__ import annotations
+
+from datetime import date
+from functools import reduce
+from typing import Any, Mapping, Sequence, TypeAlias, Union
+
+from .base_node import BaseNode
+from .kernels import strftime, template
+from .node import Node
+from .scope import ArgScope
+from .subnodes import BranchNode, NumberNode, ProcNode, StringNode, VariableNode
+from .subnodes.branch_node import BRANCH_OP_COMPARISONS
+from .subnodes.number_node import NUMBER_OP_BUILTINreduce_nodeRS
+from .types import Json, LiteralNode, Number, Reduced, T, Vals
+
+Runtime: TypeAlias = Union[LiteralNode, "RuntimeNode"]
+"""Runtime node or literal."""
+
+RuntimeProcs: TypeAlias = Mapping[str, Union[Node, Runtime, dict[str, Json]]]
+"""Procs of runtime nodes or literals (models and dictionaries are accepted too)."""
+
+_MISSING = object()
+
+
+def to_runtime(n: LiteralNode | Node | BaseNode) -> Runtime:
+    """Convert a validated node (or literal) to its runtime form."""
+    return _Converter().convert(n)
+
+
+class RuntimeNode:
+    """Runtime node base type (immutable)."""
+
+    __slots__ = ()
+
+    def reduce(
+        self,
+        vals: Vals | None = None,
+        procs: RuntimeProcs | None = None,
+    ) -> Reduced:
+        """Reduce this node, as its model does."""
+        raise NotImplementedError
+
+    def to_model(self) -> BaseNode:
+        """Subnode model of this node."""
+        raise NotImplementedError
+
+    def to_node(self) -> Node:
+        """Node model of this node, to serialize it."""
+        return Node.model_construct(root=self.to_model())
+
+    def __setattr__(self, name: str, value: object):
+        raise AttributeError(f"{type(self).__name__} is immutable")
+
+    def __delattr__(self, name: str):
+        raise AttributeError(f"{type(self).__name__} is immutable")
+
+    def __reduce__(self) -> tuple[Any, tuple[Any, ...]]:
+        return type(self), tuple(getattr(self, s) for s in self.__slots__)
+
+    def __repr__(self) -> str:
+        fields = ", ".join(f"{s}={getattr(self, s)!r}" for s in self.__slots__)
+        return f"{type(self).__name__}({fields})"
+
+
+class RuntimeVariable(RuntimeNode):
+    """Runtime variable node."""
+
+    __slots__ = ("key",)
+    key: str
+
+    def __init__(self, key: str):
+        object.__setattr__(self, "key", key)
+
+    def reduce(
+        self,
+        vals: Vals | None = None,
+        procs: RuntimeProcs | None = None,
+    ) -> Reduced:
+        """Reduce this variable node."""
+        if vals is None:
+            raise RuntimeError(
+                f"value node with key={self.key} expected dictionary of values"
+            )
+        try:
+            return vals[self.key]
+        except KeyError:
+            pass
+        raise KeyError(f"key={self.key} not found in values")
+
+    def to_model(self) -> VariableNode:
+        """Subnode model of this node."""
+        return VariableNode.model_construct(key=self.key)
+
+
+class RuntimeNumber(RuntimeNode):
+    """Runtime numeric operation node."""
+
+    __slots__ = ("op", "args")
+    op: str
+    args: tuple[Runtime, ...] | RuntimeVariable
+
+    def __init__(self, op: str, args: tuple[Runtime, ...] | RuntimeVariable):
+        object.__setattr__(self, "op", op)
+        object.__setattr__(self, "args", args)
+
+    def reduce(
+        self,
+        vals: Vals | None = None,
+        procs: RuntimeProcs | None = None,
+    ) -> Reduced:
+        """Reduce this numeric operation node."""
+        args = self.args
+        if isinstance(args, RuntimeVariable):
+            args = args.reduce(vals, procs)  # type: ignore
+        assert isinstance(args, list) or isinstance(args, tuple)
+        if f := NUMBER_OP_BUILTINreduce_nodeRS.get(self.op):
+            return reduce(f, (_to(a, Number, vals, procs) for a in args))
+        match self.op, args:
+            case "round", [x]:
+                return round(_to(x, Number, vals, procs))
+            case "round", [x, ndigits]:
+                x_ = _to(x, Number, vals, procs)
+                return round(x_, _to(ndigits, int | None, vals, procs))
+            case "round", _:
+                given = _models(args) if isinstance(args, tuple) else args
+                raise ValueError(f"round expects 1 or 2 arguments, given: {given}")
+            case "len", _:
+                return len(args)
+            case "mean", _:
+                xs = [_to(a, Number, vals, procs) for a in args]
+                return sum(xs) / len(xs)
+        raise NotImplementedError(str(self))
+
+    def to_model(self) -> NumberNode:
+        """Subnode model of this node."""
+        args = self.args
+        if isinstance(args, RuntimeVariable):
+            return NumberNode.model_construct(op=self.op, args=args.to_model())
+        return NumberNode.model_construct(op=self.op, args=_models(args))
+
+
+class RuntimeString(RuntimeNode):
+    """Runtime string operation node."""
+
+    __slots__ = ("op", "args")
+    op: str
+    args: tuple[Runtime, ...]
+
+    def __init__(self, op: str, args: tuple[Runtime, ...]):
+        object.__setattr__(self, "op", op)
+        object.__setattr__(self, "args", args)
+
+    def reduce(
+        self,
+        vals: Vals | None = None,
+        procs: RuntimeProcs | None = None,
+    ) -> Reduced:
+        """Reduce this string operation node."""
+        args = self.args
+        match self.op:
+            case "slice":
+                s = _to(args[0], str, vals, procs)
+                bounds = [_to(a, int | None, vals, procs) for a in args[1:]]
+                if len(bounds) == 1:
+                    return s[: bounds[0]]
+                return s[slice(*bounds)]
+            case "fmt":
+                fmt = _to(args[0], str, vals, procs)
+                return template(fmt)([_reduce(a, vals, procs) for a in args[1:]])
+            case "rep":
+                s, count = args
+                return _to(s, str, vals, procs) * _to(count, int, vals, procs)
+            case "join":
+                delim = _to(args[0], str, vals, procs)
+                return delim.join([_to(a, str, vals, procs) for a in args[1:]])
+            case "date":
+                fmt, d = args
+                fmt_ = _to(fmt, str, vals, procs)
+                return strftime(_to(d, date, vals, procs), fmt_)
+        raise NotImplementedError(str(self))
+
+    def to_model(self) -> StringNode:
+        """Subnode model of this node."""
+        return StringNode.model_construct(op=self.op, args=_models(self.args))
+
+
+class RuntimeBranch(RuntimeNode):
+    """Runtime branch node, reducing only the args its model would."""
+
+    __slots__ = ("op", "args")
+    op: str
+    args: tuple[Runtime, ...]
+
+    def __init__(self, op: str, args: tuple[Runtime, ...]):
+        object.__setattr__(self, "op", op)
+        object.__setattr__(self, "args", args)
+
+    def reduce(
+        self,
+        vals: Vals | None = None,
+        procs: RuntimeProcs | None = None,
+    ) -> Reduced:
+        """Reduce this branch node."""
+        args = self.args
+        if compare := BRANCH_OP_COMPARISONS.get(self.op):
+            lhs, rhs = args
+            return compare(_reduce(lhs, vals, procs), _reduce(rhs, vals, procs))
+        match self.op:
+            case "if":
+                cond, if_true, if_false = args
+                taken = if_true if _reduce(cond, vals, procs) else if_false
+                return _reduce(taken, vals, procs)
+            case "and":
+                for a in args:
+                    if not (res := _reduce(a, vals, procs)):
+                        return res
+                return res
+            case "or":
+                for a in args:
+                    if res := _reduce(a, vals, procs):
+                        return res
+                return res
+            case "not":
+                return not _reduce(args[0], vals, procs)
+        raise NotImplementedError(str(self))
+
+    def to_model(self) -> BranchNode:
+        """Subnode model of this node."""
+        return BranchNode.model_construct(op=self.op, args=_models(self.args))
+
+
+class RuntimeProc(RuntimeNode):
+    """Runtime stored procedure node."""
+
+    __slots__ = ("proc", "args")
+    proc: str
+    args: tuple[Runtime, ...] | None
+
+    def __init__(self, proc: str, args: tuple[Runtime, ...] | None):
+        object.__setattr__(self, "proc", proc)
+        object.__setattr__(self, "args", args)
+
+    def reduce(
+        self,
+        vals: Vals | None = None,
+        procs: RuntimeProcs | None = None,
+    ) -> Reduced:
+        """Reduce this stored procedure node."""
+        if procs is None:
+            raise RuntimeError("expected proc map, found None")
+        n = procs.get(self.proc, _MISSING)
+        if n is _MISSING:
+            raise KeyError(f'failed to find proc node "{self.proc}"')
+        if isinstance(n, dict):
+            n = Node.model_validate(n)
+        if self.args:
+            proc_vals = ArgScope([_reduce(a, vals, procs) for a in self.args])
+            return _reduce(n, proc_vals, None)
+        return _reduce(n, vals, procs)
+
+    def to_model(self) -> ProcNode:
+        """Subnode model of this node."""
+        args = None if self.args is None else _models(self.args)
+        return ProcNode.model_construct(proc=self.proc, args=args)
+
+
+class RuntimeModel(RuntimeNode):
+    """Subnode model kept as-is (with debug enabled, so it keeps logging)."""
+
+    __slots__ = ("model",)
+    model: BaseNode
+
+    def __init__(self, model: BaseNode):
+        object.__setattr__(self, "model", model)
+
+    def reduce(
+        self,
+        vals: Vals | None = None,
+        procs: RuntimeProcs | None = None,
+    ) -> Reduced:
+        """Reduce the model."""
+        return self.model.reduce(vals, procs)  # type: ignore
+
+    def to_model(self) -> BaseNode:
+        """Subnode model of this node."""
+        return self.model
+
+
+class _Converter:
+    def __init__(self):
+        self.converted: dict[int, RuntimeNode] = {}
+
+    def convert(self, n: LiteralNode | Node | BaseNode) -> Runtime:
+        if isinstance(n, Node):
+            n = n.root
+        if not isinstance(n, BaseNode):
+            return n
+        try:
+            return self.converted[id(n)]
+        except KeyError:
+            pass
+        res = self.converted[id(n)] = self._subnode(n)
+        return res
+
+    def args(self, args: Sequence[LiteralNode | Node]) -> tuple[Runtime, ...]:
+        return tuple(self.convert(a) for a in args)
+
+    def _subnode(self, n: BaseNode) -> RuntimeNode:
+        if n.debug is not None and n.debug.root is not False:
+            return RuntimeModel(n)
+        match n:
+            case VariableNode():
+                return RuntimeVariable(n.key)
+            case NumberNode(args=VariableNode() as seq):
+                return RuntimeNumber(n.op, self._subnode(seq))  # type: ignore
+            case NumberNode():
+                return RuntimeNumber(n.op, self.args(n.args))  # type: ignore
+            case StringNode():
+                return RuntimeString(n.op, self.args(n.args))
+            case BranchNode():
+                return RuntimeBranch(n.op, self.args(n.args))
+            case ProcNode():
+                args = None if n.args is None else self.args(n.args)
+                return RuntimeProc(n.proc, args)
+        raise NotImplementedError(str(n))
+
+
+def _reduce(a: object, vals: Vals | None, procs: RuntimeProcs | None) -> Reduced:
+    if isinstance(a, RuntimeNode):
+        return a.reduce(vals, procs)
+    if isinstance(a, Node):
+        # Sequence args looked up from vals may hold nodes.
+        return a.reduce(vals, procs)  # type: ignore
+    return a  # type: ignore
+
+
+def _to(a: object, t: Any, vals: Vals | None, procs: RuntimeProcs | None) -> T:
+    """Reduce an arg, checking its type as {reduce_node_to} does (same errors too)."""
+    if isinstance(a, t):
+        return a  # type: ignore
+    if not isinstance(a, (RuntimeNode, Node)):
+        raise TypeError(f"node {a} expected to reduce to {t}, found {type(a)} {a}")
+    res = _reduce(a, vals, procs)
+    if not isinstance(res, t):
+        n = a.to_node() if isinstance(a, RuntimeNode) else a
+        raise TypeError(f"node {n} expected to reduce to {t}, found {type(res)} {res}")
+    return res  # type: ignore
+
+
+def _models(args: tuple[Runtime, ...]) -> tuple[LiteralNode | Node, ...]:
+    return tuple(
+        Node.model_construct(root=a.to_model()) if isinstance(a, RuntimeNode) else a
+        for a in args
+    )
@@ -0,0 +1,72 @@
+"""Lightweight evaluation scopes (vals mappings that avoid copying)."""
+from __future__ import annotations
+
+from typing import Iterator, Mapping, Sequence
+
+from .types import LiteralNode, Reduced
+
+
+class Scope(Mapping[str, Reduced]):
+    """Layered vals scope.
+
+    Lookups check {layer} first, then fall back to {parent}, so a handful of extra
+    values can be exposed on top of the caller's vals without copying them.
+    """
+
+    __slots__ = ("layer", "parent")
+
+    def __init__(
+        self,
+        layer: Mapping[str, Reduced],
+        parent: Mapping[str, Reduced] | None,
+    ):
+        self.layer = layer
+        self.parent = parent
+
+    def __getitem__(self, key: str) -> Reduced:
+        try:
+            return self.layer[key]
+        except KeyError:
+            if self.parent is None:
+                raise
+        return self.parent[key]
+
+    def __iter__(self) -> Iterator[str]:
+        yield from self.layer
+        if self.parent is not None:
+            yield from (k for k in self.parent if k not in self.layer)
+
+    def __len__(self) -> int:
+        return sum(1 for _ in self)
+
+    def __repr__(self) -> str:
+        return f"Scope({self.layer!r}, {self.parent!r})"
+
+
+class ArgScope(Mapping[str, Reduced]):
+    """Proc frame scope.
+
+    Exposes positional proc args as {_0}, {_1}, ... directly from a sequence of reduced
+    args, without building a dictionary per call.
+    """
+
+    __slots__ = ("args",)
+
+    def __init__(self, args: Sequence[LiteralNode | Reduced]):
+        self.args = args
+
+    def __getitem__(self, key: str) -> Reduced:
+        if isinstance(key, str) and key[:1] == "_" and key[1:].isdigit():
+            i = int(key[1:])
+            if i < len(self.args) and key == f"_{i}":
+                return self.args[i]
+        raise KeyError(key)
+
+    def __iter__(self) -> Iterator[str]:
+        return (f"_{i}" for i in range(len(self.args)))
+
+    def __len__(self) -> int:
+        return len(self.args)
+
+    def __repr__(self) -> str:
+        return f"ArgScope({self.args!r})"
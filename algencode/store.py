@@ -0,0 +1,263 @@
+"""Persistent proc store.
+
+A {ProcStore} keeps named procs in a local SQLite database, each write adding a new
+version of the proc, and loads procs lazily by name, keeping up to {maxsize}
+recently used ones parsed in memory. Usable anywhere a {Procs} mapping is accepted,
+it always reads the latest version of each proc.
+
+```python
+with ProcStore("procs.db") as procs:
+    procs.import_procs({"rate": {"op": "div", "args": [{"key": "levy"}, 12]}})
+    n.reduce(vals, procs)
+```
+
+Procs are validated before they're stored, and encoded in the compact binary format
+(see {algencode.binary}, decoding without validation) or as JSON text. JSON can't
+tell {Decimal} and {date} literals from strings, so procs holding them must be stored
+in binary. The in-memory cache isn't told about writes from other connections, see
+{ProcStore.invalidate}.
+"""
+from __future__ import annotations
+
+import os
+import sqlite3
+from threading import Lock
+from typing import TYPE_CHECKING, Iterator, Literal, Mapping
+
+from .binary import from_bytes, procs_from_bytes, procs_to_bytes, to_bytes
+from .lru import CacheInfo, LRUCache
+from .node import Node
+from .types import Json, Procs
+
+if TYPE_CHECKING:
+    from .compiler import Compiled
+
+Encoding = Literal["binary", "json"]
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS procs (
+    name TEXT NOT NULL,
+    version INTEGER NOT NULL,
+    encoding TEXT NOT NULL,
+    data BLOB NOT NULL,
+    PRIMARY KEY (name, version)
+) WITHOUT ROWID
+"""
+
+_LATEST = """
+SELECT version, encoding, data FROM procs WHERE name = ? ORDER BY version DESC LIMIT 1
+"""
+
+_ALL_LATEST = """
+SELECT name, encoding, data FROM procs AS p
+WHERE version = (SELECT MAX(version) FROM procs WHERE name = p.name)
+ORDER BY name
+"""
+
+
+class ProcStore(Mapping[str, Node]):
+    """SQLite backed, versioned proc store.
+
+    Args:
+        path: Database file ({":memory:"} for a private in-memory database).
+        maxsize: Maximum number of parsed procs kept in memory.
+        encoding: Encoding of the procs written.
+    """
+
+    def __init__(
+        self,
+        path: str | os.PathLike[str] = ":memory:",
+        *,
+        maxsize: int | None = 1024,
+        encoding: Encoding = "binary",
+    ):
+        if encoding not in ("binary", "json"):
+            raise ValueError(f"unknown encoding {encoding!r}")
+        self.path = os.fspath(path)
+        self.encoding: Encoding = encoding
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._lock = Lock()
+        self._cache: LRUCache[str, Node] = LRUCache(maxsize)
+        with self._lock, self._conn:
+            self._conn.execute(_SCHEMA)
+
+    def put(self, name: str, proc: Node | dict[str, Json]) -> int:
+        """Add a version of a proc, returning its version number.
+
+        Raises:
+            pydantic.ValidationError: If the proc is invalid.
+            ValueError: If the proc can't be stored as JSON.
+        """
+        return self.import_procs({name: proc})[name]
+
+    def import_procs(self, procs: Procs) -> dict[str, int]:
+        """Add a version of many procs, in a single transaction.
+
+        Procs identical to their latest stored version keep that version.
+
+        Returns:
+            Version number of each proc.
+
+        Raises:
+            pydantic.ValidationError: If a proc is invalid (nothing is stored).
+            ValueError: If a proc can't be stored as JSON (nothing is stored).
+        """
+        encoded = {name: self._encode(name, procs[name]) for name in procs}
+        versions: dict[str, int] = {}
+        rows = []
+        with self._lock, self._conn:
+            for name, data in encoded.items():
+                row = self._conn.execute(_LATEST, (name,)).fetchone()
+                version, encoding, stored = row or (0, None, None)
+                if encoding != self.encoding or stored != data:
+                    version += 1
+                    rows.append((name, version, self.encoding, data))
+                versions[name] = version
+            self._conn.executemany("INSERT INTO procs VALUES (?, ?, ?, ?)", rows)
+        for name, *_ in rows:
+            self._cache.pop(name)
+        return versions
+
+    def import_bytes(self, data: bytes) -> dict[str, int]:
+        """Add a version of the procs of an encoded proc map, see {import_procs}.
+
+        Raises:
+            ValueError: If the data is malformed.
+        """
+        return self.import_procs(procs_from_bytes(data))
+
+    def export_procs(self) -> dict[str, Node]:
+        """Latest version of every proc."""
+        with self._lock:
+            rows = self._conn.execute(_ALL_LATEST).fetchall()
+        return {name: _decode(encoding, data) for name, encoding, data in rows}
+
+    def export_bytes(self) -> bytes:
+        """Latest version of every proc, as an encoded proc map."""
+        return procs_to_bytes(self.export_procs())
+
+    def remove(self, name: str):
+        """Remove every version of a proc.
+
+        Raises:
+            KeyError: If the proc isn't stored.
+        """
+        with self._lock, self._conn:
+            cursor = self._conn.execute("DELETE FROM procs WHERE name = ?", (name,))
+        self._cache.pop(name)
+        if not cursor.rowcount:
+            raise KeyError(name)
+
+    def versions(self, name: str) -> list[int]:
+        """Stored version numbers of a proc, oldest first (empty if not stored)."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT version FROM procs WHERE name = ? ORDER BY version", (name,)
+            ).fetchall()
+        return [version for (version,) in rows]
+
+    def get_version(self, name: str, version: int) -> Node:
+        """A version of a proc (bypassing the cache).
+
+        Raises:
+            KeyError: If the proc or version isn't stored.
+        """
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT encoding, data FROM procs WHERE name = ? AND version = ?",
+                (name, version),
+            ).fetchone()
+        if row is None:
+            raise KeyError(f"{name} version {version}")
+        return _decode(*row)
+
+    def invalidate(self, name: str | None = None):
+        """Drop the parsed form of one proc (or of every proc if None).
+
+        Needed after the database is written by another connection.
+        """
+        if name is None:
+            self._cache.clear()
+        else:
+            self._cache.pop(name)
+
+    def compiled(self, name: str) -> Compiled:
+        """Compiled form of a proc."""
+        return self[name].compile()
+
+    def info(self) -> CacheInfo:
+        """Cache statistics."""
+        return self._cache.info()
+
+    def close(self):
+        """Close the database connection."""
+        with self._lock:
+            self._conn.close()
+
+    def __enter__(self) -> ProcStore:
+        return self
+
+    def __exit__(self, *exc_info: object):
+        self.close()
+
+    def __reduce__(self):
+        # Pickled by path (e.g. for worker processes), each copy opening its own
+        # connection and cache.
+        if self.path == ":memory:":
+            raise TypeError("can't pickle an in-memory proc store")
+        return _open, (self.path, self._cache.maxsize, self.encoding)
+
+    def __getitem__(self, name: str) -> Node:
+        if (n := self._cache.get(name)) is not None:
+            return n
+        with self._lock:
+            row = self._conn.execute(_LATEST, (name,)).fetchone()
+        if row is None:
+            raise KeyError(name)
+        n = _decode(*row[1:])
+        self._cache.put(name, n)
+        return n
+
+    def __contains__(self, name: object) -> bool:
+        if name in self._cache:
+            return True
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT 1 FROM procs WHERE name = ? LIMIT 1", (name,)
+            ).fetchone()
+        return row is not None
+
+    def __iter__(self) -> Iterator[str]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT DISTINCT name FROM procs ORDER BY name"
+            ).fetchall()
+        return iter([name for (name,) in rows])
+
+    def __len__(self) -> int:
+        with self._lock:
+            (count,) = self._conn.execute(
+                "SELECT COUNT(DISTINCT name) FROM procs"
+            ).fetchone()
+        return count
+
+    def _encode(self, name: str, proc: Node | dict[str, Json]) -> bytes:
+        n = proc if isinstance(proc, Node) else Node.model_validate(proc)
+        if self.encoding == "binary":
+            return to_bytes(n)
+        text = n.model_dump_json(exclude_defaults=True)
+        if Node.model_validate_json(text) != n:
+            raise ValueError(f"proc {name} has literals JSON can't represent")
+        return text.encode()
+
+
+def _decode(encoding: str, data: bytes) -> Node:
+    if encoding == "binary":
+        return from_bytes(data)
+    if encoding == "json":
+        return Node.model_validate_json(data)
+    raise ValueError(f"unknown encoding {encoding!r}")
+
+
+def _open(path: str, maxsize: int | None, encoding: Encoding) -> ProcStore:
+    return ProcStore(path, maxsize=maxsize, encoding=encoding)
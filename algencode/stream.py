@@ -0,0 +1,294 @@
+"""Streaming row pipelines.
+
+Applies a node (or a dict of named nodes) to every row of a row iterator or a CSV,
+XLSX or JSONL file, lazily through generators, so memory stays constant regardless of
+the input size. Results can be written back out with a buffered {RowWriter}.
+
+```python
+nodes = {"apn": Node.model_validate({"key": "apn"}), "levy": levy}
+with RowWriter("out.csv") as w:
+    w.writerows(evaluate(nodes, "91750_FY_2021_2022.csv", converters={"tax": Decimal}))
+```
+"""
+from __future__ import annotations
+
+import csv
+import json
+import os
+from itertools import islice
+from pathlib import Path
+from typing import (
+    IO,
+    Any,
+    Callable,
+    Iterable,
+    Iterator,
+    Literal,
+    Mapping,
+    Sequence,
+    TypeAlias,
+)
+
+from .analysis import dependencies
+from .node import Node
+from .types import Procs, Reduced
+
+Nodes: TypeAlias = Node | Mapping[str, Node]
+"""A node, or named nodes (yielding a dict of results per row)."""
+
+Row: TypeAlias = Mapping[str, Any]
+"""Input row (vals)."""
+
+Source: TypeAlias = Iterable[Row] | str | os.PathLike[str]
+"""Rows, or the path of a CSV, XLSX or JSONL file of rows."""
+
+Converters: TypeAlias = Mapping[str, Callable[[Any], Any]]
+"""Per column value converters (e.g. {"tax": Decimal})."""
+
+CHUNK_SIZE = 1024
+"""Default number of rows read and evaluated at a time."""
+
+
+def chunked(rows: Iterable[Row], size: int = CHUNK_SIZE) -> Iterator[list[Row]]:
+    """Group rows into lists of (at most) {size} rows."""
+    it = iter(rows)
+    while chunk := list(islice(it, size)):
+        yield chunk
+
+
+def read_rows(
+    path: str | os.PathLike[str],
+    *,
+    fieldnames: Sequence[str] | None = None,
+    converters: Converters | None = None,
+    keys: Iterable[str] | None = None,
+    sheet: str | None = None,
+) -> Iterator[dict[str, Any]]:
+    """Lazily read rows of a CSV, XLSX or JSONL file as dicts.
+
+    Args:
+        path: File path, the format is taken from its suffix.
+        fieldnames: Column names, if the file has no header row (CSV and XLSX).
+        converters: Per column value converters.
+        keys: If given, only these columns are kept.
+        sheet: XLSX worksheet name (defaults to the active sheet).
+    """
+    suffix = Path(path).suffix.lower()
+    match suffix:
+        case ".csv":
+            rows = _read_csv(path, fieldnames)
+        case ".xlsx" | ".xlsm":
+            rows = _read_xlsx(path, fieldnames, sheet)
+        case ".jsonl" | ".ndjson":
+            rows = _read_jsonl(path)
+        case _:
+            raise ValueError(f"unsupported row file format {suffix!r}")
+    return _prepare(rows, converters, keys)
+
+
+def evaluate(
+    nodes: Nodes,
+    source: Source,
+    procs: Procs | None = None,
+    *,
+    keep: Sequence[str] = (),
+    chunk_size: int = CHUNK_SIZE,
+    fieldnames: Sequence[str] | None = None,
+    converters: Converters | None = None,
+) -> Iterator[Reduced | dict[str, Reduced]]:
+    """Lazily evaluate node(s) over every row of a row iterator or file.
+
+    Args:
+        nodes: Node, or dict of named nodes.
+        source: Rows, or the path of a CSV, XLSX or JSONL file (see {read_rows}).
+        procs: Procs map.
+        keep: Input columns passed through to the output (as a dict of results).
+        chunk_size: Number of rows read and evaluated at a time.
+        fieldnames: Column names, if a file source has no header row.
+        converters: Per column value converters, applied when reading.
+
+    Yields:
+        The result of the node, or a dict of results for named nodes and {keep}.
+    """
+    named = dict(nodes) if isinstance(nodes, Mapping) else None
+    fs = {k: n.compile() for k, n in (named or {"": nodes}).items()}  # type: ignore
+    rows = read_source(
+        source,
+        (named or {"": nodes}).values(),  # type: ignore
+        procs,
+        keep=keep,
+        fieldnames=fieldnames,
+        converters=converters,
+    )
+
+    if named is None and not keep:
+        (f,) = fs.values()
+        for chunk in chunked(rows, chunk_size):
+            yield from [f(r, procs) for r in chunk]
+        return
+    for chunk in chunked(rows, chunk_size):
+        for r in chunk:
+            res = {k: r[k] for k in keep}
+            if named is None:
+                res["value"] = fs[""](r, procs)
+            else:
+                res.update((k, f(r, procs)) for k, f in fs.items())
+            yield res
+
+
+def read_source(
+    source: Source,
+    nodes: Iterable[Node] = (),
+    procs: Procs | None = None,
+    *,
+    keep: Sequence[str] = (),
+    fieldnames: Sequence[str] | None = None,
+    converters: Converters | None = None,
+) -> Iterator[Row]:
+    """Lazily read the rows of a row iterator or file, to evaluate nodes over.
+
+    Rows read from a file only keep the columns the nodes can read and {keep}.
+    """
+    if isinstance(source, (str, os.PathLike)):
+        keys = _required_keys(nodes, procs, keep)
+        return read_rows(source, fieldnames=fieldnames, converters=converters, keys=keys)
+    return _prepare(source, converters, None)
+
+
+class RowWriter:
+    """Buffered CSV / JSONL row writer.
+
+    Rows are dicts (or single values, written as a "value" column) and are written out
+    {buffer_size} at a time. CSV columns are taken from {fieldnames} or the first row.
+    """
+
+    def __init__(
+        self,
+        target: str | os.PathLike[str] | IO[str],
+        format: Literal["csv", "jsonl"] | None = None,
+        *,
+        fieldnames: Sequence[str] | None = None,
+        buffer_size: int = CHUNK_SIZE,
+    ):
+        if isinstance(target, (str, os.PathLike)):
+            if format is None and Path(target).suffix in (".jsonl", ".ndjson"):
+                format = "jsonl"
+            self._file: IO[str] = open(target, "w", newline="", encoding="utf-8")
+            self._owned = True
+        else:
+            self._file = target
+            self._owned = False
+        self.format = format or "csv"
+        self.fieldnames = list(fieldnames) if fieldnames is not None else None
+        self.buffer_size = buffer_size
+        self._buffer: list[Mapping[str, Any]] = []
+        self._csv: csv.DictWriter | None = None
+
+    def write(self, row: Any):
+        """Write one row."""
+        self._buffer.append(row if isinstance(row, Mapping) else {"value": row})
+        if len(self._buffer) >= self.buffer_size:
+            self.flush()
+
+    def writerows(self, rows: Iterable[Any]):
+        """Write every row of an iterable (e.g. from {evaluate})."""
+        for row in rows:
+            self.write(row)
+
+    def flush(self):
+        """Write out buffered rows."""
+        if self._buffer:
+            if self.format == "jsonl":
+                self._file.writelines(
+                    json.dumps(r, default=str, separators=(",", ":")) + "\n"
+                    for r in self._buffer
+                )
+            else:
+                if self._csv is None:
+                    self.fieldnames = self.fieldnames or list(self._buffer[0])
+                    self._csv = csv.DictWriter(self._file, self.fieldnames)
+                    self._csv.writeheader()
+                self._csv.writerows(self._buffer)
+            self._buffer.clear()
+        self._file.flush()
+
+    def close(self):
+        """Flush, and close the file if opened by this writer."""
+        self.flush()
+        if self._owned:
+            self._file.close()
+
+    def __enter__(self) -> RowWriter:
+        return self
+
+    def __exit__(self, *_):
+        self.close()
+
+
+def _required_keys(
+    nodes: Iterable[Node],
+    procs: Procs | None,
+    keep: Sequence[str],
+) -> set[str] | None:
+    """Columns the nodes can read (None if unknown)."""
+    keys = set(keep)
+    for n in nodes:
+        deps = dependencies(n, procs)
+        if deps.missing:
+            return None
+        keys |= deps.keys
+    return keys
+
+
+def _prepare(
+    rows: Iterable[Row],
+    converters: Converters | None,
+    keys: Iterable[str] | None,
+) -> Iterator[Row]:
+    if keys is not None:
+        keys = set(keys)
+        rows = ({k: v for k, v in r.items() if k in keys} for r in rows)
+    if converters:
+        rows = (
+            {k: converters[k](v) if k in converters else v for k, v in r.items()}
+            for r in rows
+        )
+    return iter(rows)
+
+
+def _read_csv(
+    path: str | os.PathLike[str],
+    fieldnames: Sequence[str] | None,
+) -> Iterator[dict[str, str]]:
+    with open(path, newline="", encoding="utf-8-sig") as f:
+        yield from csv.DictReader(f, fieldnames)
+
+
+def _read_jsonl(path: str | os.PathLike[str]) -> Iterator[dict[str, Any]]:
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
+
+
+def _read_xlsx(
+    path: str | os.PathLike[str],
+    fieldnames: Sequence[str] | None,
+    sheet: str | None,
+) -> Iterator[dict[str, Any]]:
+    try:
+        import openpyxl
+    except ImportError as e:  # pragma: no cover
+        raise ImportError("reading xlsx files requires openpyxl (algencode[xlsx])") from e
+    wb = openpyxl.load_workbook(path, read_only=True, data_only=True)
+    try:
+        ws = wb[sheet] if sheet is not None else wb.active
+        rows = ws.iter_rows(values_only=True)
+        if fieldnames is None:
+            if (header := next(rows, None)) is None:
+                return
+            fieldnames = [str(c) for c in header]
+        for r in rows:
+            yield dict(zip(fieldnames, r))
+    finally:
+        wb.close()
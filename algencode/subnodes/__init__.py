@@ -1,10 +1,12 @@
 """Subnodes."""
+from .branch_node import BranchNode
 from .number_node import NumberNode
 from .proc_node import ProcNode
 from .string_node import StringNode
 from .variable_node import VariableNode
 
 __all__ = [
+    "BranchNode",
     "NumberNode",
     "ProcNode",
     "StringNode",
@@ -1,13 +1,118 @@
-# """Branching node model."""
-# from .base_node import BaseNode
-#
-#
-# class BranchNode(BaseNode):
-#     """Branching node.
-#
-#     Node that represents a branch in logic.
-#     """
-#
-#     expr: Node
-#     if_true: int
-#     if_false: int
+"""Branch (conditional) node."""
+from __future__ import annotations
+
+import operator
+from typing import Callable, Literal, get_args
+
+from pydantic import model_validator
+
+from ..node import Node
+from ..types import Args, Procs, Reduced, Vals
+from ..utils import arity_message, call_attr_op, reduce_node
+from ..base_node import BaseNode
+
+BRANCH_OP_COMPARISON = Literal["eq", "ne", "lt", "le", "gt", "ge"]
+BRANCH_OP = Literal[BRANCH_OP_COMPARISON, "if", "and", "or", "not"]
+
+BRANCH_OP_COMPARISONS: dict[str, Callable[[Reduced, Reduced], bool]] = dict(
+    zip(
+        get_args(BRANCH_OP_COMPARISON),
+        [operator.eq, operator.ne, operator.lt, operator.le, operator.gt, operator.ge],
+    )
+)
+
+BRANCH_OP_ARITY: dict[str, tuple[int, int | None]] = {
+    **dict.fromkeys(get_args(BRANCH_OP_COMPARISON), (2, 2)),
+    "if": (3, 3),
+    "and": (1, None),
+    "or": (1, None),
+    "not": (1, 1),
+}
+"""Minimum and maximum (None if unbounded) number of args of each op."""
+
+
+class BranchNode(BaseNode):
+    """Branch node.
+
+    Node that supports conditionals and boolean logic:
+        - comparing two args {eq}, {ne}, {lt}, {le}, {gt}, {ge}
+        - choosing between two args {if}, as [condition, if true, if false]
+        - short-circuit {and} and {or} over any number of args
+        - negating {not}
+
+    Conditions are tested for truthiness as Python does, and args are only reduced
+    when needed: {if} reduces the condition and the taken branch only, {and} and {or}
+    stop at the first falsy (truthy) arg and return it, or else the last arg, as
+    Python's {and} and {or} do. The number of args is checked when validated (see
+    {BRANCH_OP_ARITY}).
+    """
+
+    op: BRANCH_OP
+    args: Args
+
+    @model_validator(mode="after")
+    def _check_arity(self) -> BranchNode:
+        if message := arity_error(self.op, len(self.args)):
+            raise ValueError(message)
+        return self
+
+    def _if(
+        self,
+        vals: Vals | None,
+        procs: Procs | None,
+    ) -> Reduced:
+        cond, if_true, if_false = self.args
+        taken = if_true if reduce_node(cond, vals, procs) else if_false
+        return reduce_node(taken, vals, procs)
+
+    def _and(
+        self,
+        vals: Vals | None,
+        procs: Procs | None,
+    ) -> Reduced:
+        for a in self.args:
+            if not (res := reduce_node(a, vals, procs)):
+                return res
+        return res
+
+    def _or(
+        self,
+        vals: Vals | None,
+        procs: Procs | None,
+    ) -> Reduced:
+        for a in self.args:
+            if res := reduce_node(a, vals, procs):
+                return res
+        return res
+
+    def _not(
+        self,
+        vals: Vals | None,
+        procs: Procs | None,
+    ) -> bool:
+        return not reduce_node(self.args[0], vals, procs)
+
+    def reduce(
+        self,
+        vals: Vals | None = None,
+        procs: Procs | None = None,
+        *,
+        force_debug: bool = False,
+    ) -> Reduced:
+        """Reduce this branch node."""
+        if compare := BRANCH_OP_COMPARISONS.get(self.op):
+            lhs, rhs = self.args
+            res = compare(reduce_node(lhs, vals, procs), reduce_node(rhs, vals, procs))
+        else:
+            res = call_attr_op(self, vals, procs)
+        return self._reduced(
+            res,
+            vals,
+            procs,
+            force_debug=force_debug,
+        )
+
+
+def arity_error(op: str, argc: int) -> str | None:
+    """Error message if a branch op can't take {argc} args (None if it can)."""
+    return arity_message(op, argc, BRANCH_OP_ARITY[op])
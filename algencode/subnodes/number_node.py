@@ -115,9 +115,10 @@ class NumberNode(BaseNode):
         if binaryreduce_noder := NUMBER_OP_BUILTINreduce_nodeRS.get(self.op):
             res = reduce(binaryreduce_noder, args)
         else:
-            res = call_attr_op(self, vals)
-        return super().reduce(
-            {**(vals or {}), "_res": res},
+            res = call_attr_op(self, vals, procs)
+        return self._reduced(
+            res,
+            vals,
             procs,
             force_debug=force_debug,
         )
@@ -4,7 +4,8 @@ from __future__ import annotations
 from pydantic import StrictStr
 
 from ..node import Node
-from ..types import LiteralNode, Procs, Reduced, Vals
+from ..scope import ArgScope
+from ..types import Args, Procs, Reduced, Vals
 from ..utils import reduce_node
 from ..base_node import BaseNode
 
@@ -13,7 +14,7 @@ class ProcNode(BaseNode):
     """Stored procedure node."""
 
     proc: StrictStr
-    args: list[LiteralNode | Node] | None = None
+    args: Args | None = None
 
     def reduce(
         self,
@@ -29,18 +30,13 @@ class ProcNode(BaseNode):
             if isinstance(n, dict):
                 n = Node.model_validate(n)
             if self.args:
-                proc_keys = [f"_{i}" for i in range(len(self.args))]
-                proc_vals = dict(
-                    zip(
-                        proc_keys,
-                        [reduce_node(a, vals, procs) for a in self.args],
-                    )
-                )
+                proc_vals = ArgScope([reduce_node(a, vals, procs) for a in self.args])
                 res = n.reduce(proc_vals, force_debug=force_debug)
             else:
                 res = n.reduce(vals, procs, force_debug=force_debug)
-            return super().reduce(
-                {**(vals or {}), "_res": res},
+            return self._reduced(
+                res,
+                vals,
                 procs,
                 force_debug=force_debug,
             )
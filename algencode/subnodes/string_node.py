@@ -4,13 +4,25 @@ from __future__ import annotations
 from datetime import date
 from typing import Literal
 
+from pydantic import model_validator
+
+from ..kernels import strftime, template
 from ..node import Node
-from ..types import LiteralNode, Procs, Reduced, Vals
-from ..utils import call_attr_op, reduce_node, reduce_node_to
+from ..types import Args, Procs, Reduced, Vals
+from ..utils import arity_message, call_attr_op, reduce_node, reduce_node_to
 from ..base_node import BaseNode
 
 STRING_OP = Literal["slice", "fmt", "rep", "join", "date"]
 
+STRING_OP_ARITY: dict[str, tuple[int, int | None]] = {
+    "slice": (2, 4),
+    "fmt": (1, None),
+    "rep": (2, 2),
+    "join": (1, None),
+    "date": (2, 2),
+}
+"""Minimum and maximum (None if unbounded) number of args of each op."""
+
 
 class StringNode(BaseNode):
     """String node.
@@ -22,11 +34,21 @@ class StringNode(BaseNode):
         - joining {join}
         - date formatting {date}
 
+    The number of args is checked when validated (see {STRING_OP_ARITY}). Format
+    strings are parsed once into templates, and date formatting is memoized (see
+    {algencode.kernels}).
+
     TODO: (More) documentation on operations and their arguments
     """
 
     op: STRING_OP
-    args: list[LiteralNode | Node]
+    args: Args
+
+    @model_validator(mode="after")
+    def _check_arity(self) -> StringNode:
+        if message := arity_error(self.op, len(self.args)):
+            raise ValueError(message)
+        return self
 
     def _slice(
         self,
@@ -40,68 +62,44 @@ class StringNode(BaseNode):
             - [str, int?, int?] for slice s[start:stop]
             - [str, int?, int?, int?] for slice s[start:stop:step]
         """
-        match self.args:
-            case [s, stop]:
-                _s = reduce_node_to(s, str, vals, procs)
-                _stop = reduce_node_to(stop, int | None, vals, procs)
-                return _s[:_stop]
-            case [s, start, stop]:
-                _s = reduce_node_to(s, str, vals, procs)
-                _start = reduce_node_to(start, int | None, vals, procs)
-                _stop = reduce_node_to(stop, int | None, vals, procs)
-                return _s[_start:_stop]  # type: ignore
-            case [s, start, stop, step]:
-                _s = reduce_node_to(s, str, vals, procs)
-                _start = reduce_node_to(start, int | None, vals, procs)
-                _stop = reduce_node_to(stop, int | None, vals, procs)
-                _step = reduce_node_to(step, int | None, vals, procs)
-                return _s[_start:_stop:_step]  # type: ignore
-        raise ValueError(f"slice expects 2, 3 or 4 arguments, found {len(self.args)}")
+        s = reduce_node_to(self.args[0], str, vals, procs)
+        bounds = [reduce_node_to(a, int | None, vals, procs) for a in self.args[1:]]
+        if len(bounds) == 1:
+            return s[: bounds[0]]
+        return s[slice(*bounds)]
 
     def _fmt(
         self,
         vals: Vals | None,
         procs: Procs | None,
     ) -> str:
-        _fmt = reduce_node_to(self.args[0], str, vals, procs)
-        _v = map(lambda n: reduce_node(n, vals, procs), self.args[1:])
-        return _fmt.format(*_v)
+        fmt = reduce_node_to(self.args[0], str, vals, procs)
+        return template(fmt)([reduce_node(n, vals, procs) for n in self.args[1:]])
 
     def _rep(
         self,
         vals: Vals | None,
         procs: Procs | None,
     ) -> str:
-        match self.args:
-            case [s, n]:
-                _s = reduce_node_to(s, str, vals, procs)
-                _n = reduce_node_to(n, int, vals, procs)
-                return _s * _n
-        raise ValueError("TODO")
+        s, n = self.args
+        return reduce_node_to(s, str, vals, procs) * reduce_node_to(n, int, vals, procs)
 
     def _join(
         self,
         vals: Vals | None,
         procs: Procs | None,
     ) -> str:
-        match self.args:
-            case [delim, *args]:
-                _delim = reduce_node_to(delim, str, vals, procs)
-                _args = [reduce_node_to(a, str, vals, procs) for a in args]
-                return _delim.join(_args)
-        raise ValueError("TODO")
+        delim = reduce_node_to(self.args[0], str, vals, procs)
+        return delim.join([reduce_node_to(a, str, vals, procs) for a in self.args[1:]])
 
     def _date(
         self,
         vals: Vals | None,
         procs: Procs | None,
     ) -> str:
-        match self.args:
-            case [fmt, d]:
-                _fmt = reduce_node_to(fmt, str, vals, procs)
-                _d = reduce_node_to(d, date, vals, procs)
-                return _d.strftime(_fmt)
-        raise ValueError("TODO")
+        fmt, d = self.args
+        fmt_ = reduce_node_to(fmt, str, vals, procs)
+        return strftime(reduce_node_to(d, date, vals, procs), fmt_)
 
     def reduce(
         self,
@@ -112,8 +110,14 @@ class StringNode(BaseNode):
     ) -> Reduced:
         """Reduce this string operation node."""
         res = call_attr_op(self, vals, procs)
-        return super().reduce(
-            {**(vals or {}), "_res": res},
+        return self._reduced(
+            res,
+            vals,
             procs,
             force_debug=force_debug,
         )
+
+
+def arity_error(op: str, argc: int) -> str | None:
+    """Error message if a string op can't take {argc} args (None if it can)."""
+    return arity_message(op, argc, STRING_OP_ARITY[op])
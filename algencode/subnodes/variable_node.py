@@ -32,8 +32,9 @@ class VariableNode(BaseNode):
             )
         with suppress(KeyError):
             res = vals[self.key]
-            return super().reduce(
-                {**(vals or {}), "_res": res},
+            return self._reduced(
+                res,
+                vals,
                 procs,
                 force_debug=force_debug,
             )
@@ -3,8 +3,11 @@ from __future__ import annotations
 
 from datetime import date  # TODO: consider adding datetime too
 from decimal import Decimal
+from functools import cache
 from typing import (
     TYPE_CHECKING,
+    Annotated,
+    Any,
     Callable,
     Mapping,
     Optional,
@@ -12,13 +15,14 @@ from typing import (
     TypeAlias,
     TypeVar,
     Union,
+    get_args,
 )
 
 import pydantic
 
 if TYPE_CHECKING:
     from .node import Node
-    from .subnodes import NumberNode, ProcNode, StringNode, VariableNode
+    from .subnodes import BranchNode, NumberNode, ProcNode, StringNode, VariableNode
 
 T = TypeVar("T")
 
@@ -59,11 +63,69 @@ Reduced: TypeAlias = LiteralNode | Sequence[LiteralNode]
 Reducer: TypeAlias = Callable[[T, T], T]
 """Homogeneous typed binary reducer function."""
 
-SubNode: TypeAlias = Union["VariableNode", "StringNode", "NumberNode", "ProcNode"]
+
+def subnode_tag(v: Any) -> str | None:
+    """Name of the subnode type a document (or subnode) validates as, if any.
+
+    Documents are told apart by their op, proc or key, so each is only validated as one
+    subnode type: trying every type in turn would validate nested args once per type
+    at each level, in time exponential in the depth of the tree.
+    """
+    if not isinstance(v, dict):
+        return type(v).__name__
+    if "op" in v:
+        op = v["op"]
+        return _op_tags().get(op) if isinstance(op, str) else None
+    if "proc" in v:
+        return "ProcNode"
+    if "key" in v:
+        return "VariableNode"
+    return None
+
+
+@cache
+def _op_tags() -> dict[str, str]:
+    from .subnodes.branch_node import BRANCH_OP
+    from .subnodes.number_node import NUMBER_OP
+    from .subnodes.string_node import STRING_OP
+
+    return {
+        **dict.fromkeys(get_args(NUMBER_OP), "NumberNode"),
+        **dict.fromkeys(get_args(STRING_OP), "StringNode"),
+        **dict.fromkeys(get_args(BRANCH_OP), "BranchNode"),
+    }
+
+
+SubNode: TypeAlias = Annotated[
+    Union[
+        Annotated["VariableNode", pydantic.Tag("VariableNode")],
+        Annotated["StringNode", pydantic.Tag("StringNode")],
+        Annotated["NumberNode", pydantic.Tag("NumberNode")],
+        Annotated["ProcNode", pydantic.Tag("ProcNode")],
+        Annotated["BranchNode", pydantic.Tag("BranchNode")],
+    ],
+    pydantic.Discriminator(
+        subnode_tag,
+        custom_error_type="invalid_node",
+        custom_error_message="Input should be a literal, or a node with a known op, "
+        "a proc or a key",
+    ),
+]
 """Subnodes."""
 
-OpNode: TypeAlias = Union["StringNode", "NumberNode"]
+OpNode: TypeAlias = Union["StringNode", "NumberNode", "BranchNode"]
 """Operation nodes."""
 
-OpArgs: TypeAlias = Union[list[LiteralNode | "Node"], "VariableNode"]
+def _dump_list(v: Any, handler: pydantic.SerializerFunctionWrapHandler) -> Any:
+    res = handler(v)
+    return list(res) if isinstance(res, tuple) else res
+
+
+Args: TypeAlias = Annotated[
+    tuple[LiteralNode | "Node", ...], pydantic.WrapSerializer(_dump_list)
+]
+"""Node args, held as an (immutable) tuple but dumped as a list, as documents give
+them."""
+
+OpArgs: TypeAlias = Union[Args, "VariableNode"]
 """Operation node args."""
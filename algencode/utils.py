@@ -52,3 +52,23 @@ def call_attr_op(
         )
         return f(vals, procs)
     raise NotImplementedError(str(node))
+
+
+def arity_message(op: str, argc: int, arity: tuple[int, int | None]) -> str | None:
+    """Error message if {op} can't take {argc} args (None if it can).
+
+    Args:
+        op: Operation.
+        argc: Number of args.
+        arity: Minimum and maximum (None if unbounded) number of args.
+    """
+    lo, hi = arity
+    if lo <= argc and (hi is None or argc <= hi):
+        return None
+    if hi is None:
+        expected = f"at least {lo}"
+    elif lo == hi:
+        expected = str(lo)
+    else:
+        expected = f"{lo} to {hi}"
+    return f"{op} expects {expected} arguments, found {argc}"
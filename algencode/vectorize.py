@@ -0,0 +1,391 @@
+"""Batched (NumPy vectorized) node reduction.
+
+Evaluates a node over a batch of rows given as columns, one array per variable with
+one element per row. Numeric subtrees are evaluated with NumPy ufuncs over the whole
+batch, and string subtrees with list comprehension kernels over whole columns (one per
+op, specialized for constant args such as format strings, delimiters and slice
+bounds). Anything that can't be vectorized exactly (proc nodes, sequence args,
+non-numeric columns, division by zero, mistyped string args, ...) falls back to
+per-row evaluation of just that subtree, as do conditionals, so each row only
+evaluates the branch it takes.
+
+Vectorized results equal what {Node.reduce} returns row by row, up to NumPy dtypes:
+int/float results come back as int64/float64 arrays, everything else as an object
+array. Integer arithmetic that could overflow int64, or lose exactness when converted
+to float64 (division and means of integers beyond 2**53), is evaluated per row, as
+are means of more than two operands any of which is a float (which {sum} compensates
+since Python 3.12), and round with ndigits rounds each element as Python does. NaN
+propagation through min/max follows NumPy. String results are identical: the values
+string kernels read are never narrowed to NumPy dtypes.
+"""
+from __future__ import annotations
+
+from datetime import date
+from functools import reduce
+from typing import TYPE_CHECKING, Any, Iterable, Iterator, Mapping, Sequence, TypeAlias
+
+from .analysis import Dependencies, dependencies
+from .base_node import BaseNode
+from .compiler import compile_node
+from .ir import Apply
+from .kernels import strftime, template
+from .node import Node
+from .subnodes import NumberNode, StringNode, VariableNode
+from .types import LiteralNode, Procs, Reduced
+
+if TYPE_CHECKING:
+    import numpy as np
+
+Columns: TypeAlias = Mapping[str, Sequence[Any]]
+"""Batch of rows as columns (sequences or arrays) keyed by variable."""
+
+
+def _numpy():
+    try:
+        import numpy
+    except ImportError as e:  # pragma: no cover
+        raise ImportError("batched reduction requires numpy (algencode[numpy])") from e
+    return numpy
+
+
+def reduce_many(
+    n: LiteralNode | Node,
+    columns: Columns,
+    procs: Procs | None = None,
+) -> np.ndarray:
+    """Reduce a node over every row of a batch of columns.
+
+    Only the columns the node can read (see {required_keys}) are converted or looked at.
+    """
+    return _Batch(columns, procs, dependencies(n, procs)).reduce(n)
+
+
+class _Row(Mapping[str, Reduced]):
+    """Vals view of a single row of a batch."""
+
+    __slots__ = ("batch", "i")
+
+    def __init__(self, batch: _Batch, i: int):
+        self.batch = batch
+        self.i = i
+
+    def __getitem__(self, key: str) -> Reduced:
+        return self.batch.column(key)[self.i]
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.batch.columns)
+
+    def __len__(self) -> int:
+        return len(self.batch.columns)
+
+
+class _Batch:
+    """Evaluation state of one {reduce_many} call."""
+
+    def __init__(self, columns: Columns, procs: Procs | None, deps: Dependencies):
+        self.np = _numpy()
+        self.procs = procs
+        lengths = {len(c) for c in columns.values()}
+        if len(lengths) != 1:
+            raise ValueError(f"expected columns of one equal length, found {lengths}")
+        (self.length,) = lengths
+        if not deps.missing:
+            columns = {k: columns[k] for k in deps.keys if k in columns}
+        self.columns = columns
+        self._lists: dict[str, Sequence[Reduced]] = {}
+        self._arrays: dict[str, np.ndarray | None] = {}
+
+    def column(self, key: str) -> Sequence[Reduced]:
+        """Column as a sequence of Python values (for per-row evaluation)."""
+        try:
+            return self._lists[key]
+        except KeyError:
+            pass
+        col = self.columns[key]
+        if isinstance(col, self.np.ndarray):
+            col = col.tolist()
+        self._lists[key] = col
+        return col
+
+    def array(self, key: str) -> np.ndarray | None:
+        """Column as a numeric array, or None if it isn't one."""
+        try:
+            return self._arrays[key]
+        except KeyError:
+            pass
+        arr = None
+        if key in self.columns:
+            arr = self._numeric(self.np.asarray(self.columns[key]))
+        self._arrays[key] = arr
+        return arr
+
+    def _numeric(self, arr: np.ndarray) -> np.ndarray | None:
+        """Array as int64 or float64 (as Python ints and floats compute), or None."""
+        np = self.np
+        match arr.dtype.kind:
+            case "i":
+                return arr.astype(np.int64, copy=False)
+            case "u" if not arr.size or arr.max() < 2**63:
+                return arr.astype(np.int64)
+            case "f" if arr.dtype.itemsize <= 8:
+                return arr.astype(np.float64, copy=False)
+        return None
+
+    def reduce(self, n: LiteralNode | Node) -> np.ndarray:
+        """Reduce a node over the whole batch."""
+        res = self._vectorized(n)
+        if res is None:
+            return self._per_row(n)
+        return self.np.broadcast_to(res, (self.length,)).copy()
+
+    def _vectorized(self, n: LiteralNode | Node) -> np.ndarray | None:
+        """Vectorized reduction, or None if {n} can't be vectorized exactly."""
+        r = n.root if isinstance(n, Node) else n
+        match r:
+            case bool() | None:
+                return None
+            case int() | float():
+                return self._numeric(self.np.asarray(r))
+            case BaseNode() if r.debug is not None and r.debug.root is not False:
+                return self._per_row(r)
+            case VariableNode():
+                arr = self.array(r.key)
+                return arr if arr is not None else self._per_row(r)
+            case NumberNode() if not isinstance(r.args, VariableNode):
+                res = self._number(r)
+                return res if res is not None else self._per_row(r)
+            case StringNode():
+                strings = self._string(r)
+                return self._per_row(r) if strings is None else self._objects(strings)
+            case BaseNode():
+                return self._per_row(r)
+        return None
+
+    def _number(self, n: NumberNode) -> np.ndarray | None:
+        np = self.np
+        assert not isinstance(n.args, VariableNode)
+        if n.op == "len":
+            return np.asarray(len(n.args))
+        args = [self._vectorized(a) for a in n.args]
+        if not args or any(a is None or a.dtype.kind not in "iuf" for a in args):
+            return None
+        match n.op, args:
+            case ("add" | "sub" | "mul" | "min" | "max"), _:
+                f = getattr(np, _UFUNCS[n.op])
+            case ("div" | "mod"), _:
+                if any((a == 0).any() for a in args[1:]):
+                    return None
+                f = getattr(np, _UFUNCS[n.op])
+            case "mean", _:
+                # Python 3.12+ sums floats compensated, which pairwise adds only match
+                # for up to two operands.
+                if len(args) > 2 and any(a.dtype.kind == "f" for a in args):
+                    return None
+                total = self._fold(np.add, "add", args)
+                if total is None or not _exact_float(total, 2**53):
+                    return None
+                return total / len(args)
+            case "round", [x]:
+                return self._round(x)
+            case "round", [x, ndigits]:
+                if ndigits.ndim or ndigits.dtype.kind != "i":
+                    return None
+                # NumPy rounds the scaled float (e.g. 2.675 to 2.68), Python exactly.
+                nd = int(ndigits)
+                return self._narrow([round(v, nd) for v in x.ravel().tolist()])
+            case _:
+                return None
+        return self._fold(f, n.op, args)
+
+    def _fold(self, f: Any, op: str, args: list[np.ndarray]) -> np.ndarray | None:
+        """Fold args with a ufunc, or None if a step could differ from Python's."""
+        res = args[0]
+        for a in args[1:]:
+            if not _exact(op, res, a):
+                return None
+            res = f(res, a)
+        return res
+
+    def _round(self, x: np.ndarray) -> np.ndarray | None:
+        if x.dtype.kind != "f":
+            return x
+        if not self.np.isfinite(x).all():
+            return None
+        rounded = self.np.rint(x)
+        if (self.np.abs(rounded) >= 2**63).any():
+            return None
+        return rounded.astype(self.np.int64)
+
+    def _string(self, n: StringNode) -> list[str] | None:
+        """String kernel results, or None if arity is malformed.
+
+        Each arg is type checked as soon as it's produced. If one is mistyped in some
+        row, the node is reduced row by row (reusing the args produced), raising what
+        {Node.reduce} raises first.
+        """
+        if (a := Apply.of(n)) is None:
+            return None
+        args: list[_Const | Sequence[Reduced]] = []
+        for x, c in zip(n.args, a.checks):
+            args.append(arg := self._operand(x))
+            if c is not None and not _typed(arg, c.type):
+                return self._string_rows(n, a, args)
+        length = self.length
+        match n.op, args:
+            case "slice", [s, *bounds]:
+                if len(bounds) == 1:
+                    bounds.insert(0, _Const(None))
+                if all(isinstance(b, _Const) for b in bounds):
+                    sl = slice(*[b.value for b in bounds])  # type: ignore
+                    return [x[sl] for x in _rows(s, length)]
+                cols = [_rows(b, length) for b in bounds]
+                return [x[slice(*b)] for x, *b in zip(_rows(s, length), *cols)]
+            case "rep", [s, count]:
+                if isinstance(count, _Const):
+                    k = count.value
+                    return [x * k for x in _rows(s, length)]
+                return [x * k for x, k in zip(_rows(s, length), count)]
+            case "join", [delim, *parts]:
+                rows = _tuples([_rows(p, length) for p in parts], length)
+                if isinstance(delim, _Const):
+                    return list(map(delim.value.join, rows))  # type: ignore
+                return [d.join(p) for d, p in zip(delim, rows)]
+            case "fmt", [fmt, *values]:
+                rows = _tuples([_rows(v, length) for v in values], length)
+                if isinstance(fmt, _Const):
+                    return list(map(template(fmt.value), rows))  # type: ignore
+                return [template(f)(v) for f, v in zip(fmt, rows)]
+            case "date", [fmt, d]:
+                if isinstance(fmt, _Const):
+                    f = fmt.value
+                    return [strftime(x, f) for x in _rows(d, length)]  # type: ignore
+                dates = _rows(d, length)
+                return [strftime(x, f) for f, x in zip(fmt, dates)]  # type: ignore
+        return None
+
+    def _string_rows(
+        self, n: StringNode, a: Apply, args: list[_Const | Sequence[Reduced]]
+    ) -> list[str]:
+        """Reduce a string node row by row, given the per-row values of its first args."""
+        length, procs = self.length, self.procs
+        cols = [_rows(arg, length) for arg in args]
+        rest = [
+            x.compile() if isinstance(x, Node) else compile_node(x)
+            for x in n.args[len(cols) :]
+        ]
+        res = []
+        for i in range(length):
+            row = _Row(self, i)
+            values = []
+            for j, c in enumerate(a.checks):
+                v = cols[j][i] if j < len(cols) else rest[j - len(cols)](row, procs)
+                values.append(v if c is None else c(v))
+            res.append(a(values))
+        return res  # type: ignore
+
+    def _operand(self, n: LiteralNode | Node) -> _Const | Sequence[Reduced]:
+        """Literal, or per-row values of a string kernel argument."""
+        r = n.root if isinstance(n, Node) else n
+        if not isinstance(r, BaseNode):
+            return _Const(r)
+        if r.debug is None or r.debug.root is False:
+            match r:
+                case VariableNode():
+                    if r.key in self.columns:
+                        return self.column(r.key)
+                case StringNode():
+                    if (strings := self._string(r)) is not None:
+                        return strings
+        # Per row, keeping Python types (rather than narrowing to a NumPy dtype).
+        return self._rows(r)
+
+    def _per_row(self, n: LiteralNode | Node | BaseNode) -> np.ndarray:
+        """Reduce a (sub)node row by row, narrowing the results to a numeric array."""
+        return self._narrow(self._rows(n))
+
+    def _rows(self, n: LiteralNode | Node | BaseNode) -> list[Reduced]:
+        """Reduce a (sub)node row by row."""
+        f = n.compile() if isinstance(n, Node) else compile_node(n)  # type: ignore
+        procs = self.procs
+        return [f(_Row(self, i), procs) for i in range(self.length)]
+
+    def _objects(self, values: list[Reduced]) -> np.ndarray:
+        arr = self.np.empty(len(values), dtype=object)
+        arr[:] = values
+        return arr
+
+    def _narrow(self, values: list[Reduced]) -> np.ndarray:
+        np = self.np
+        types = set(map(type, values))
+        if types and types <= {int, float}:
+            try:
+                dtype = np.int64 if types == {int} else np.float64
+                return np.asarray(values, dtype=dtype)
+            except OverflowError:
+                pass
+        return self._objects(values)
+
+
+def _bound(x: np.ndarray) -> int:
+    """Largest magnitude in an int64 array."""
+    return max(int(x.max()), -int(x.min())) if x.size else 0
+
+
+def _exact_float(x: np.ndarray, limit: int) -> bool:
+    """Whether an array is float, or ints converting to float64 exactly."""
+    return x.dtype.kind == "f" or _bound(x) <= limit
+
+
+def _exact(op: str, x: np.ndarray, y: np.ndarray) -> bool:
+    """Whether an int64 ufunc step gives what Python gives on the same values.
+
+    Steps involving floats convert ints to float64 as Python does. Integer steps must
+    not overflow int64, and true division must convert both operands exactly.
+    """
+    if x.dtype.kind == "f" or y.dtype.kind == "f":
+        return True
+    match op:
+        case "add" | "sub":
+            return _bound(x) + _bound(y) < 2**63
+        case "mul":
+            return _bound(x) * _bound(y) < 2**63
+        case "div":
+            return _bound(x) <= 2**53 and _bound(y) <= 2**53
+    return True
+
+
+class _Const:
+    """Literal string kernel argument (the same for every row)."""
+
+    __slots__ = ("value",)
+
+    def __init__(self, value: LiteralNode):
+        self.value = value
+
+
+def _rows(a: _Const | Sequence[Reduced], length: int) -> Sequence[Reduced]:
+    """Per-row values of a string kernel argument."""
+    return [a.value] * length if isinstance(a, _Const) else a
+
+
+def _typed(a: _Const | Sequence[Reduced], t: Any) -> bool:
+    """Whether an argument has the type {reduce_node_to} would check, in every row."""
+    if isinstance(a, _Const):
+        return isinstance(a.value, t)
+    return all(issubclass(c, t) for c in set(map(type, a)))
+
+
+def _tuples(cols: list[Sequence[Reduced]], length: int) -> Iterable[tuple[Any, ...]]:
+    """Per-row tuples of the values of columns."""
+    return zip(*cols) if cols else [()] * length
+
+
+_UFUNCS = {
+    "add": "add",
+    "sub": "subtract",
+    "mul": "multiply",
+    "mod": "mod",
+    "div": "true_divide",
+    "min": "minimum",
+    "max": "maximum",
+}
@@ -0,0 +1 @@
+"""Algencode benchmarks."""
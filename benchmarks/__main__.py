@@ -0,0 +1,43 @@
+"""Run the benchmark suite, writing machine-readable JSON results.
+
+```sh
+python -m benchmarks -o before.json
+python -m benchmarks -o after.json --baseline before.json
+```
+"""
+from __future__ import annotations
+
+import argparse
+import json
+
+from .common import load_baseline, run_all
+from .suite import GROUPS
+
+
+def main():
+    """Run benchmark suite."""
+    parser = argparse.ArgumentParser(prog="python -m benchmarks", description=__doc__)
+    parser.add_argument("groups", nargs="*", help=f"groups to run {list(GROUPS)}")
+    parser.add_argument("-o", "--output", help="write JSON results to this file")
+    parser.add_argument("-b", "--baseline", help="compare to JSON results of a past run")
+    parser.add_argument("-r", "--repeat", type=int, default=5, help="timing runs")
+    parser.add_argument("-k", "--filter", default="", help="only run ids containing this")
+    args = parser.parse_args()
+    if unknown := set(args.groups) - set(GROUPS):
+        parser.error(f"unknown groups {sorted(unknown)}")
+
+    benchmarks = [
+        b
+        for g in args.groups or GROUPS
+        for b in GROUPS[g]()
+        if args.filter in b.id
+    ]
+    baseline = load_baseline(args.baseline) if args.baseline else None
+    results = run_all(benchmarks, repeat=args.repeat, baseline=baseline)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
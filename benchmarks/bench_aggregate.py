@@ -0,0 +1,52 @@
+"""Grouped aggregates versus a hand-written loop over compiled nodes.
+
+The loop sums in the default (rounding) decimal context, aggregates sum exactly.
+
+Run with {python -m benchmarks.bench_aggregate}.
+"""
+from __future__ import annotations
+
+from decimal import Decimal
+
+from algencode import Node
+from algencode.aggregate import Aggregate, aggregate
+
+from .common import measure, report
+
+ROWS = [
+    {"tax": Decimal(i % 997) / 4, "levy": Decimal(2), "roll code": f"R{i % 50}"}
+    for i in range(20_000)
+]
+LEVY = Node.model_validate({"op": "mul", "args": [{"key": "tax"}, {"key": "levy"}]})
+
+
+def by_hand() -> dict[str, list]:
+    """Total levy and parcel count per roll code, as written today."""
+    f = LEVY.compile()
+    totals: dict[str, list] = {}
+    for r in ROWS:
+        if (t := totals.get(r["roll code"])) is None:
+            t = totals[r["roll code"]] = [Decimal(0), 0]
+        t[0] += f(r, None)
+        t[1] += 1
+    return totals
+
+
+def main():
+    """Run benchmark."""
+    aggregates = {"levy": Aggregate("sum", LEVY), "parcels": Aggregate("count")}
+    res = aggregate(aggregates, ROWS, by=["roll code"])
+    assert {g["roll code"]: [g["levy"], g["parcels"]] for g in res} == by_hand()
+    print(f"{len(ROWS)} rows, {len(res)} groups")
+
+    loop = measure(by_hand, repeat=3)
+    report("hand-written loop", loop)
+    report(
+        "aggregate(sum, count)",
+        measure(lambda: aggregate(aggregates, ROWS, by=["roll code"]), repeat=3),
+        loop,
+    )
+
+
+if __name__ == "__main__":
+    main()
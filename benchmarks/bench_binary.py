@@ -0,0 +1,57 @@
+"""Binary versus JSON node serialization: size and decode speed.
+
+Run with {python -m benchmarks.bench_binary}.
+"""
+from __future__ import annotations
+
+import json
+
+from algencode import Node
+from algencode.binary import procs_from_bytes, procs_to_bytes
+
+from .bench_compile import FORMULA, SHARED
+from .common import measure, report
+
+PROCS = 100
+
+
+def proc(i: int) -> Node:
+    """A stored proc, a mix of the benchmark formulas."""
+    return Node.model_validate(
+        {
+            "op": "add",
+            "args": [
+                FORMULA["args"][1],
+                SHARED,
+                {"op": "mul", "args": [{"key": f"rate{i % 50}"}, 0.0125]},
+            ],
+        }
+    )
+
+
+def main():
+    """Run benchmark."""
+    n = Node.model_validate(SHARED)
+    data = n.to_bytes()
+    text = n.model_dump_json()
+    print(f"{'node size':<40} {len(data):>10} B  (json {len(text)} B)")
+    assert Node.from_bytes(data) == Node.model_validate_json(text)
+    json_t = measure(lambda: Node.model_validate_json(text))
+    report("node model_validate_json", json_t)
+    report("node from_bytes", measure(lambda: Node.from_bytes(data)), json_t)
+
+    procs = {f"proc{i}": proc(i) for i in range(PROCS)}
+    data = procs_to_bytes(procs)
+    text = json.dumps({k: p.model_dump(mode="json") for k, p in procs.items()})
+    print(f"{f'{PROCS} procs size':<40} {len(data):>10} B  (json {len(text)} B)")
+
+    def from_json():
+        return {k: Node.model_validate(v) for k, v in json.loads(text).items()}
+
+    json_t = measure(from_json, repeat=3, min_time=0)
+    report(f"{PROCS} procs json", json_t)
+    report(f"{PROCS} procs from bytes", measure(lambda: procs_from_bytes(data)), json_t)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+"""Compiled versus tree-walking node reduction.
+
+Run with {python -m benchmarks.bench_compile}.
+"""
+from __future__ import annotations
+
+from algencode import Node
+from algencode.cse import analyze
+
+from .common import measure, report
+
+FORMULA = {
+    "op": "fmt",
+    "args": [
+        "{:>09}",
+        {
+            "op": "round",
+            "args": [
+                {
+                    "op": "mul",
+                    "args": [
+                        {"op": "add", "args": [{"key": "tax"}, {"key": "fee"}, 1]},
+                        {"proc": "rate"},
+                        100,
+                    ],
+                },
+            ],
+        },
+    ],
+}
+SHARED = {
+    "op": "div",
+    "args": [
+        {"op": "add", "args": [FORMULA["args"][1], 1]},
+        {"op": "sub", "args": [FORMULA["args"][1], {"key": "fee"}]},
+    ],
+}
+PROCS = {"rate": Node.model_validate({"op": "div", "args": [{"key": "levy"}, 12]})}
+SCHEMA = {"tax": float, "fee": int, "levy": int}
+VALS = {"tax": 1442.56, "fee": 12, "levy": 3, **{f"col{i}": i for i in range(40)}}
+
+
+def main():
+    """Run benchmark."""
+    n = Node.model_validate(FORMULA)
+    f = n.compile()
+    assert f(VALS, PROCS) == n.reduce(VALS, PROCS)
+    walk = measure(lambda: n.reduce(VALS, PROCS))
+    report("reduce (tree walk)", walk)
+    compiled = measure(lambda: f(VALS, PROCS))
+    report("compile()(vals, procs)", compiled, walk)
+    typed = n.compile(schema=SCHEMA)
+    assert typed(VALS, PROCS) == f(VALS, PROCS)
+    report("compile(schema)(vals, procs)", measure(lambda: typed(VALS, PROCS)), compiled)
+    program = n.lower()
+    assert program(VALS, PROCS) == n.reduce(VALS, PROCS)
+    report("lower()(vals, procs)", measure(lambda: program(VALS, PROCS)), walk)
+
+    n = Node.model_validate(SHARED)
+    f, g = n.compile(), n.compile(cse=True)
+    print(f"shared subtree, {analyze(n).stats}")
+    compiled = measure(lambda: f(VALS, PROCS))
+    report("compile()(vals, procs)", compiled)
+    report("compile(cse=True)(vals, procs)", measure(lambda: g(VALS, PROCS)), compiled)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+"""Import time against a budget, measured with {python -X importtime}.
+
+Run with {python -m benchmarks.bench_import}, which exits with status 1 if any
+statement is over budget.
+"""
+from __future__ import annotations
+
+import subprocess
+import sys
+
+REPEAT = 5
+
+BUDGETS_US = {
+    "import algencode": 50_000,
+    "from algencode import Node": 300_000,
+}
+"""Import time budget (best of {REPEAT} runs) in microseconds, by statement."""
+
+
+def import_time(statement: str) -> int:
+    """Microseconds spent importing modules in a fresh interpreter running {statement}.
+
+    Modules imported by the interpreter's own startup aren't counted.
+    """
+    startup = len(_importtime("pass"))
+    return sum(
+        int(cumulative)
+        for _, cumulative, name in _importtime(statement)[startup:]
+        if not name.startswith("  ")
+    )
+
+
+def _importtime(statement: str) -> list[tuple[str, str, str]]:
+    res = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", statement],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    lines = [line for line in res.stderr.splitlines() if line.startswith("import time:")]
+    # "import time: self [us] | cumulative | imported package", nested imports indented.
+    fields = [line.removeprefix("import time:").split("|") for line in lines[1:]]
+    return [(s.strip(), c.strip(), name[1:]) for s, c, name in fields]
+
+
+def main():
+    """Run benchmark."""
+    over = False
+    for statement, budget in BUDGETS_US.items():
+        t = min(import_time(statement) for _ in range(REPEAT))
+        status = "ok" if t <= budget else "OVER BUDGET"
+        over |= t > budget
+        budget_ms = f"({budget / 1e3:.0f} ms budget)"
+        print(f"{statement:<30} {t / 1e3:>8.1f} ms  {budget_ms} {status}")
+    sys.exit(over)
+
+
+if __name__ == "__main__":
+    main()
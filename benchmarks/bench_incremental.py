@@ -0,0 +1,40 @@
+"""Incremental re-evaluation versus a full reduce after changing one val.
+
+Run with {python -m benchmarks.bench_incremental}.
+"""
+from __future__ import annotations
+
+from algencode import Node
+from algencode.incremental import Incremental
+
+from .common import measure, report
+
+TERMS = 500
+
+
+def main():
+    """Run benchmark."""
+    n = Node.model_validate(
+        {
+            "op": "add",
+            "args": [
+                {"op": "mul", "args": [{"key": f"x{i}"}, {"key": "rate"}, i]}
+                for i in range(TERMS)
+            ]
+            + [{"op": "round", "args": [{"key": "adjust"}, 2]}],
+        }
+    )
+    vals = {f"x{i}": i / 7 for i in range(TERMS)} | {"rate": 0.0125, "adjust": 1.0}
+    inc = Incremental(n, vals)
+    assert inc.value == n.reduce(vals)
+    print(f"{TERMS} terms, {len(inc)} cells")
+
+    full = measure(lambda: n.reduce(vals))
+    report("reduce", full)
+    i = iter(range(10**9))
+    report("update (one term)", measure(lambda: inc.update({"x1": next(i)})), full)
+    report("update (every term)", measure(lambda: inc.update({"rate": next(i)})), full)
+
+
+if __name__ == "__main__":
+    main()
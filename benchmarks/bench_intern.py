@@ -0,0 +1,80 @@
+"""Memory of a proc library parsed plainly versus through an intern table.
+
+Run with {python -m benchmarks.bench_intern}.
+"""
+from __future__ import annotations
+
+import gc
+import random
+import tracemalloc
+from typing import Callable
+
+from algencode import InternTable, Node
+from algencode.types import Json
+
+from .common import measure, report
+
+SIZE = 2000
+
+
+def library(size: int = SIZE, seed: int = 0) -> list[Json]:
+    """Formulas built from a small pool of shared subformulas, as proc libraries are."""
+    rng = random.Random(seed)
+    keys = [{"key": f"col{i}"} for i in range(20)]
+    terms: list[Json] = [
+        {"op": op, "args": [rng.choice(keys), rng.choice(keys), rng.randint(1, 9)]}
+        for op in ("add", "sub", "mul")
+        for _ in range(10)
+    ]
+    rates: list[Json] = [
+        {"op": "round", "args": [{"op": "div", "args": [t, 12]}, 2]} for t in terms
+    ]
+    return [
+        {
+            "op": "fmt",
+            "args": [
+                "{:>09}-{}",
+                {"op": "add", "args": [rng.choice(rates), rng.choice(rates), i % 50]},
+                {"op": "slice", "args": [{"key": "code"}, 0, rng.randint(2, 6)]},
+            ],
+        }
+        for i in range(size)
+    ]
+
+
+def retained(build: Callable[[], object]) -> int:
+    """Bytes still allocated by what {build} returns, once garbage is collected."""
+    gc.collect()
+    tracemalloc.start()
+    try:
+        res = build()
+        gc.collect()
+        size, _ = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    del res
+    return size
+
+
+def main():
+    """Run benchmark."""
+    docs = library()
+    Node.model_validate(docs[0])  # build the schemas outside the measurements
+    plain = retained(lambda: [Node.model_validate(d) for d in docs])
+    table = InternTable()
+    interned = retained(lambda: (table, [table.intern(d) for d in docs]))
+    print(f"{SIZE} formulas, {table.stats()}")
+    print(f"plain      {plain / 1024:>10.1f} KiB  {plain / SIZE:>8.0f} B/formula")
+    print(
+        f"interned   {interned / 1024:>10.1f} KiB  {interned / SIZE:>8.0f} B/formula"
+        f"  ({plain / interned:.1f}x smaller)"
+    )
+
+    doc = docs[0]
+    parse = measure(lambda: Node.model_validate(doc))
+    report("Node.model_validate", parse)
+    report("InternTable.intern (held)", measure(lambda: table.intern(doc)), parse)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,49 @@
+"""Multi-process evaluation scaling from 1 to N workers.
+
+Run with {python -m benchmarks.bench_parallel}.
+"""
+from __future__ import annotations
+
+import os
+import random
+import time
+
+from algencode import Node
+from algencode.parallel import evaluate
+
+from .bench_compile import FORMULA, PROCS
+
+ROWS = 200_000
+
+
+def main():
+    """Run benchmark."""
+    rng = random.Random(0)
+    rows = [
+        {"tax": round(rng.uniform(100, 5000), 2), "fee": rng.randrange(50), "levy": 3}
+        for _ in range(ROWS)
+    ]
+    n = Node.model_validate(FORMULA)
+    f = n.compile()
+
+    start = time.perf_counter()
+    for r in rows:
+        f(r, PROCS)
+    serial = time.perf_counter() - start
+    print(f"{'in process':<12} {serial:>8.3f} s  {ROWS / serial:>12,.0f} rows/s")
+
+    workers = 1
+    while workers <= (os.cpu_count() or 1):
+        start = time.perf_counter()
+        for _ in evaluate(n, rows, PROCS, workers=workers, chunk_size=4096):
+            pass
+        t = time.perf_counter() - start
+        print(
+            f"{workers:>2} workers   {t:>8.3f} s  {ROWS / t:>12,.0f} rows/s"
+            f"  ({serial / t:.1f}x)"
+        )
+        workers *= 2
+
+
+if __name__ == "__main__":
+    main()
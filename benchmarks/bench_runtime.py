@@ -0,0 +1,53 @@
+"""Memory per node and reduction time of runtime nodes versus node models.
+
+Run with {python -m benchmarks.bench_runtime}.
+"""
+from __future__ import annotations
+
+from algencode import Node
+from algencode.base_node import BaseNode
+from algencode.runtime import to_runtime
+
+from .bench_compile import FORMULA, PROCS, VALS
+from .bench_intern import library, retained
+from .common import measure, report
+
+
+def count(n: object) -> int:
+    """Number of subnodes of a node model."""
+    match n:
+        case Node():
+            return count(n.root)
+        case BaseNode():
+            return 1 + count(getattr(n, "args", None))
+        case tuple():
+            return sum(map(count, n))
+    return 0
+
+
+def main():
+    """Run benchmark."""
+    docs = library()
+    models = [Node.model_validate(d) for d in docs]
+    subnodes = sum(count(n) for n in models)
+    held = retained(lambda: [Node.model_validate(d) for d in docs])
+    # Literal args are the models' own objects, so runtime nodes don't count them.
+    slim = retained(lambda: [to_runtime(n) for n in models])
+    print(f"{len(docs)} formulas, {subnodes} subnodes")
+    print(f"models     {held / 1024:>10.1f} KiB  {held / subnodes:>8.0f} B/node")
+    print(
+        f"runtime    {slim / 1024:>10.1f} KiB  {slim / subnodes:>8.0f} B/node"
+        f"  ({held / slim:.1f}x smaller)"
+    )
+
+    n = Node.model_validate(FORMULA)
+    r = to_runtime(n)
+    assert r.reduce(VALS, PROCS) == n.reduce(VALS, PROCS)  # type: ignore
+    walk = measure(lambda: n.reduce(VALS, PROCS))
+    report("Node.reduce", walk)
+    runtime = measure(lambda: r.reduce(VALS, PROCS))  # type: ignore
+    report("RuntimeNode.reduce", runtime, walk)
+
+
+if __name__ == "__main__":
+    main()
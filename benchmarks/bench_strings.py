@@ -0,0 +1,81 @@
+"""Formatting APN and roll code strings over many rows.
+
+Compares precompiled string kernels (templates and memoized strftime, see
+{algencode.kernels}) with what they replace, per call of {str.format} and
+{date.strftime}, then times whole nodes over the rows.
+
+Run with {python -m benchmarks.bench_strings}.
+"""
+from __future__ import annotations
+
+import random
+from datetime import date
+
+from algencode import Node
+from algencode.kernels import strftime, template
+
+from .common import measure, report
+
+ROWS = 100_000
+
+APN = {
+    "op": "fmt",
+    "args": [
+        "{}-{}-{}",
+        {"op": "slice", "args": [{"key": "apn"}, 0, 3]},
+        {"op": "slice", "args": [{"key": "apn"}, 3, 6]},
+        {"op": "slice", "args": [{"key": "apn"}, 6, 9]},
+    ],
+}
+ROLL_CODE = {
+    "op": "join",
+    "args": [
+        "|",
+        {"op": "fmt", "args": ["{:>05}-{}", {"key": "fund"}, {"key": "code"}]},
+        {"op": "date", "args": ["FY%Y", {"key": "due"}]},
+    ],
+}
+
+
+def rows() -> list[dict]:
+    """Rows of a county file: unique APNs, a few funds, codes and due dates."""
+    rng = random.Random(0)
+    return [
+        {
+            "apn": f"{rng.randrange(10**12):012}",
+            "fund": rng.choice([91750, 91760, 3203]),
+            "code": rng.choice(["I-CFD04-1", "I-CFD04-2", "S-LMD-9"]),
+            "due": date(rng.choice([2021, 2022]), rng.choice([4, 12]), 10),
+        }
+        for _ in range(ROWS)
+    ]
+
+
+def main():
+    """Run benchmark."""
+    data = rows()
+    print(f"{ROWS} rows")
+    parts = [[r["apn"][:3], r["apn"][3:6], r["apn"][6:9]] for r in data]
+    t = template("{}-{}-{}")
+    fmt = measure(lambda: ["{}-{}-{}".format(*p) for p in parts], repeat=3)
+    report("APN str.format", fmt)
+    report("APN template", measure(lambda: [t(p) for p in parts], repeat=3), fmt)
+    dates = [r["due"] for r in data]
+    per_call = measure(lambda: [d.strftime("FY%Y") for d in dates], repeat=3)
+    report("roll code date.strftime", per_call)
+    memo = measure(lambda: [strftime(d, "FY%Y") for d in dates], repeat=3)
+    report("roll code memoized strftime", memo, per_call)
+
+    for name, obj in [("APN", APN), ("roll code", ROLL_CODE)]:
+        n = Node.model_validate(obj)
+        f = n.compile()
+        program = n.lower()
+        walk = measure(lambda: [n.reduce(r) for r in data], repeat=1)
+        report(f"{name} reduce", walk)
+        compiled = measure(lambda: [f(r, None) for r in data], repeat=3)
+        report(f"{name} compile()", compiled, walk)
+        report(f"{name} lower()", measure(lambda: [program(r) for r in data]), walk)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""Batched (vectorized) versus per-row compiled reduction.
+
+Times a numeric formula over {ROWS} rows, and string formulas (zero-padded APNs and
+roll codes, see {algencode.kernels}) over {STRING_ROWS} row columns.
+
+Run with {python -m benchmarks.bench_vectorize}.
+"""
+from __future__ import annotations
+
+import random
+from datetime import date
+
+from algencode import Node
+
+from .common import measure, report
+
+ROWS = 100_000
+FORMULA = {
+    "op": "round",
+    "args": [
+        {
+            "op": "mul",
+            "args": [{"op": "add", "args": [{"key": "tax"}, {"key": "fee"}]}, 1.0125],
+        },
+        2,
+    ],
+}
+STRING_ROWS = 1_000_000
+STRINGS = {
+    "APN": {
+        "op": "join",
+        "args": [
+            "-",
+            {"op": "slice", "args": [{"key": "apn"}, 0, 3]},
+            {"op": "slice", "args": [{"key": "apn"}, 3, 6]},
+            {
+                "op": "fmt",
+                "args": ["{:>03}", {"op": "slice", "args": [{"key": "apn"}, 7]}],
+            },
+        ],
+    },
+    "roll code": {
+        "op": "fmt",
+        "args": [
+            "{:>05}-{}|{}",
+            {"key": "fund"},
+            {"key": "code"},
+            {"op": "date", "args": ["FY%Y", {"key": "due"}]},
+        ],
+    },
+}
+
+
+def strings():
+    """Time string formulas over {STRING_ROWS} rows."""
+    rng = random.Random(0)
+    columns = {
+        "apn": [f"{rng.randrange(10**12):012}" for _ in range(STRING_ROWS)],
+        "fund": [rng.choice([91750, 91760, 3203]) for _ in range(STRING_ROWS)],
+        "code": [rng.choice(["I-CFD04-1", "S-LMD-9"]) for _ in range(STRING_ROWS)],
+        "due": [date(rng.choice([2021, 2022]), 12, 10) for _ in range(STRING_ROWS)],
+    }
+    rows = [dict(zip(columns, r)) for r in zip(*columns.values())]
+    for name, obj in STRINGS.items():
+        n = Node.model_validate(obj)
+        f = n.compile()
+        per_row = measure(lambda: [f(r, None) for r in rows], repeat=1)
+        report(f"{name} compiled, per row ({STRING_ROWS} rows)", per_row)
+        batched = measure(lambda: n.reduce_many(columns), repeat=1)
+        report(f"{name} reduce_many ({STRING_ROWS} rows)", batched, per_row)
+        print(f"{STRING_ROWS / batched:,.0f} rows/s")
+
+
+def main():
+    """Run benchmark."""
+    rng = random.Random(0)
+    columns = {
+        "tax": [round(rng.uniform(100, 5000), 2) for _ in range(ROWS)],
+        "fee": [rng.randrange(0, 50) for _ in range(ROWS)],
+    }
+    n = Node.model_validate(FORMULA)
+    f = n.compile()
+    rows = [dict(zip(columns, r)) for r in zip(*columns.values())]
+
+    per_row = measure(lambda: [f(r, None) for r in rows], repeat=3)
+    report(f"compiled, per row ({ROWS} rows)", per_row)
+    batched = measure(lambda: n.reduce_many(columns), repeat=3)
+    report(f"reduce_many ({ROWS} rows)", batched, per_row)
+    print(f"{ROWS / batched:,.0f} rows/s")
+    strings()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+"""Common benchmark utilities."""
+from __future__ import annotations
+
+import json
+import platform
+import statistics
+import time
+import timeit
+from dataclasses import dataclass
+from importlib import metadata
+from typing import Any, Callable, Iterable
+
+
+def measure(f: Callable[[], object], *, repeat: int = 5, min_time: float = 0.2) -> float:
+    """Best seconds per call of {f} over {repeat} timing runs."""
+    return min(timings(f, repeat=repeat, min_time=min_time))
+
+
+def timings(
+    f: Callable[[], object],
+    *,
+    repeat: int = 5,
+    min_time: float = 0.2,
+) -> list[float]:
+    """Seconds per call of {f} for each of {repeat} timing runs."""
+    timer = timeit.Timer(f)
+    number, _ = timer.autorange()
+    number = max(number, int(number * min_time / 0.2))
+    return [t / number for t in timer.repeat(repeat=repeat, number=number)]
+
+
+def report(name: str, seconds: float, baseline: float | None = None):
+    """Print one benchmark result line."""
+    line = f"{name:<40} {seconds * 1e6:>10.2f} us"
+    if baseline is not None:
+        line += f"  ({baseline / seconds:.1f}x)"
+    print(line)
+
+
+@dataclass
+class Benchmark:
+    """Named benchmark case."""
+
+    group: str
+    name: str
+    f: Callable[[], object]
+
+    @property
+    def id(self) -> str:
+        """Unique benchmark id."""
+        return f"{self.group}/{self.name}"
+
+    def run(self, *, repeat: int = 5, min_time: float = 0.2) -> dict[str, Any]:
+        """Run this benchmark, returning a machine-readable result."""
+        ts = timings(self.f, repeat=repeat, min_time=min_time)
+        return {
+            "id": self.id,
+            "group": self.group,
+            "name": self.name,
+            "min": min(ts),
+            "median": statistics.median(ts),
+            "max": max(ts),
+            "repeat": repeat,
+        }
+
+
+def run_all(
+    benchmarks: Iterable[Benchmark],
+    *,
+    repeat: int = 5,
+    min_time: float = 0.2,
+    baseline: dict[str, float] | None = None,
+) -> dict[str, Any]:
+    """Run benchmarks, printing each result, and return results with run metadata."""
+    results = []
+    for b in benchmarks:
+        res = b.run(repeat=repeat, min_time=min_time)
+        results.append(res)
+        report(b.id, res["min"], (baseline or {}).get(b.id))
+    return {"meta": environment(), "results": results}
+
+
+def environment() -> dict[str, Any]:
+    """Run metadata (versions and platform)."""
+
+    def version(name: str) -> str | None:
+        try:
+            return metadata.version(name)
+        except metadata.PackageNotFoundError:
+            return None
+
+    return {
+        "time": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "python": platform.python_version(),
+        "implementation": platform.python_implementation(),
+        "platform": platform.platform(),
+        "pydantic": version("pydantic"),
+        "numpy": version("numpy"),
+    }
+
+
+def load_baseline(path: str) -> dict[str, float]:
+    """Best times by benchmark id from a previous JSON results file."""
+    with open(path) as f:
+        return {r["id"]: r["min"] for r in json.load(f)["results"]}
@@ -0,0 +1,129 @@
+"""Benchmark suite covering the parse, reduce and proc hot paths."""
+from __future__ import annotations
+
+import json
+from datetime import date
+from typing import Iterator
+
+from algencode import Node
+from algencode.types import Json
+
+from .common import Benchmark
+
+SMALL: Json = {"op": "add", "args": [1, {"key": "a"}, {"key": "b"}]}
+
+
+def deep(depth: int) -> Json:
+    """Nested add chain {depth} levels deep."""
+    n: Json = {"key": "a"}
+    for i in range(depth):
+        n = {"op": "add", "args": [n, i]}
+    return n
+
+
+def wide(width: int) -> Json:
+    """Single add over {width} variable args."""
+    return {"op": "add", "args": [{"key": f"col{i % 40}"} for i in range(width)]}
+
+
+def parse() -> Iterator[Benchmark]:
+    """Node.model_validate / model_validate_json on small, deep and wide trees."""
+    trees = [
+        ("small", SMALL),
+        ("deep-8", deep(8)),
+        ("deep-64", deep(64)),
+        ("wide-1000", wide(1000)),
+    ]
+    for name, obj in trees:
+        text = json.dumps(obj)
+        yield Benchmark(
+            "parse",
+            f"model_validate/{name}",
+            lambda o=obj: Node.model_validate(o),
+        )
+        yield Benchmark(
+            "parse",
+            f"model_validate_json/{name}",
+            lambda t=text: Node.model_validate_json(t),
+        )
+
+
+def number() -> Iterator[Benchmark]:
+    """NumberNode reductions from 2 to 100k args."""
+    for count in [2, 10, 1_000, 100_000]:
+        for op in ["add", "mean"]:
+            n = Node.model_validate({"op": op, "args": list(range(1, count + 1))})
+            yield Benchmark("number", f"{op}/{count}", lambda n=n: n.reduce())
+
+
+def string() -> Iterator[Benchmark]:
+    """StringNode fmt, join and date."""
+    vals = {"apn": "044220087000", "code": "I-CFD04-1", "d": date(2021, 7, 1)}
+    cases: list[tuple[str, Json]] = [
+        (
+            "fmt",
+            {"op": "fmt", "args": ["{:>015}|{}", {"key": "apn"}, {"key": "code"}]},
+        ),
+        (
+            "join",
+            {
+                "op": "join",
+                "args": [
+                    "-",
+                    {"op": "slice", "args": [{"key": "apn"}, 0, 3]},
+                    {"op": "slice", "args": [{"key": "apn"}, 3, 6]},
+                    {"op": "slice", "args": [{"key": "apn"}, 6, 9]},
+                ],
+            },
+        ),
+        ("date", {"op": "date", "args": ["%Y-%m-%d", {"key": "d"}]}),
+    ]
+    for name, obj in cases:
+        n = Node.model_validate(obj)
+        yield Benchmark("string", name, lambda n=n: n.reduce(vals))
+
+
+def branch() -> Iterator[Benchmark]:
+    """BranchNode if, compared with computing both alternatives."""
+    tax = {"key": "tax"}
+    low = {"op": "mul", "args": [tax, 0.01]}
+    high = {"op": "round", "args": [{"op": "mul", "args": [tax, 0.02]}, 2]}
+    cases: list[tuple[str, Json]] = [
+        ("if", {"op": "if", "args": [{"op": "lt", "args": [tax, 1000]}, low, high]}),
+        ("and", {"op": "and", "args": [{"op": "ge", "args": [tax, 0]}, low, high]}),
+        ("eager", {"op": "max", "args": [low, high]}),
+    ]
+    vals = {"tax": 442.56}
+    for name, obj in cases:
+        n = Node.model_validate(obj)
+        yield Benchmark("branch", name, lambda n=n: n.reduce(vals))
+
+
+def proc() -> Iterator[Benchmark]:
+    """ProcNode with dict procs versus pre-validated procs."""
+    body: Json = {"op": "mul", "args": [{"key": "_0"}, {"op": "div", "args": [1, 12]}]}
+    n = Node.model_validate({"proc": "rate", "args": [{"key": "tax"}]})
+    vals = {"tax": 1442.56}
+    raw = {"rate": body}
+    validated = {"rate": Node.model_validate(body)}
+    yield Benchmark("proc", "dict", lambda: n.reduce(vals, raw))
+    yield Benchmark("proc", "validated", lambda: n.reduce(vals, validated))
+
+
+def variable() -> Iterator[Benchmark]:
+    """VariableNode lookups against wide vals."""
+    n = Node.model_validate({"key": "col500"})
+    for width in [10, 1_000, 100_000]:
+        vals = {f"col{i}": i for i in range(width)} | {"col500": 1}
+        yield Benchmark("variable", f"lookup/{width}", lambda v=vals: n.reduce(v))
+
+
+GROUPS = {
+    "parse": parse,
+    "number": number,
+    "string": string,
+    "branch": branch,
+    "proc": proc,
+    "variable": variable,
+}
+"""Benchmark groups by name."""
@@ -3,7 +3,13 @@
 import pytest
 
 from algencode import Node, Vals
-from algencode.subnodes import NumberNode, ProcNode, StringNode, VariableNode
+from algencode.subnodes import (
+    BranchNode,
+    NumberNode,
+    ProcNode,
+    StringNode,
+    VariableNode,
+)
 from algencode.types import Json, LiteralNode
 
 
@@ -15,6 +21,7 @@ def node_test(n: Json, v: Vals, e: str | int):
 
 
 __all__ = [
+    "BranchNode",
     "Json",
     "LiteralNode",
     "Node",
@@ -0,0 +1,144 @@
+# pylama:ignore=D103
+"""Cross-row aggregate tests."""
+import math
+import random
+from decimal import Decimal
+from fractions import Fraction
+from pathlib import Path
+
+import pytest
+
+from algencode.aggregate import Aggregate, aggregate
+
+from .common import Node
+
+CSV = """\
+apn,tax,fund,roll code
+044220087000,1610.00,91750,I-CFD04-1
+044220088000,1610.00,91750,I-CFD04-1
+044651001000,805.50,91750,I-CFD04-2
+044651002000,0.10,91760,I-CFD04-1
+"""
+
+TAX = Node.model_validate({"key": "tax"})
+LEVY = Node.model_validate({"op": "mul", "args": [{"key": "tax"}, {"proc": "rate"}]})
+PROCS = {"rate": {"op": "div", "args": [{"key": "levy"}, 100]}}
+
+
+def test_aggregate_group_by(tmp_path: Path):
+    path = tmp_path / "roll.csv"
+    path.write_text(CSV)
+    res = aggregate(
+        {
+            "tax": Aggregate("sum", TAX),
+            "mean": Aggregate("mean", TAX),
+            "min": Aggregate("min", TAX),
+            "max": Aggregate("max", TAX),
+            "parcels": Aggregate("count"),
+        },
+        path,
+        by=["roll code"],
+        converters={"tax": Decimal},
+    )
+    assert res == [
+        {
+            "roll code": "I-CFD04-1",
+            "tax": Decimal("3220.10"),
+            "mean": Decimal("3220.10") / 3,
+            "min": Decimal("0.10"),
+            "max": Decimal("1610.00"),
+            "parcels": 3,
+        },
+        {
+            "roll code": "I-CFD04-2",
+            "tax": Decimal("805.50"),
+            "mean": Decimal("805.50"),
+            "min": Decimal("805.50"),
+            "max": Decimal("805.50"),
+            "parcels": 1,
+        },
+    ]
+
+
+def test_aggregate_nodes_and_procs():
+    rows = [{"tax": i, "levy": 2, "fund": 91750 + i % 2} for i in range(10)]
+    fund = Node.model_validate({"op": "fmt", "args": ["F{}", {"key": "fund"}]})
+    res = aggregate({"levy": Aggregate("sum", LEVY)}, iter(rows), PROCS, by={"f": fund})
+    assert res == [
+        {"f": "F91750", "levy": math.fsum(LEVY.reduce(r, PROCS) for r in rows[::2])},
+        {"f": "F91751", "levy": math.fsum(LEVY.reduce(r, PROCS) for r in rows[1::2])},
+    ]
+
+
+def test_aggregate_no_groups():
+    aggregates = {
+        "sum": Aggregate("sum", TAX),
+        "mean": Aggregate("mean", TAX),
+        "max": Aggregate("max", TAX),
+        "count": Aggregate("count"),
+    }
+    empty = [{"sum": 0, "mean": None, "max": None, "count": 0}]
+    assert aggregate(aggregates, []) == empty
+    rows = [{"tax": 1}, {"tax": None}, {"tax": 4}]
+    assert aggregate(aggregates, rows) == [{"sum": 5, "mean": 2.5, "max": 4, "count": 3}]
+    counted = aggregate({"n": Aggregate("count", TAX)}, rows)
+    assert counted == [{"n": 2}]
+
+
+def test_aggregate_exact_sums():
+    rng = random.Random(0)
+    floats = [rng.uniform(-1e6, 1e6) * 10 ** rng.randint(-20, 20) for _ in range(5000)]
+    rows = [{"tax": x} for x in floats]
+    (res,) = aggregate({"tax": Aggregate("sum", TAX)}, rows)
+    assert res["tax"] == math.fsum(floats)
+    rows = [{"tax": x} for x in [1e100, 1.0, -1e100, 1e-100]]
+    assert aggregate({"tax": Aggregate("sum", TAX)}, rows) == [{"tax": 1.0}]
+    rows = [{"tax": x} for x in [1.0, math.inf, 2.0]]
+    assert aggregate({"tax": Aggregate("sum", TAX)}, rows) == [{"tax": math.inf}]
+
+    decimals = [Decimal(f"{i}.{i:02}") * Decimal(10) ** 30 for i in range(100)]
+    rows = [{"tax": x} for x in [*decimals, Decimal("0.01"), 3]]
+    (res,) = aggregate({"tax": Aggregate("sum", TAX)}, rows)
+    # 28 digit precision would round the cents off.
+    assert str(res["tax"]) == "4999500000000000000000000000000003.01"
+
+
+def test_aggregate_float_sums_match_fsum():
+    total = {"tax": Aggregate("sum", TAX)}
+    # The int part is added exactly, rather than rounded to a float first.
+    for values in [[2**53 + 1, 0.5, -(2**53)], [2**1024 - 1, -1e308, 1.0]]:
+        rows = [{"tax": x} for x in values]
+        exact = float(sum(map(Fraction, values)))
+        assert aggregate(total, rows) == [{"tax": exact}]
+    for values, error in [
+        ([math.inf, 1.0, -math.inf], ValueError),
+        ([math.inf, math.nan, -math.inf], ValueError),
+        ([1e308, 1e308], OverflowError),
+        ([2**1024, 1.0], OverflowError),
+    ]:
+        with pytest.raises(error):
+            math.fsum(values)
+        with pytest.raises(error):
+            aggregate(total, [{"tax": x} for x in values])
+    rows = [{"tax": x} for x in [math.nan, 1.0, math.inf]]
+    assert math.isnan(aggregate(total, rows)[0]["tax"])
+
+
+@pytest.mark.parametrize(
+    "rows",
+    [
+        [{"tax": 1.0}, {"tax": Decimal(1)}],
+        [{"tax": Decimal(1)}, {"tax": 1.0}],
+        [{"tax": "1"}],
+    ],
+)
+def test_aggregate_type_errors(rows: list[dict]):
+    with pytest.raises(TypeError):
+        aggregate({"tax": Aggregate("sum", TAX)}, rows)
+
+
+def test_aggregate_invalid():
+    with pytest.raises(ValueError, match="unknown"):
+        Aggregate("median", TAX)  # type: ignore
+    with pytest.raises(ValueError, match="expects a node"):
+        Aggregate("sum")
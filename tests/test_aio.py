@@ -0,0 +1,128 @@
+# pylama:ignore=D103
+"""Async evaluation tests."""
+import asyncio
+import time
+from collections import Counter
+from typing import Any
+
+import pytest
+
+from algencode.aio import resolve
+
+from .common import Json, Node
+
+LATENCY = 0.05
+
+PROCS: dict[str, Json] = {
+    "fee": {"op": "mul", "args": [{"key": "rate"}, 2]},
+    "total": {"op": "add", "args": [{"key": "a"}, {"proc": "fee"}]},
+    "double": {"op": "mul", "args": [{"key": "_0"}, 2]},
+    "missing": {"proc": "nowhere", "args": [1]},
+    "nested": {"proc": "fee"},
+}
+
+VALS = {"a": 1, "b": 2, "c": 3, "rate": 4, "xs": [1, 2, 3]}
+
+FORMULA: Json = {
+    "op": "add",
+    "args": [
+        {"op": "mul", "args": [{"key": "a"}, {"key": "b"}]},
+        {"op": "div", "args": [{"key": "c"}, 4]},
+        {"proc": "total"},
+        {"proc": "double", "args": [{"key": "b"}]},
+        {"proc": "fee"},
+        {"op": "len", "args": {"key": "xs"}},
+        {"op": "round", "args": [{"key": "c", "debug": {"key": "verbose"}}]},
+    ],
+}
+
+
+class Store:
+    """In-memory stand-in for a remote store, with latency."""
+
+    def __init__(self, data: dict[str, Any]):
+        self.data = data
+        self.fetched: Counter[str] = Counter()
+
+    async def __call__(self, key: str) -> Any:
+        self.fetched[key] += 1
+        await asyncio.sleep(LATENCY)
+        return self.data[key]
+
+
+def test_areduce():
+    n = Node.model_validate(FORMULA)
+    vals, procs = Store({**VALS, "verbose": False}), Store(PROCS)
+    t = time.perf_counter()
+    res = asyncio.run(n.areduce(vals, procs))
+    elapsed = time.perf_counter() - t
+    assert res == n.reduce({**VALS, "verbose": False}, PROCS)
+    # Each key and proc fetched once, "_0" is an arg and "_res" the debugged result.
+    keys = ["a", "b", "c", "xs", "rate", "verbose"]
+    assert vals.fetched == Counter(dict.fromkeys(keys, 1))
+    assert procs.fetched == Counter(dict.fromkeys(["total", "double", "fee"], 1))
+    # Two rounds of lookups ("rate" once "fee" arrives) rather than nine in a row.
+    serial = (sum(vals.fetched.values()) + sum(procs.fetched.values())) * LATENCY
+    assert elapsed < serial / 2
+
+
+def test_areduce_mappings():
+    n = Node.model_validate(FORMULA)
+    vals = {**VALS, "verbose": False}
+    assert asyncio.run(n.areduce(vals, PROCS)) == n.reduce(vals, PROCS)
+    store = Store(vals)
+    assert asyncio.run(n.areduce(store, PROCS)) == n.reduce(vals, PROCS)
+    assert set(store.fetched) == {"a", "b", "c", "xs", "rate", "verbose"}
+    store = Store(PROCS)
+    assert asyncio.run(n.areduce(vals, store)) == n.reduce(vals, PROCS)
+    assert asyncio.run(Node(3).areduce(Store({}), Store({}))) == 3
+
+
+def test_areduce_nodes():
+    procs = Store({"fee": Node.model_validate(PROCS["fee"])})
+    n = Node.model_validate({"proc": "fee"})
+    assert asyncio.run(n.areduce(Store(VALS), procs)) == 8
+
+
+def test_resolve():
+    n = Node.model_validate({"proc": "nested", "args": [{"key": "a"}]})
+    vals, procs = Store(VALS), Store(PROCS)
+    resolved_vals, resolved_procs = asyncio.run(resolve(n, vals, procs))
+    assert resolved_vals == {"a": 1}
+    # Procs called in a proc called with args are called without procs.
+    assert resolved_procs is not None and set(resolved_procs) == {"nested"}
+    assert set(procs.fetched) == {"nested"}
+
+
+@pytest.mark.parametrize(
+    "formula, procs, error",
+    [
+        ({"key": "nope"}, PROCS, KeyError),
+        ({"proc": "nope"}, PROCS, KeyError),
+        ({"proc": "total"}, None, RuntimeError),
+        ({"proc": "missing"}, PROCS, KeyError),
+        ({"proc": "nested", "args": [1]}, PROCS, RuntimeError),
+        ({"op": "add", "args": [{"key": "a"}, "x"]}, PROCS, TypeError),
+    ],
+)
+def test_areduce_errors(formula: Json, procs: dict[str, Json] | None, error: type):
+    n = Node.model_validate(formula)
+    with pytest.raises(error) as expected:
+        n.reduce(VALS, procs)
+    with pytest.raises(error) as e:
+        asyncio.run(n.areduce(Store(VALS), procs and Store(procs)))
+    assert str(e.value) == str(expected.value)
+
+
+def test_areduce_resolver_error():
+    async def fail(key: str) -> Any:
+        if key == "b":
+            raise ConnectionError(key)
+        await asyncio.sleep(10)
+
+    n = Node.model_validate(FORMULA)
+    t = time.perf_counter()
+    with pytest.raises(ConnectionError):
+        asyncio.run(n.areduce(fail, PROCS))
+    # The other lookups are cancelled rather than waited for.
+    assert time.perf_counter() - t < 5
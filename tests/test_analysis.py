@@ -0,0 +1,59 @@
+# pylama:ignore=D103
+"""Static analysis tests."""
+import pytest
+
+from algencode.analysis import dependencies
+
+from .common import Json, Node
+
+PROCS: dict[str, Json] = {
+    "total": {"op": "add", "args": [{"key": "a"}, {"proc": "fee"}]},
+    "fee": {"op": "mul", "args": [{"key": "rate"}, 2]},
+    "double": {"op": "mul", "args": [{"key": "_0"}, 2]},
+    "loop": {"proc": "loop"},
+}
+
+PARAMS: list[tuple[Json, set[str]]] = [
+    (1, set()),
+    ({"key": "a"}, {"a"}),
+    ({"op": "add", "args": {"key": "xs"}}, {"xs"}),
+    (
+        {
+            "op": "join",
+            "args": ["-", {"key": "a"}, {"op": "fmt", "args": [{"key": "f"}]}],
+        },
+        {"a", "f"},
+    ),
+    ({"proc": "total"}, {"a", "rate"}),
+    ({"proc": "double", "args": [{"key": "b"}]}, {"b"}),
+    ({"proc": "loop"}, set()),
+    (
+        {
+            "key": "a",
+            "debug": {"op": "fmt", "args": ["{}", {"key": "_res"}, {"key": "d"}]},
+        },
+        {"a", "d"},
+    ),
+]
+
+
+@pytest.mark.parametrize("n,e", PARAMS, ids=str)
+def test_required_keys(n: Json, e: set[str]):
+    assert Node.model_validate(n).required_keys(PROCS) == e
+
+
+def test_required_keys_missing_proc():
+    n = Node.model_validate({"op": "add", "args": [{"proc": "total"}, {"key": "c"}]})
+    with pytest.raises(KeyError):
+        n.required_keys()
+    assert dependencies(n).missing == {"total"}
+    assert dependencies(n).keys == {"c"}
+    n = Node.model_validate({"proc": "unknown", "args": [{"key": "c"}]})
+    assert n.required_keys() == {"c"}
+
+
+def test_project():
+    n = Node.model_validate({"proc": "total"})
+    vals = {"a": 1, "rate": 2, **{f"col{i}": i for i in range(40)}}
+    assert n.project(vals, PROCS) == {"a": 1, "rate": 2}
+    assert n.reduce(n.project(vals, PROCS), PROCS) == n.reduce(vals, PROCS)
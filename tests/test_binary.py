@@ -0,0 +1,130 @@
+# pylama:ignore=D103
+"""Binary serialization tests."""
+from datetime import date
+from decimal import Decimal
+
+import pytest
+
+from algencode.binary import MAGIC, procs_from_bytes, procs_to_bytes
+
+from .common import Json, Node
+
+PARAMS: list[Json] = [
+    7,
+    -7,
+    2**70,
+    -(2**70),
+    1.5,
+    float("inf"),
+    True,
+    False,
+    None,
+    "seven",
+    "",
+    Decimal("-1442.560"),
+    date(2021, 7, 1),
+    {"key": "a"},
+    {"key": "ключ"},
+    {"op": "add", "args": [1, -2, 0.5, Decimal("1.1"), {"key": "a"}]},
+    {"op": "min", "args": {"key": "xs"}},
+    {"op": "len", "args": []},
+    {"op": "round", "args": [{"op": "div", "args": [{"key": "a"}, 3]}, 2]},
+    {"op": "fmt", "args": ["{:>09}-{}", {"key": "a"}, "x", None]},
+    {"op": "date", "args": ["%Y/%m", date(2021, 7, 1)]},
+    {"op": "join", "args": ["-", "a", "a", "a"]},
+    {"proc": "total"},
+    {"proc": "double", "args": []},
+    {"proc": "double", "args": [{"key": "a"}, 2]},
+    {"key": "a", "debug": True},
+    {"key": "a", "debug": False},
+    {
+        "op": "add",
+        "args": [1, 2],
+        "debug": {"op": "fmt", "args": ["{}", {"key": "_res"}]},
+    },
+    {"op": "mean", "args": {"key": "xs", "debug": True}},
+    {"op": "if", "args": [{"op": "lt", "args": [{"key": "a"}, 2]}, "x", None]},
+    {"op": "or", "args": [{"op": "not", "args": [{"key": "a"}]}, False, 0]},
+]
+
+
+@pytest.mark.parametrize("n", PARAMS, ids=str)
+def test_round_trip(n: Json):
+    node = Node.model_validate(n)
+    data = node.to_bytes()
+    assert data.startswith(MAGIC)
+    res = Node.from_bytes(data)
+    assert res == node
+    assert repr(res) == repr(node)
+    assert res.to_bytes() == data
+
+
+def test_smaller_than_json():
+    n = Node.model_validate(
+        {
+            "op": "add",
+            "args": [
+                {"op": "mul", "args": [{"key": "tax"}, Decimal("0.01")]},
+                {"op": "mul", "args": [{"key": "tax"}, Decimal("0.01")]},
+                {"proc": "fee", "args": [{"key": "tax"}]},
+            ],
+        }
+    )
+    assert len(n.to_bytes()) * 4 < len(n.model_dump_json())
+
+
+def test_decoded_node_reduces():
+    n = Node.model_validate({"op": "fmt", "args": ["{}-{}", {"key": "a"}, {"proc": "p"}]})
+    res = Node.from_bytes(n.to_bytes())
+    assert res.reduce({"a": 1}, {"p": {"key": "a"}}) == "1-1"
+    assert res.compile()({"a": 1}, {"p": {"key": "a"}}) == "1-1"
+
+
+def test_procs():
+    procs: dict[str, Json] = {
+        "fee": {"op": "mul", "args": [{"key": "rate"}, 2]},
+        "total": {"op": "add", "args": [{"key": "rate"}, {"proc": "fee"}]},
+    }
+    data = procs_to_bytes(procs)
+    res = procs_from_bytes(data)
+    assert res == {k: Node.model_validate(v) for k, v in procs.items()}
+    assert data.count(b"rate") == 1
+    with pytest.raises(ValueError):
+        Node.from_bytes(data)
+
+
+def malformed() -> list[bytes]:
+    data = Node.model_validate(
+        {"op": "add", "args": [Decimal("1.5"), date(2021, 1, 1), {"key": "a"}]}
+    ).to_bytes()
+    return [
+        b"",
+        b"JSON",
+        MAGIC,
+        data[:-1],
+        data + b"\x00",
+        MAGIC + b"\x00\x7f",  # unknown tag
+        MAGIC + b"\x00\x0e\x10\x00",  # boxed subnode
+        MAGIC + b"\x00\x10\x00",  # string index out of range
+        MAGIC + b"\x01\x03abc\x06\x00",  # invalid decimal
+        MAGIC + b"\x00\x07\xff\xff\xff\xff\x0f",  # invalid date
+        MAGIC + b"\x00\x20\x00\x03\x00",  # number args neither sequence nor variable
+        MAGIC + b"\x00\x40\xff\xff\x03",  # arg count beyond the data
+        MAGIC + b"\x00\x40\x01\x00",  # string op arity
+        MAGIC + b"\x01\x02\xff\xfe\x10\x00",  # invalid UTF-8
+        MAGIC + b"\x00" + b"\x20\x03" * 5000,  # deeply nested, truncated
+    ]
+
+
+@pytest.mark.parametrize("data", malformed(), ids=repr)
+def test_malformed(data: bytes):
+    with pytest.raises(ValueError):
+        Node.from_bytes(data)
+
+
+def test_deep():
+    # Nested adds decode without recursion, however deep.
+    depth = 5000
+    data = MAGIC + b"\x00" + b"\x20\x03" * depth + b"\x03\x02" * (depth + 1)
+    n = Node.from_bytes(data)
+    assert n.lower()() == depth + 1
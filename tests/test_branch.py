@@ -0,0 +1,91 @@
+# pylama:ignore=D103
+"""Branch node tests."""
+import json
+from decimal import Decimal
+
+import pytest
+from pydantic import ValidationError
+
+from .common import BranchNode, Json, Node, node_test
+
+SAFE_DIV: Json = {
+    "op": "if",
+    "args": [
+        {"op": "eq", "args": [{"key": "n"}, 0]},
+        "n/a",
+        {"op": "div", "args": [1, {"key": "n"}]},
+    ],
+}
+
+
+def test_branch_if():
+    node_test(SAFE_DIV, {"n": 4}, 0.25)
+    # The branch not taken isn't reduced.
+    node_test(SAFE_DIV, {"n": 0}, "n/a")
+    node_test({"op": "if", "args": [{"key": "a"}, {"key": "b"}, "x"]}, {"a": 0}, "x")
+
+
+@pytest.mark.parametrize(
+    "op,lhs,rhs,e",
+    [
+        ("eq", 1, 1.0, True),
+        ("eq", "a", 1, False),
+        ("ne", Decimal("1.10"), Decimal("1.1"), False),
+        ("lt", 1, 2, True),
+        ("le", 2, 2, True),
+        ("gt", "b", "a", True),
+        ("ge", 1, 2, False),
+    ],
+)
+def test_branch_compare(op: str, lhs: Json, rhs: Json, e: bool):
+    node_test({"op": op, "args": [{"key": "lhs"}, rhs]}, {"lhs": lhs}, e)  # type: ignore
+
+
+def test_branch_compare_mistyped():
+    with pytest.raises(TypeError):
+        Node.model_validate({"op": "lt", "args": ["a", 1]}).reduce()
+
+
+def test_branch_and_or():
+    missing = {"key": "missing"}
+    # Python semantics: the first falsy (truthy) arg, or else the last one.
+    node_test({"op": "and", "args": [{"key": "a"}, missing]}, {"a": 0}, 0)
+    node_test({"op": "and", "args": [1, "x", {"key": "a"}]}, {"a": 3}, 3)
+    node_test({"op": "or", "args": [{"key": "a"}, missing]}, {"a": "x"}, "x")
+    node_test({"op": "or", "args": [0, "", {"key": "a"}]}, {"a": None}, None)
+    node_test({"op": "not", "args": [{"key": "a"}]}, {"a": ""}, True)
+    with pytest.raises(KeyError):
+        Node.model_validate({"op": "and", "args": [1, missing]}).reduce({})
+
+
+@pytest.mark.parametrize(
+    "n",
+    [
+        {"op": "if", "args": [True, 1]},
+        {"op": "eq", "args": [1, 2, 3]},
+        {"op": "and", "args": []},
+        {"op": "not", "args": []},
+        {"op": "unless", "args": [True, 1, 2]},
+    ],
+    ids=str,
+)
+def test_branch_invalid(n: Json):
+    with pytest.raises(ValidationError):
+        Node.model_validate(n)
+
+
+def test_branch_parse():
+    n = Node.model_validate(SAFE_DIV)
+    assert isinstance(n.root, BranchNode)
+    assert Node.model_validate_json(json.dumps(SAFE_DIV)) == n
+
+
+def test_parse_deep():
+    # Documents are only validated as the subnode type their op names, so parsing
+    # time is linear in the depth of the tree (rather than exponential).
+    n: Json = {"key": "a"}
+    for i in range(60):
+        n = {"op": "if", "args": [{"op": "gt", "args": [{"key": "a"}, i]}, n, i]}
+    node = Node.model_validate(n)
+    assert node.reduce({"a": 100}) == 100
+    assert node.reduce({"a": 30}) == 59
@@ -0,0 +1,66 @@
+# pylama:ignore=D103
+"""Parse cache tests."""
+import json
+from datetime import date
+from decimal import Decimal
+
+import pytest
+from pydantic import ValidationError
+
+from algencode.cache import ParseCache, content_key
+
+from .common import Node
+
+DOC = {"op": "add", "args": [1, {"key": "a"}]}
+
+
+def test_content_key_canonical():
+    assert content_key(json.dumps(DOC)) == content_key(
+        '{ "args": [1, {"key": "a"}],\n  "op": "add" }'
+    )
+    assert content_key(DOC) == content_key({"args": [1, {"key": "a"}], "op": "add"})
+    assert content_key({"op": "add", "args": [1]}) != content_key(
+        {"op": "add", "args": [1.0]}
+    )
+    assert content_key({"op": "add", "args": [1]}) != content_key(
+        {"op": "add", "args": [True]}
+    )
+    assert content_key(Decimal("1.5")) != content_key(1.5)
+    assert content_key(date(2021, 1, 1)) != content_key('"2021-01-01"')
+    assert content_key(Decimal("1.5")) != content_key(["$decimal", "1.5"])
+    assert content_key(Node.model_validate(DOC)) == content_key(DOC)
+
+
+def test_parse_cache_hits():
+    cache = ParseCache()
+    n = cache.parse(json.dumps(DOC))
+    assert n == Node.model_validate(DOC)
+    assert cache.parse(json.dumps(DOC, indent=2)) is n
+    assert cache.parse(DOC) is n
+    assert cache.parse(n) is n
+    assert cache.info()[:3] == (2, 1, 0)
+
+
+def test_parse_cache_evicts():
+    cache = ParseCache(maxsize=2)
+    for i in range(3):
+        cache.parse({"op": "add", "args": [i]})
+    assert cache.info().evictions == 1
+    cache.maxsize = 1
+    assert cache.info().evictions == 2
+    assert cache.info().currsize == 1
+
+
+def test_parse_cached_immutable():
+    n = Node.parse_cached(DOC)
+    assert Node.parse_cached(json.dumps(DOC)) is n
+    with pytest.raises(ValidationError):
+        n.root.op = "mul"  # type: ignore
+    with pytest.raises(AttributeError):
+        n.root.args.append(2)  # type: ignore
+    assert n.reduce({"a": 2}) == 3
+
+
+def test_parse_cached_invalid():
+    with pytest.raises(ValidationError):
+        Node.parse_cached({"op": "nope", "args": []})
@@ -0,0 +1,91 @@
+# pylama:ignore=D103
+"""Compiled node tests."""
+from datetime import date
+from decimal import Decimal
+
+import pytest
+
+from .common import Json, Node, Vals
+
+PROCS: dict[str, Json] = {
+    "double": {"op": "mul", "args": [{"key": "_0"}, 2]},
+    "total": {"op": "add", "args": [{"key": "a"}, {"key": "b"}]},
+}
+
+PARAMS: list[tuple[Json, Vals]] = [
+    (7, {}),
+    ("seven", {}),
+    ({"key": "a"}, {"a": 3}),
+    ({"op": "add", "args": [1, {"key": "a"}, {"key": "b"}]}, {"a": 2, "b": 3}),
+    ({"op": "sub", "args": [{"key": "a"}]}, {"a": 2}),
+    ({"op": "div", "args": [{"key": "a"}, 4]}, {"a": 2}),
+    ({"op": "mod", "args": [{"key": "a"}, 4]}, {"a": Decimal("10.5")}),
+    ({"op": "max", "args": [{"key": "a"}, 4, 1.5]}, {"a": 2}),
+    ({"op": "min", "args": {"key": "xs"}}, {"xs": [4, 2, 9]}),
+    ({"op": "round", "args": [{"key": "a"}]}, {"a": 2.6}),
+    ({"op": "round", "args": [{"key": "a"}, 1]}, {"a": 2.66}),
+    ({"op": "len", "args": [1, 2, 3]}, {}),
+    ({"op": "len", "args": {"key": "xs"}}, {"xs": [1, 2]}),
+    ({"op": "mean", "args": [1, 2, {"key": "a"}]}, {"a": 6}),
+    ({"op": "mean", "args": {"key": "xs"}}, {"xs": [1, 2]}),
+    ({"op": "slice", "args": ["abcdef", 3]}, {}),
+    ({"op": "slice", "args": ["abcdef", 1, {"key": "a"}]}, {"a": None}),
+    ({"op": "slice", "args": ["abcdef", None, None, -2]}, {}),
+    ({"op": "fmt", "args": ["{:>09}-{}", {"key": "a"}, "x"]}, {"a": 12}),
+    ({"op": "rep", "args": ["ab", {"key": "a"}]}, {"a": 3}),
+    ({"op": "join", "args": ["-", "a", {"key": "a"}]}, {"a": "b"}),
+    ({"op": "date", "args": ["%Y/%m", {"key": "d"}]}, {"d": date(2021, 7, 1)}),
+    ({"proc": "double", "args": [{"key": "a"}]}, {"a": 21}),
+    ({"proc": "total"}, {"a": 1, "b": 2}),
+    ({"op": "round", "args": [{"proc": "total"}, 1]}, {"a": 0.25, "b": 1}),
+    ({"op": "if", "args": [{"key": "a"}, 1, {"op": "div", "args": [1, 0]}]}, {"a": 1}),
+    ({"op": "if", "args": [{"key": "a"}, {"key": "b"}, "x"]}, {"a": 0}),
+    ({"op": "and", "args": [{"key": "a"}, {"key": "b"}, 2]}, {"a": 1, "b": 0.0}),
+    ({"op": "or", "args": [{"key": "a"}, {"key": "b"}]}, {"a": "x"}),
+    ({"op": "or", "args": [0, None, {"key": "a"}]}, {"a": ""}),
+    ({"op": "not", "args": [{"key": "a"}]}, {"a": []}),
+    ({"op": "le", "args": [{"key": "a"}, Decimal("2.5")]}, {"a": 2}),
+]
+
+
+@pytest.mark.parametrize("n,v", PARAMS, ids=str)
+def test_compile_matches_reduce(n: Json, v: Vals):
+    node = Node.model_validate(n)
+    expect = node.reduce(v, PROCS)
+    res = node.compile()(v, PROCS)
+    assert res == expect
+    assert type(res) is type(expect)
+
+
+ERROR_PARAMS: list[tuple[Json, Vals | None]] = [
+    ({"key": "a"}, None),
+    ({"key": "a"}, {}),
+    ({"op": "add", "args": [1, "a"]}, {}),
+    ({"op": "add", "args": [1, {"key": "a"}]}, {"a": "b"}),
+    ({"op": "add", "args": []}, {}),
+    ({"op": "div", "args": [1, 0]}, {}),
+    ({"op": "div", "args": [1, 0, {"key": "missing"}]}, {}),
+    ({"op": "div", "args": {"key": "xs"}}, {"xs": [1, 0, "a"]}),
+    ({"op": "round", "args": [1, 2, 3]}, {}),
+    ({"op": "rep", "args": ["a", 1.5]}, {}),
+    ({"proc": "missing"}, {}),
+    ({"op": "if", "args": [{"key": "a"}, {"op": "div", "args": [1, 0]}, 1]}, {"a": 1}),
+    ({"op": "and", "args": [1, {"key": "a"}]}, {}),
+    ({"op": "lt", "args": ["a", 1]}, {}),
+    ({"op": "date", "args": [{"key": "f"}, {"key": "d"}]}, {}),
+]
+
+
+@pytest.mark.parametrize("n,v", ERROR_PARAMS, ids=str)
+def test_compile_errors_match_reduce(n: Json, v: Vals | None):
+    node = Node.model_validate(n)
+    with pytest.raises(Exception) as expect:
+        node.reduce(v, PROCS)
+    with pytest.raises(expect.type) as res:
+        node.compile()(v, PROCS)
+    assert str(res.value) == str(expect.value)
+
+
+def test_compile_is_cached():
+    node = Node.model_validate({"op": "add", "args": [1, 2]})
+    assert node.compile() is node.compile()
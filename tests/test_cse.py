@@ -0,0 +1,54 @@
+# pylama:ignore=D103
+"""Common subexpression elimination tests."""
+from unittest.mock import patch
+
+import pytest
+
+from algencode.cse import analyze, structural_key
+
+from .common import Json, Node
+
+TAX: Json = {"op": "round", "args": [{"op": "mul", "args": [{"key": "tax"}, 1.1]}, 2]}
+N: Json = {
+    "op": "div",
+    "args": [
+        {"op": "add", "args": [TAX, 1]},
+        {"op": "sub", "args": [TAX, {"proc": "p"}, {"proc": "p"}]},
+    ],
+}
+PROCS: dict[str, Json] = {"p": {"key": "fee"}}
+
+
+def test_structural_key():
+    assert structural_key(Node.model_validate(TAX)) == structural_key(
+        Node.model_validate(TAX)
+    )
+    for a, b in [(1, 1.0), (1, True), (0.0, -0.0)]:
+        x = Node.model_validate({"op": "add", "args": [a]})
+        y = Node.model_validate({"op": "add", "args": [b]})
+        assert x == y
+        assert structural_key(x) != structural_key(y)
+
+
+def test_analyze():
+    stats = analyze(Node.model_validate(N)).stats
+    assert stats.shared == 2  # round(...) and the proc call
+    assert stats.deduplicated == 3 + 1  # round, mul, tax and the proc call
+
+
+@pytest.mark.parametrize("vals", [{"tax": 10, "fee": 1}, {"tax": 2.5, "fee": 0}])
+def test_cse_evaluates_once(vals):
+    node = Node.model_validate(N)
+    f = node.compile(cse=True)
+    assert f is not node.compile()
+    with patch("builtins.round", wraps=round) as r:
+        assert f(vals, PROCS) == node.reduce(vals, PROCS)
+        assert r.call_count == 1 + 2  # compiled once, reduced twice
+        f(vals, PROCS)
+        assert r.call_count == 1 + 2 + 1
+
+
+def test_cse_errors():
+    node = Node.model_validate({"op": "add", "args": [TAX, TAX]})
+    with pytest.raises(KeyError):
+        node.compile(cse=True)({}, None)
@@ -0,0 +1,167 @@
+# pylama:ignore=D103
+"""Incremental evaluator tests."""
+import pytest
+
+from algencode.incremental import Incremental
+
+from .common import Json, Node, Vals
+
+PROCS: dict[str, Json] = {
+    "fee": {"op": "mul", "args": [{"key": "rate"}, 2]},
+    "total": {"op": "add", "args": [{"key": "a"}, {"proc": "fee"}]},
+    "double": {"op": "mul", "args": [{"key": "_0"}, 2]},
+    "pick": {"op": "fmt", "args": ["{}", {"key": "_1"}]},
+    "twice": {"proc": "double", "args": [{"key": "b"}]},
+    "nested": {"proc": "double", "args": [{"key": "_0"}]},
+    "loop": {"proc": "loop"},
+}
+
+FORMULA: Json = {
+    "op": "add",
+    "args": [
+        {"op": "mul", "args": [{"key": "a"}, {"key": "b"}]},
+        {"op": "div", "args": [{"key": "c"}, 4]},
+        {"proc": "total"},
+        {"proc": "double", "args": [{"key": "b"}]},
+        {"op": "len", "args": {"key": "xs"}},
+        {"op": "round", "args": [{"key": "c", "debug": True}]},
+    ],
+}
+
+
+def check(inc: Incremental, n: Node, procs: dict[str, Json] | None = PROCS):
+    __tracebackhide__ = True
+    expect = n.reduce(inc.vals, procs)
+    res = inc.value
+    assert res == expect and type(res) is type(expect)
+
+
+def test_incremental():
+    n = Node.model_validate(FORMULA)
+    vals: Vals = {"a": 1, "b": 2, "c": 3.5, "rate": 5, "xs": [1, 2], "unused": 0}
+    inc = Incremental(n, vals, PROCS)
+    check(inc, n)
+    assert inc.recomputed == len(inc)
+    for change in [{"a": 2}, {"rate": 1.5}, {"b": 0}, {"c": 7}, {"xs": [1]}]:
+        inc.update(change)
+        check(inc, n)
+        assert 0 < inc.recomputed < len(inc), change
+    inc.update({"unused": 1, "a": 2})
+    assert inc.recomputed == 0
+
+
+def test_incremental_recomputes_only_dependents():
+    n = Node.model_validate(
+        {
+            "op": "add",
+            "args": [
+                {"op": "mul", "args": [{"key": "a"}, 2]},
+                {"op": "mul", "args": [{"key": "b"}, 3]},
+            ],
+        }
+    )
+    inc = Incremental(n, {"a": 1, "b": 1})
+    assert inc.value == 5
+    assert inc.update({"a": 2}) == 7
+    assert inc.recomputed == 3  # a, a * 2, add
+    assert inc.update({"b": 1.0}) == 7.0
+    assert inc.recomputed == 3
+
+
+def test_incremental_early_cutoff():
+    n = Node.model_validate(
+        {"op": "add", "args": [{"op": "round", "args": [{"key": "a"}]}, {"key": "b"}]}
+    )
+    inc = Incremental(n, {"a": 1.2, "b": 1})
+    assert inc.value == 2
+    assert inc.update({"a": 1.4}) == 2
+    assert inc.recomputed == 2  # a, round (unchanged)
+
+
+def test_incremental_branches():
+    positive = {"op": "gt", "args": [{"key": "n"}, 0]}
+    n = Node.model_validate(
+        {
+            "op": "if",
+            "args": [
+                {"op": "and", "args": [{"key": "on"}, positive]},
+                {"op": "div", "args": [{"key": "a"}, {"key": "n"}]},
+                {"op": "or", "args": [{"key": "b"}, "none"]},
+            ],
+        }
+    )
+    inc = Incremental(n, {"on": True, "n": 4, "a": 2, "b": ""})
+    check(inc, n, None)
+    # Errors of the branch not taken (or of args not reached) aren't raised.
+    for change in [{"n": 0}, {"b": "x"}, {"on": False, "n": "x"}, {"on": True, "n": 1}]:
+        inc.update(change)
+        check(inc, n, None)
+    inc.update({"a": 3})
+    assert inc.recomputed == 3  # a, a / n, if
+    inc.update({"b": "y"})
+    assert inc.recomputed == 3  # b, or, if (unchanged)
+    with pytest.raises(TypeError):
+        inc.update({"n": 0.5, "a": "x"})
+
+
+def test_incremental_proc_args():
+    n = Node.model_validate(
+        {
+            "op": "join",
+            "args": [
+                "-",
+                {"proc": "pick", "args": [{"key": "a"}, {"key": "b"}]},
+                {"op": "fmt", "args": ["{}", {"proc": "twice"}]},
+                {
+                    "op": "fmt",
+                    "args": ["{}", {"proc": "double", "args": [{"proc": "fee"}]}],
+                },
+            ],
+        }
+    )
+    inc = Incremental(n, {"a": 1, "b": 2, "rate": 3}, PROCS)
+    check(inc, n)
+    for change in [{"b": 5}, {"rate": 4}, {"a": 7}]:
+        inc.update(change)
+        check(inc, n)
+    assert inc.recomputed == 2  # a, and the pick call (whose body ignores _0)
+
+
+ERRORS: list[tuple[Json, Vals]] = [
+    ({"op": "add", "args": [1, {"key": "a"}]}, {}),
+    ({"op": "add", "args": [1, {"key": "a"}]}, {"a": "b"}),
+    ({"op": "add", "args": [{"key": "a"}, {"key": "b"}]}, {"a": "b"}),
+    ({"op": "div", "args": [1, 0, {"key": "missing"}]}, {}),
+    ({"proc": "missing"}, {}),
+    ({"proc": "double", "args": [{"key": "a"}]}, {}),
+    ({"proc": "pick", "args": [1, {"proc": "fee"}]}, {}),
+    ({"proc": "nested", "args": [1]}, {}),
+    ({"op": "if", "args": [{"key": "a"}, {"op": "div", "args": [1, 0]}, 1]}, {"a": 1}),
+]
+
+
+@pytest.mark.parametrize("n,v", ERRORS, ids=str)
+def test_incremental_errors(n: Json, v: Vals):
+    node = Node.model_validate(n)
+    inc = Incremental(node, v, PROCS)
+    with pytest.raises(Exception) as expect:
+        node.reduce(v, PROCS)
+    with pytest.raises(expect.type) as res:
+        inc.value
+    assert str(res.value) == str(expect.value)
+
+
+def test_incremental_recovers():
+    n = Node.model_validate({"op": "add", "args": [{"key": "a"}, {"key": "b"}]})
+    inc = Incremental(n, {"a": 1})
+    with pytest.raises(KeyError):
+        inc.value
+    with pytest.raises(TypeError):
+        inc.update({"b": "x"})
+    assert inc.update({"b": 2}) == 3
+
+
+def test_incremental_recursive_proc():
+    inc = Incremental(Node.model_validate({"proc": "loop"}), {}, PROCS)
+    with pytest.raises(RecursionError):
+        inc.value
@@ -0,0 +1,115 @@
+# pylama:ignore=D103
+"""Type inference tests."""
+from datetime import date
+from decimal import Decimal
+from typing import Any
+
+import pytest
+
+from algencode.compiler import Compiler
+from algencode.infer import ANY, infer_all, schema_types
+
+from .common import Json, Node, Vals
+
+PARAMS: list[tuple[Json, Vals, set[type]]] = [
+    (7, {}, {int}),
+    ({"key": "a"}, {"a": 3}, {int}),
+    ({"key": "a"}, {}, {object}),
+    ({"op": "add", "args": [1, {"key": "a"}]}, {"a": 2}, {int}),
+    ({"op": "add", "args": [1, {"key": "a"}]}, {"a": 2.5}, {float}),
+    ({"op": "add", "args": [1, {"key": "a"}]}, {}, {int, float, Decimal}),
+    ({"op": "sub", "args": [{"key": "a"}]}, {"a": True}, {bool}),
+    ({"op": "mul", "args": [{"key": "a"}, True]}, {"a": True}, {int}),
+    ({"op": "div", "args": [{"key": "a"}, 4]}, {"a": 2}, {float}),
+    ({"op": "div", "args": [{"key": "a"}, 4]}, {"a": Decimal(2)}, {Decimal}),
+    ({"op": "max", "args": [{"key": "a"}, 4, 1.5]}, {"a": 2}, {int, float}),
+    ({"op": "min", "args": {"key": "xs"}}, {"xs": [4, 2]}, {int, float, Decimal}),
+    ({"op": "round", "args": [{"key": "a"}]}, {"a": 2.6}, {int}),
+    ({"op": "round", "args": [{"key": "a"}, 1]}, {"a": 2.66}, {float}),
+    (
+        {"op": "round", "args": [{"key": "a"}, {"key": "n"}]},
+        {"a": 2.6, "n": None},
+        {float, int},
+    ),
+    ({"op": "len", "args": [1, "a"]}, {}, {int}),
+    ({"op": "mean", "args": [1, 2, {"key": "a"}]}, {"a": 6}, {float}),
+    ({"op": "slice", "args": ["abcdef", 1, {"key": "a"}]}, {"a": None}, {str}),
+    ({"op": "fmt", "args": ["{}", {"key": "a"}]}, {"a": 12}, {str}),
+    ({"op": "date", "args": ["%Y", {"key": "d"}]}, {"d": date(2021, 7, 1)}, {str}),
+    ({"proc": "total"}, {}, {object}),
+    ({"op": "lt", "args": [{"key": "a"}, 2]}, {"a": 1}, {bool}),
+    ({"op": "lt", "args": [{"key": "a"}, 2]}, {}, {object}),
+    ({"op": "not", "args": [{"key": "a"}]}, {}, {bool}),
+    ({"op": "if", "args": [{"key": "c"}, {"key": "a"}, "x"]}, {"a": 1}, {int, str}),
+    ({"op": "or", "args": [{"key": "a"}, None]}, {"a": "b"}, {str, type(None)}),
+]
+
+
+def schema_of(vals: Vals) -> dict[str, type]:
+    return {k: type(v) for k, v in vals.items()}
+
+
+@pytest.mark.parametrize("n,v,e", PARAMS, ids=str)
+def test_infer(n: Json, v: Vals, e: set[type]):
+    assert Node.model_validate(n).infer(schema_of(v)) == e
+
+
+@pytest.mark.parametrize(
+    "n,schema",
+    [
+        ({"op": "add", "args": [1, "a"]}, {}),
+        ({"op": "add", "args": [1, {"key": "a"}]}, {"a": str}),
+        ({"op": "mean", "args": [1, {"op": "fmt", "args": ["{}", 1]}]}, {}),
+        ({"op": "round", "args": [1.5, 1.5]}, {}),
+        ({"op": "slice", "args": ["abc", {"key": "a"}]}, {"a": float}),
+        ({"op": "rep", "args": ["ab", {"key": "a"}]}, {"a": float | None}),
+        ({"op": "join", "args": ["-", "a", {"op": "add", "args": [1, 2]}]}, {}),
+        ({"op": "date", "args": ["%Y", {"key": "d"}]}, {"d": str}),
+        ({"op": "lt", "args": [{"key": "a"}, 1]}, {"a": str}),
+        ({"op": "if", "args": [True, 1, {"op": "add", "args": ["a"]}]}, {}),
+    ],
+    ids=str,
+)
+def test_infer_ill_typed(n: Json, schema: dict[str, Any]):
+    with pytest.raises(TypeError):
+        Node.model_validate(n).infer(schema)
+
+
+def test_infer_unknown_not_rejected():
+    # Only types that can't possibly match are rejected.
+    n = Node.model_validate({"op": "add", "args": [{"key": "a"}, {"proc": "p"}]})
+    assert n.infer() == {int, float, Decimal}
+    n = Node.model_validate({"op": "len", "args": [{"op": "add", "args": ["a"]}]})
+    assert n.infer() == {int}
+    assert infer_all(Node.model_validate({"op": "add", "args": [1, "a"]}))
+
+
+def test_schema_types():
+    assert schema_types(int | None) == {int, type(None)}
+    assert schema_types((str, None)) == {str, type(None)}
+    assert schema_types(list[int]) == {list}
+    with pytest.raises(TypeError):
+        schema_types("int")
+
+
+@pytest.mark.parametrize("n,v,e", PARAMS, ids=str)
+def test_compile_schema_matches_reduce(n: Json, v: Vals, e: set[type]):
+    procs: dict[str, Json] = {"total": {"op": "add", "args": [1, 2]}}
+    node = Node.model_validate(n)
+    vals = {"a": 1, "c": 1, **v}
+    res = node.compile(schema=schema_of(v))(vals, procs)
+    assert res == node.reduce(vals, procs)
+    assert any(isinstance(res, t) for t in e)
+
+
+def test_compile_schema_skips_checks():
+    n = Node.model_validate({"op": "mul", "args": [{"key": "a"}, 2]})
+    arg = n.root.args[0]
+    types = infer_all(n, {"a": int})
+    assert Compiler(types=types).to(arg, int).__name__ == "variable"
+    assert Compiler(types=infer_all(n)).to(arg, int).__name__ == "checked"
+    assert types[id(arg.root)] != ANY
+    # Vals are trusted to match the schema.
+    with pytest.raises(TypeError):
+        n.compile()({"a": "s"}, None)
+    assert n.compile(schema={"a": int})({"a": "s"}, None) == "ss"
@@ -0,0 +1,90 @@
+# pylama:ignore=D103
+"""Intern table tests."""
+import json
+from decimal import Decimal
+
+import pytest
+
+from algencode import InternTable, ProcRegistry
+
+from .common import Json, Node
+
+SUB: Json = {"op": "add", "args": [{"key": "a"}, 1]}
+DOC: Json = {
+    "op": "fmt",
+    "args": ["{}-{}", SUB, {"op": "mul", "args": [SUB, {"key": "a"}]}],
+}
+
+
+def test_intern_shares_subtrees():
+    table = InternTable()
+    n = table.intern(DOC)
+    assert n == Node.model_validate(DOC)
+    assert n.root.args[1] is n.root.args[2].root.args[0]
+    assert n.root.args[1].root.args[0] is n.root.args[2].root.args[1]
+    assert table.intern(json.dumps(DOC)) is n
+    assert table.intern(SUB) is n.root.args[1]
+    assert table.intern(n) is n
+    assert table.stats().subnodes == 7 + 7 + 1 + 1
+    assert table.stats().distinct == len(table) == 4
+    assert table.stats().shared == 12
+
+
+@pytest.mark.parametrize(
+    "a,b",
+    [
+        (1, 1.0),
+        (1, True),
+        (Decimal("1.1"), Decimal("1.10")),
+        (0.0, -0.0),
+    ],
+    ids=str,
+)
+def test_intern_literals_distinct(a: Json, b: Json):
+    table = InternTable()
+    x = table.intern({"op": "add", "args": [{"key": "a"}, a]})
+    y = table.intern({"op": "add", "args": [{"key": "a"}, b]})
+    assert x is not y
+    assert x.root.args[0] is y.root.args[0]
+    assert table.intern(a) is not table.intern(b)
+
+
+def test_intern_debug():
+    table = InternTable()
+    x = table.intern({"key": "a", "debug": True})
+    assert x is not table.intern({"key": "a"})
+    assert x is table.intern({"key": "a", "debug": True})
+
+
+def test_intern_clear():
+    table = InternTable()
+    n = table.intern(DOC)
+    table.clear()
+    assert len(table) == 0
+    m = table.intern(DOC)
+    assert m == n and m is not n
+
+
+def test_intern_compile():
+    table = InternTable()
+    vals = {"a": 2}
+    f = table.compile(DOC)
+    assert f(vals, None) == Node.model_validate(DOC).reduce(vals) == "3-6"
+    g = table.compile({"op": "mul", "args": [SUB, 2]})
+    assert g(vals, None) == 6
+    assert table.compile(DOC) is f
+    # The shared subtree was compiled once.
+    assert len(table._compiled) == 5
+    with pytest.raises(ValueError):
+        from algencode.compiler import compile_node
+
+        compile_node(table.intern(DOC), cse=True, memo={})
+
+
+def test_intern_registries():
+    table = InternTable()
+    procs = ProcRegistry({"a": DOC, "b": SUB}, table=table)
+    other = ProcRegistry({"c": {"op": "mul", "args": [SUB, 2]}}, table=table)
+    assert procs["a"].root.args[1] is procs["b"] is other["c"].root.args[0]
+    assert procs.compiled("b")({"a": 1}, None) == 2
+    assert other.compiled("c")({"a": 1}, None) == 4
@@ -0,0 +1,141 @@
+# pylama:ignore=D103
+"""Postfix IR and stack machine tests."""
+from datetime import date
+from decimal import Decimal
+
+import pytest
+
+from algencode.ir import CALL, PROC, lower
+
+from .common import Json, Node, NumberNode, Vals, VariableNode
+
+PROCS: dict[str, Json] = {
+    "double": {"op": "mul", "args": [{"key": "_0"}, 2]},
+    "total": {"op": "add", "args": [{"key": "a"}, {"key": "b"}]},
+    "nested": {"op": "add", "args": [{"proc": "double", "args": [{"key": "a"}]}, 1]},
+    "loop": {"proc": "loop"},
+}
+
+PARAMS: list[tuple[Json, Vals]] = [
+    (7, {}),
+    ("seven", {}),
+    ({"key": "a"}, {"a": 3}),
+    ({"op": "add", "args": [1, {"key": "a"}, {"key": "b"}]}, {"a": 2, "b": 3}),
+    ({"op": "sub", "args": [{"key": "a"}]}, {"a": 2}),
+    ({"op": "div", "args": [{"key": "a"}, 4]}, {"a": 2}),
+    ({"op": "mod", "args": [{"key": "a"}, 4]}, {"a": Decimal("10.5")}),
+    ({"op": "mul", "args": [Decimal("1.10"), Decimal("1.1"), 2]}, {}),
+    ({"op": "max", "args": [{"key": "a"}, 4, 1.5]}, {"a": 2}),
+    ({"op": "min", "args": {"key": "xs"}}, {"xs": [4, 2, 9]}),
+    ({"op": "round", "args": [{"key": "a"}]}, {"a": 2.6}),
+    ({"op": "round", "args": [{"key": "a"}, 1]}, {"a": 2.66}),
+    ({"op": "round", "args": {"key": "xs"}}, {"xs": [2.66, 1]}),
+    ({"op": "len", "args": [1, 2, {"key": "missing"}]}, {}),
+    ({"op": "len", "args": {"key": "xs"}}, {"xs": [1, 2]}),
+    ({"op": "mean", "args": [1, 2, {"key": "a"}]}, {"a": 6}),
+    ({"op": "mean", "args": {"key": "xs"}}, {"xs": [1, 2]}),
+    ({"op": "slice", "args": ["abcdef", 3]}, {}),
+    ({"op": "slice", "args": ["abcdef", 1, {"key": "a"}]}, {"a": None}),
+    ({"op": "slice", "args": ["abcdef", None, None, -2]}, {}),
+    ({"op": "fmt", "args": ["{:>09}-{}", {"key": "a"}, "x"]}, {"a": 12}),
+    ({"op": "rep", "args": ["ab", {"key": "a"}]}, {"a": 3}),
+    ({"op": "join", "args": ["-", "a", {"key": "a"}]}, {"a": "b"}),
+    ({"op": "date", "args": ["%Y/%m", {"key": "d"}]}, {"d": date(2021, 7, 1)}),
+    ({"proc": "double", "args": [{"key": "a"}]}, {"a": 21}),
+    ({"proc": "total"}, {"a": 1, "b": 2}),
+    ({"proc": "total", "args": []}, {"a": 1, "b": 2}),
+    ({"proc": "nested"}, {"a": 4}),
+    ({"op": "round", "args": [{"proc": "total"}, 1]}, {"a": 0.25, "b": 1}),
+    ({"op": "add", "args": [{"key": "a", "debug": True}, 1]}, {"a": 1}),
+    ({"op": "if", "args": [{"key": "a"}, 1, {"op": "div", "args": [1, 0]}]}, {"a": 1}),
+    ({"op": "if", "args": [{"key": "a"}, {"key": "b"}, "x"]}, {"a": 0}),
+    ({"op": "and", "args": [{"key": "a"}, {"key": "b"}, 2]}, {"a": 1, "b": 0.0}),
+    ({"op": "or", "args": [{"key": "a"}, {"key": "b"}]}, {"a": "x"}),
+    ({"op": "or", "args": [0, None, {"key": "a"}]}, {"a": ""}),
+    ({"op": "not", "args": [{"key": "a"}]}, {"a": []}),
+    ({"op": "le", "args": [{"key": "a"}, Decimal("2.5")]}, {"a": 2}),
+    (
+        {
+            "op": "add",
+            "args": [{"op": "if", "args": [{"key": "a"}, 1, 2]}, {"proc": "total"}],
+        },
+        {"a": 0, "b": 1},
+    ),
+]
+
+
+@pytest.mark.parametrize("n,v", PARAMS, ids=str)
+def test_lower_matches_reduce(n: Json, v: Vals):
+    node = Node.model_validate(n)
+    expect = node.reduce(v, PROCS)
+    res = node.lower()(v, PROCS)
+    assert res == expect
+    assert type(res) is type(expect)
+
+
+ERROR_PARAMS: list[tuple[Json, Vals | None]] = [
+    ({"key": "a"}, None),
+    ({"key": "a"}, {}),
+    ({"op": "add", "args": [1, "a"]}, {}),
+    ({"op": "add", "args": [1, {"key": "a"}]}, {"a": "b"}),
+    ({"op": "add", "args": ["a", {"key": "b"}]}, {}),
+    ({"op": "add", "args": [{"key": "a"}, {"key": "b"}]}, {"a": "b"}),
+    ({"op": "add", "args": []}, {}),
+    ({"op": "div", "args": [1, 0]}, {}),
+    ({"op": "div", "args": [1, 0, {"key": "missing"}]}, {}),
+    ({"op": "round", "args": [1, 2, 3]}, {}),
+    ({"op": "round", "args": [1, 2.5]}, {}),
+    ({"op": "rep", "args": ["a", 1.5]}, {}),
+    ({"op": "join", "args": ["-", 1]}, {}),
+    ({"op": "date", "args": ["%Y", "2021"]}, {}),
+    ({"proc": "missing"}, {}),
+    ({"proc": "double", "args": [{"key": "a"}]}, {}),
+    ({"proc": "nested", "args": [1]}, {}),
+    ({"op": "if", "args": [{"key": "a"}, {"op": "div", "args": [1, 0]}, 1]}, {"a": 1}),
+    ({"op": "and", "args": [1, {"key": "a"}]}, {}),
+    ({"op": "lt", "args": ["a", 1]}, {}),
+]
+
+
+@pytest.mark.parametrize("n,v", ERROR_PARAMS, ids=str)
+def test_lower_errors_match_reduce(n: Json, v: Vals | None):
+    node = Node.model_validate(n)
+    with pytest.raises(Exception) as expect:
+        node.reduce(v, PROCS)
+    with pytest.raises(expect.type) as res:
+        node.lower()(v, PROCS)
+    assert str(res.value) == str(expect.value)
+
+
+def test_lower_is_flat():
+    n = Node.model_validate(
+        {"op": "fmt", "args": ["{}", {"proc": "double", "args": [{"key": "a"}]}]}
+    )
+    program = n.lower()
+    assert list(program.ops) == [0, PROC, 1, CALL, 3]
+    assert program is n.lower()
+    assert "CALL   1" in program.dis()
+
+
+def chain(depth: int) -> Node:
+    """Nested add chain {depth} levels deep, built without validation."""
+    n = Node.model_construct(VariableNode.model_construct(key="a"))
+    for i in range(depth):
+        n = Node.model_construct(NumberNode.model_construct(op="add", args=(n, 1)))
+    return n
+
+
+def test_deep_chain():
+    n = chain(10_000)
+    assert n.lower()({"a": 1}) == 10_001
+    with pytest.raises(RecursionError):
+        n.reduce({"a": 1})
+
+
+def test_deep_proc_calls():
+    procs = {f"p{i}": Node.model_validate({"proc": f"p{i + 1}"}) for i in range(2_000)}
+    procs["p2000"] = Node.model_validate({"key": "a"})
+    assert lower(Node.model_validate({"proc": "p0"}))({"a": 1}, procs) == 1
+    loop = {"loop": Node.model_validate({"proc": "loop"})}
+    with pytest.raises(RecursionError):
+        loop["loop"].lower()({}, loop)
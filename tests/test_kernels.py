@@ -0,0 +1,78 @@
+# pylama:ignore=D103
+"""String kernel tests."""
+from datetime import date, datetime, timedelta, timezone
+from decimal import Decimal
+from typing import Any
+
+import pytest
+
+from algencode.kernels import cache_clear, cache_info, strftime, template
+
+from .common import Node
+
+FORMATS: list[tuple[str, list[Any]]] = [
+    ("{}-{}-{}", ["044", "220", "087"]),
+    ("{:>09}-{}", [12, "x", None]),
+    ("x{1}y{0!r}z{0!s:>4}{0!a}", ["é", 2]),
+    ("{{}}{}", [Decimal("1.50")]),
+    ("{:+015,.3f}", [1234567]),
+    ("{:%Y/%m}", [date(2021, 7, 1)]),
+    ("", [1]),
+    ("plain", []),
+    # Not precompiled.
+    ("{0.year}", [date(2021, 7, 1)]),
+    ("{0[1]}", [[1, 2]]),
+    ("{:{}}", [1, 5]),
+    # Errors.
+    ("{}{}", [1]),
+    ("{", [1]),
+    ("}", [1]),
+    ("{}{0}", [1]),
+    ("{!x}", [1]),
+    ("{:d}", ["a"]),
+    ("{name}", [1]),
+]
+
+
+@pytest.mark.parametrize("fmt, args", FORMATS, ids=repr)
+def test_template_matches_format(fmt: str, args: list[Any]):
+    try:
+        expect: Any = fmt.format(*args)
+    except Exception as e:
+        with pytest.raises(type(e)) as res:
+            template(fmt)(args)
+        assert str(res.value) == str(e)
+        return
+    res = template(fmt)(args)
+    assert res == expect and type(res) is str
+    assert template(fmt, 2)(["?", "?", *args]) == expect
+
+
+def test_template_cached():
+    cache_clear()
+    assert template("{}-{}") is template("{}-{}")
+    assert template("{}-{}") is not template("{}-{}", 1)
+    assert cache_info()["template"].hits == 2
+
+
+def test_strftime_memoized():
+    cache_clear()
+    d = date(2021, 7, 1)
+    for _ in range(3):
+        assert strftime(d, "%Y/%m") == "2021/07"
+    assert strftime(datetime(2021, 7, 1, 12), "%Y/%m %H") == "2021/07 12"
+    info = cache_info()["strftime"]
+    assert (info.hits, info.misses) == (2, 2)
+
+
+def test_strftime_aware_datetimes():
+    # Equal (same instant) aware datetimes in different time zones format differently.
+    utc = datetime(2020, 1, 1, 12, tzinfo=timezone.utc)
+    est = datetime(2020, 1, 1, 7, tzinfo=timezone(timedelta(hours=-5)))
+    assert utc == est
+    assert strftime(utc, "%H:%M %z") == "12:00 +0000"
+    assert strftime(est, "%H:%M %z") == "07:00 -0500"
+    node = Node.model_validate({"op": "date", "args": ["%H:%M %z", {"key": "d"}]})
+    for f in (node.reduce, node.compile()):
+        assert f({"d": utc}, None) == "12:00 +0000"
+        assert f({"d": est}, None) == "07:00 -0500"
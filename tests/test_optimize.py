@@ -0,0 +1,59 @@
+# pylama:ignore=D103
+"""Optimizer (constant folding) tests."""
+import pytest
+
+from .common import Json, Node
+
+PARAMS: list[tuple[Json, Json]] = [
+    (7, 7),
+    ({"op": "mul", "args": [12, 0.01]}, 0.12),
+    ({"op": "round", "args": [2.5]}, 2),
+    ({"op": "len", "args": [{"key": "a"}, 2]}, 2),
+    ({"op": "fmt", "args": ["{:>05}", {"op": "add", "args": [1, 2]}]}, "00003"),
+    (
+        {"op": "add", "args": [{"key": "a"}, {"op": "mul", "args": [12, 0.5]}]},
+        {"op": "add", "args": [{"key": "a"}, 6.0]},
+    ),
+    (
+        {"op": "join", "args": ["-", {"op": "rep", "args": ["a", 2]}, {"key": "b"}]},
+        {"op": "join", "args": ["-", "aa", {"key": "b"}]},
+    ),
+    (
+        {"proc": "p", "args": [{"op": "sub", "args": [3, 1]}]},
+        {"proc": "p", "args": [2]},
+    ),
+    ({"op": "add", "args": {"key": "xs"}}, {"op": "add", "args": {"key": "xs"}}),
+    ({"op": "if", "args": [{"op": "lt", "args": [1, 2]}, {"key": "a"}, 1]}, {"key": "a"}),
+    (
+        {"op": "if", "args": [{"key": "a"}, {"op": "add", "args": [1, 2]}, 1]},
+        {"op": "if", "args": [{"key": "a"}, 3, 1]},
+    ),
+    ({"op": "and", "args": [1, {"op": "eq", "args": [2, 2]}]}, True),
+]
+
+
+@pytest.mark.parametrize("n,e", PARAMS, ids=str)
+def test_optimize(n: Json, e: Json):
+    node = Node.model_validate(n).optimize()
+    expect = Node.model_validate(e)
+    assert node == expect
+    assert type(node.root) is type(expect.root)
+
+
+def test_optimize_keeps_errors():
+    n = {"op": "add", "args": [{"key": "a"}, {"op": "div", "args": [1, 0]}]}
+    node = Node.model_validate(n).optimize()
+    assert node == Node.model_validate(n)
+    with pytest.raises(ZeroDivisionError):
+        node.reduce({"a": 1})
+
+
+def test_optimize_keeps_type_checks():
+    node = Node.model_validate({"op": "add", "args": [1, {"op": "fmt", "args": ["x"]}]})
+    with pytest.raises(TypeError):
+        node.optimize().reduce()
+
+
+def test_optimize_keeps_debug():
+    n = {"op": "add", "args": [1, 2], "debug": True}
+    assert Node.model_validate(n).optimize() == Node.model_validate(n)
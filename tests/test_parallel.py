@@ -0,0 +1,31 @@
+# pylama:ignore=D103
+"""Multi-process evaluation tests."""
+from decimal import Decimal
+
+from algencode import ProcRegistry
+from algencode.parallel import evaluate
+
+from .common import Node
+
+LEVY = Node.model_validate({"op": "mul", "args": [{"key": "tax"}, {"proc": "rate"}]})
+PROCS = ProcRegistry({"rate": {"op": "div", "args": [{"key": "levy"}, 100]}})
+ROWS = [{"tax": Decimal(i), "levy": Decimal(2)} for i in range(100)]
+
+
+def test_parallel_ordered():
+    res = list(evaluate(LEVY, iter(ROWS), PROCS, workers=2, chunk_size=7))
+    assert res == [LEVY.reduce(r, PROCS) for r in ROWS]
+
+
+def test_parallel_unordered():
+    res = evaluate({"levy": LEVY}, ROWS, PROCS, workers=2, chunk_size=7, ordered=False)
+    assert sorted(res, key=lambda r: r[0]) == [
+        (i, {"levy": LEVY.reduce(r, PROCS)}) for i, r in enumerate(ROWS)
+    ]
+
+
+def test_parallel_projects_rows():
+    # Only the columns the nodes read are pickled to the workers.
+    rows = [{**r, "unused": lambda: None} for r in ROWS[:10]]
+    res = list(evaluate(LEVY, rows, PROCS, workers=2, chunk_size=3))
+    assert res == [LEVY.reduce(r, PROCS) for r in rows]
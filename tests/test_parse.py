@@ -110,6 +110,15 @@ def test_parse_compound():
     assert node == COMPOUND_EXPECT
 
 
+def test_dump_round_trip():
+    # Args are held as tuples, but dump as lists as the documents give them.
+    obj = {"op": "and", "args": [COMPOUND_PARAM, {"proc": "p", "args": [1, True]}]}
+    node = Node.model_validate(obj)
+    assert node.model_dump(exclude_none=True) == obj
+    assert Node.model_validate(node.model_dump()) == node
+    assert json.loads(node.model_dump_json(exclude_none=True)) == obj
+
+
 # BUG: nodes within nodes fail to be serialized correctly now
 #
 # def test_parse_compound_json():
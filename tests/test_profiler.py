@@ -0,0 +1,82 @@
+# pylama:ignore=D103
+"""Profiler tests."""
+import json
+
+import pytest
+
+from algencode.profiler import Profiler
+
+from .common import Json, Node
+
+PROCS: dict[str, Json] = {
+    "fee": {"op": "mul", "args": [{"key": "rate"}, 2]},
+    "total": {"op": "add", "args": [{"key": "a"}, {"proc": "fee"}]},
+    "double": {"op": "mul", "args": [{"key": "_0"}, 2]},
+}
+
+
+def test_profile_paths():
+    n = Node.model_validate(
+        {"op": "add", "args": [{"key": "a"}, {"op": "mul", "args": [{"key": "a"}, 3]}]}
+    )
+    p = Profiler()
+    f = n.compile(profiler=p)
+    for a in range(5):
+        assert f({"a": a}, None) == n.reduce({"a": a})
+    assert set(p.stats) == {
+        ("add",),
+        ("add", "0:{a}"),
+        ("add", "1:mul"),
+        ("add", "1:mul", "0:{a}"),
+    }
+    assert all(s.calls == 5 for s in p.stats.values())
+    root = p.stats["add",]
+    children = p.stats["add", "0:{a}"].total_ns + p.stats["add", "1:mul"].total_ns
+    assert root.total_ns >= root.self_ns + children - 1
+    assert n.compile() is not f
+
+
+def test_profile_procs():
+    n = Node.model_validate(
+        {"op": "add", "args": [{"proc": "total"}, {"proc": "double", "args": [1]}]}
+    )
+    p = Profiler()
+    f = p.compile(n, name="levy")
+    assert f({"a": 1, "rate": 2}, PROCS) == n.reduce({"a": 1, "rate": 2}, PROCS)
+    assert ("levy", "add", "0:@total", "add", "1:@fee", "mul", "0:{rate}") in p.stats
+    assert ("levy", "add", "1:@double", "mul", "0:{_0}") in p.stats
+    procs = p.by_proc()
+    assert set(procs) == {"total", "fee", "double"}
+    assert all(s.calls == 1 for s in procs.values())
+    assert procs["total"].total_ns >= procs["fee"].total_ns
+
+
+def test_profile_errors():
+    n = Node.model_validate({"op": "add", "args": [1, {"key": "a"}]})
+    p = Profiler()
+    f = n.compile(profiler=p)
+    with pytest.raises(KeyError):
+        f({}, None)
+    with pytest.raises(TypeError):
+        f({"a": "b"}, None)
+    assert p.stats["add", "1:{a}"].errors == {"KeyError": 1}
+    assert p.stats["add",].errors == {"KeyError": 1, "TypeError": 1}
+    assert p.stats["add",].calls == 2
+
+
+def test_profile_export():
+    n = Node.model_validate({"op": "fmt", "args": ["{}", {"proc": "total"}]})
+    p = Profiler()
+    f = n.compile(profiler=p)
+    f({"a": 1, "rate": 2}, PROCS)
+    data = json.loads(p.to_json())
+    assert {tuple(s["path"]) for s in data["nodes"]} == set(p.stats)
+    assert set(data["procs"]) == {"total", "fee"}
+    lines = p.collapsed().splitlines()
+    assert len(lines) == len(p.stats)
+    assert "fmt;1:@total;add;0:{a} " in p.collapsed()
+    for line in lines:
+        stack, count = line.rsplit(" ", 1)
+        assert " " not in stack and int(count) >= 0
+    p.reset()
+    assert p.collapsed() == "" and p.to_dict() == {"nodes": [], "procs": {}}
@@ -0,0 +1,53 @@
+# pylama:ignore=D103
+"""Proc registry tests."""
+from unittest.mock import patch
+
+from algencode import ProcRegistry
+
+from .common import Node
+
+PROCS = {
+    "double": {"op": "mul", "args": [{"key": "_0"}, 2]},
+    "total": {"op": "add", "args": [{"key": "a"}, {"key": "b"}]},
+    "square": Node.model_validate({"op": "mul", "args": [{"key": "_0"}, {"key": "_0"}]}),
+}
+
+
+def test_registry_reduce():
+    procs = ProcRegistry(PROCS)
+    n = Node.model_validate(
+        {"op": "add", "args": [{"proc": "total"}, {"proc": "double", "args": [3]}]}
+    )
+    for f in [n.reduce, n.compile()]:
+        assert f({"a": 1, "b": 2}, procs) == 9
+
+
+def test_registry_validates_once():
+    procs = ProcRegistry(PROCS)
+    n = Node.model_validate({"proc": "double", "args": [{"key": "a"}]})
+    with patch.object(Node, "model_validate", wraps=Node.model_validate) as validate:
+        for a in range(10):
+            assert n.reduce({"a": a}, procs) == 2 * a
+        assert validate.call_count == 1
+    assert procs.info().hits == 9
+    assert procs.compiled("double") is procs.compiled("double")
+
+
+def test_registry_lru_and_invalidation():
+    procs = ProcRegistry(PROCS, maxsize=1)
+    first = procs["double"]
+    procs["total"]
+    assert procs.info().evictions == 1
+    assert procs["double"] is not first
+    assert procs["square"] is PROCS["square"]
+
+    procs.register("double", {"op": "mul", "args": [{"key": "_0"}, 3]})
+    assert Node.model_validate({"proc": "double", "args": [2]}).reduce(None, procs) == 6
+    procs.unregister("double")
+    assert "double" not in procs
+    assert sorted(procs) == ["square", "total"]
+
+    before = procs["square"]
+    procs.invalidate()
+    assert procs.info().currsize == 0
+    assert procs["square"] is before
@@ -0,0 +1,138 @@
+# pylama:ignore=D103
+"""Runtime node tests."""
+import logging
+import pickle
+from datetime import date
+from decimal import Decimal
+
+import pytest
+
+from algencode import InternTable
+from algencode.runtime import (
+    RuntimeModel,
+    RuntimeNode,
+    RuntimeNumber,
+    RuntimeVariable,
+    to_runtime,
+)
+
+from .common import Json, Node, Vals
+
+PROCS: dict[str, Json] = {
+    "double": {"op": "mul", "args": [{"key": "_0"}, 2]},
+    "total": {"op": "add", "args": [{"key": "a"}, {"key": "b"}]},
+}
+
+PARAMS: list[tuple[Json, Vals]] = [
+    (7, {}),
+    ({"key": "a"}, {"a": 3}),
+    ({"op": "add", "args": [1, {"key": "a"}, {"key": "b"}]}, {"a": 2, "b": 3.5}),
+    ({"op": "div", "args": [{"key": "a"}, 4]}, {"a": Decimal(2)}),
+    ({"op": "min", "args": {"key": "xs"}}, {"xs": [4, 2, 9]}),
+    ({"op": "round", "args": [{"key": "a"}, 1]}, {"a": 2.66}),
+    ({"op": "len", "args": {"key": "xs"}}, {"xs": [1, 2]}),
+    ({"op": "mean", "args": [1, 2, {"key": "a"}]}, {"a": 6}),
+    ({"op": "slice", "args": ["abcdef", 1, {"key": "a"}]}, {"a": None}),
+    ({"op": "slice", "args": ["abcdef", 3]}, {}),
+    ({"op": "fmt", "args": ["{:>09}-{}", {"key": "a"}, "x"]}, {"a": 12}),
+    ({"op": "rep", "args": ["ab", {"key": "a"}]}, {"a": 3}),
+    ({"op": "join", "args": ["-", "a", {"key": "a"}]}, {"a": "b"}),
+    ({"op": "date", "args": ["%Y/%m", {"key": "d"}]}, {"d": date(2021, 7, 1)}),
+    ({"proc": "double", "args": [{"key": "a"}]}, {"a": 21}),
+    ({"proc": "total"}, {"a": 1, "b": 2}),
+    ({"op": "if", "args": [{"key": "a"}, 1, {"op": "div", "args": [1, 0]}]}, {"a": 1}),
+    ({"op": "and", "args": [{"key": "a"}, {"key": "b"}, 2]}, {"a": 1, "b": 0.0}),
+    ({"op": "or", "args": [0, None, {"key": "a"}]}, {"a": ""}),
+    ({"op": "not", "args": [{"key": "a"}]}, {"a": []}),
+    ({"op": "le", "args": [{"key": "a"}, Decimal("2.5")]}, {"a": 2}),
+]
+
+
+@pytest.mark.parametrize("n,v", PARAMS, ids=str)
+def test_runtime_matches_reduce(n: Json, v: Vals):
+    node = Node.model_validate(n)
+    expect = node.reduce(v, PROCS)
+    r = node.to_runtime()
+    res = r.reduce(v, PROCS) if isinstance(r, RuntimeNode) else r
+    assert res == expect
+    assert type(res) is type(expect)
+
+
+@pytest.mark.parametrize(
+    "n,v",
+    [
+        ({"key": "a"}, None),
+        ({"key": "a"}, {}),
+        ({"op": "add", "args": [1, "a"]}, {}),
+        ({"op": "add", "args": [1, {"key": "a"}]}, {"a": "b"}),
+        ({"op": "add", "args": []}, {}),
+        ({"op": "round", "args": [1, 2, 3]}, {}),
+        ({"op": "rep", "args": ["a", 1.5]}, {}),
+        ({"proc": "missing"}, {}),
+        ({"op": "lt", "args": ["a", 1]}, {}),
+    ],
+    ids=str,
+)
+def test_runtime_errors_match_reduce(n: Json, v: Vals | None):
+    node = Node.model_validate(n)
+    with pytest.raises(Exception) as expect:
+        node.reduce(v, PROCS)
+    with pytest.raises(expect.type) as res:
+        node.to_runtime().reduce(v, PROCS)  # type: ignore
+    assert str(res.value) == str(expect.value)
+
+
+def test_runtime_round_trip():
+    n = Node.model_validate(
+        {"op": "fmt", "args": ["{}", {"op": "min", "args": {"key": "xs"}}, {"proc": "p"}]}
+    )
+    r = n.to_runtime()
+    assert isinstance(r, RuntimeNode)
+    assert r.to_node() == n
+    assert Node.model_validate_json(r.to_node().model_dump_json()) == n
+    assert pickle.loads(pickle.dumps(r)).to_node() == n
+
+
+def test_runtime_immutable():
+    r = RuntimeVariable("a")
+    with pytest.raises(AttributeError):
+        r.key = "b"  # type: ignore
+    with pytest.raises(AttributeError):
+        r.extra = 1  # type: ignore
+    assert not hasattr(r, "__dict__")
+
+
+def test_runtime_shares_subtrees():
+    sub: Json = {"op": "add", "args": [{"key": "a"}, 1]}
+    n = InternTable().intern({"op": "mul", "args": [sub, sub]})
+    r = to_runtime(n)
+    assert isinstance(r, RuntimeNumber)
+    lhs, rhs = r.args  # type: ignore
+    assert lhs is rhs
+
+
+def test_runtime_procs():
+    procs = {k: Node.model_validate(p).to_runtime() for k, p in PROCS.items()}
+    r = Node.model_validate({"proc": "double", "args": [{"proc": "total"}]}).to_runtime()
+    assert r.reduce({"a": 1, "b": 2}, procs) == 6  # type: ignore
+
+
+@pytest.mark.parametrize("value", [0, "", 5, None, False], ids=repr)
+def test_runtime_constant_procs(value: Json):
+    # Constant procs convert to bare literals, even falsy ones are found.
+    n = Node.model_validate({"op": "and", "args": [True, {"proc": "c"}]})
+    expect = n.reduce({}, {"c": Node.model_validate(value)})
+    procs = {"c": Node.model_validate(value).to_runtime()}
+    assert n.to_runtime().reduce({}, procs) == expect == value  # type: ignore
+    with pytest.raises(KeyError):
+        n.to_runtime().reduce({}, {})  # type: ignore
+
+
+def test_runtime_debug(caplog: pytest.LogCaptureFixture):
+    n = Node.model_validate({"op": "add", "args": [{"key": "a"}, 1], "debug": True})
+    r = n.to_runtime()
+    assert isinstance(r, RuntimeModel)
+    with caplog.at_level(logging.DEBUG, logger="algencode"):
+        assert r.reduce({"a": 1}) == 2
+    assert caplog.records
+    assert r.to_node() == n
@@ -0,0 +1,54 @@
+# pylama:ignore=D103
+"""Evaluation scope tests."""
+import logging
+
+import pytest
+
+from algencode.scope import ArgScope, Scope
+
+from .common import Node
+
+
+def test_scope_layers():
+    vals = {"a": 1, "b": 2}
+    s = Scope({"b": 3, "c": 4}, vals)
+    assert (s["a"], s["b"], s["c"]) == (1, 3, 4)
+    assert dict(s) == {"a": 1, "b": 3, "c": 4}
+    assert len(s) == 3
+    with pytest.raises(KeyError):
+        s["d"]
+    assert vals == {"a": 1, "b": 2}
+
+
+def test_arg_scope():
+    s = ArgScope(["x", 2])
+    assert (s["_0"], s["_1"]) == ("x", 2)
+    assert dict(s) == {"_0": "x", "_1": 2}
+    for key in ["_2", "_01", "_", "0", "a", "_-1"]:
+        with pytest.raises(KeyError):
+            s[key]
+
+
+def test_vals_not_copied():
+    class Vals(dict):
+        def __iter__(self):
+            raise AssertionError("copied")
+
+        def keys(self):
+            raise AssertionError("copied")
+
+    n = Node.model_validate({"op": "add", "args": [{"key": "a"}, {"proc": "p"}]})
+    assert n.reduce(Vals(a=1, b=2), {"p": {"key": "b"}}) == 3
+
+
+def test_debug_sees_res(caplog: pytest.LogCaptureFixture):
+    n = Node.model_validate(
+        {
+            "op": "add",
+            "args": [{"key": "a"}, 1],
+            "debug": {"op": "fmt", "args": ["{} -> {}", {"key": "a"}, {"key": "_res"}]},
+        }
+    )
+    with caplog.at_level(logging.DEBUG, logger="algencode"):
+        assert n.reduce({"a": 1}) == 2
+    assert "1 -> 2" in caplog.messages
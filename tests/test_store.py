@@ -0,0 +1,123 @@
+# pylama:ignore=D103
+"""Proc store tests."""
+import pickle
+from decimal import Decimal
+from pathlib import Path
+
+import pytest
+from pydantic import ValidationError
+
+from algencode import ProcStore
+from algencode.binary import procs_to_bytes
+from algencode.parallel import evaluate
+
+from .common import Json, Node
+
+PROCS: dict[str, Json] = {
+    "double": {"op": "mul", "args": [{"key": "_0"}, 2]},
+    "total": {"op": "add", "args": [{"key": "a"}, {"key": "b"}]},
+    "rate": {"op": "div", "args": [{"key": "levy"}, Decimal("100")]},
+}
+
+FORMULA = {"op": "add", "args": [{"proc": "total"}, {"proc": "double", "args": [3]}]}
+
+
+@pytest.mark.parametrize("encoding", ["binary", "json"])
+def test_store_reduce(encoding: str):
+    procs = ProcStore(encoding=encoding)  # type: ignore
+    procs.import_procs({k: v for k, v in PROCS.items() if k != "rate"})
+    n = Node.model_validate(FORMULA)
+    for f in [n.reduce, n.compile()]:
+        assert f({"a": 1, "b": 2}, procs) == 9
+    with pytest.raises(KeyError, match="failed to find proc"):
+        Node.model_validate({"proc": "nope"}).reduce({}, procs)
+
+
+def test_store_mapping():
+    procs = ProcStore()
+    procs.import_procs(PROCS)
+    assert len(procs) == 3 and sorted(procs) == sorted(PROCS)
+    assert "double" in procs and "nope" not in procs
+    assert procs["rate"] == Node.model_validate(PROCS["rate"])
+    assert procs.get("nope") is None
+    assert procs.export_procs() == {k: Node.model_validate(v) for k, v in PROCS.items()}
+
+
+def test_store_versions():
+    procs = ProcStore()
+    assert procs.put("double", PROCS["double"]) == 1
+    assert procs.put("double", PROCS["double"]) == 1
+    triple = Node.model_validate({"op": "mul", "args": [{"key": "_0"}, 3]})
+    assert procs.put("double", triple) == 2
+    assert procs.import_procs(PROCS) == {"double": 3, "total": 1, "rate": 1}
+    assert procs.versions("double") == [1, 2, 3] and procs.versions("nope") == []
+    assert procs.get_version("double", 2) == triple
+    assert procs["double"] == Node.model_validate(PROCS["double"])
+    with pytest.raises(KeyError):
+        procs.get_version("double", 4)
+
+    procs.remove("double")
+    assert "double" not in procs and procs.versions("double") == []
+    with pytest.raises(KeyError):
+        procs.remove("double")
+
+
+def test_store_lazy_lru():
+    procs = ProcStore(maxsize=1)
+    procs.import_procs(PROCS)
+    first = procs["double"]
+    assert procs["double"] is first
+    procs["total"]
+    info = procs.info()
+    assert (info.hits, info.evictions, info.currsize) == (1, 1, 1)
+    assert procs["double"] is not first
+    assert procs.compiled("double") is procs.compiled("double")
+
+    # Writes replace cached procs.
+    procs.put("double", {"op": "mul", "args": [{"key": "_0"}, 3]})
+    assert Node.model_validate({"proc": "double", "args": [2]}).reduce(None, procs) == 6
+
+
+def test_store_bulk_bytes():
+    procs = ProcStore()
+    procs.import_bytes(procs_to_bytes(PROCS))
+    other = ProcStore()
+    assert other.import_bytes(procs.export_bytes()) == dict.fromkeys(PROCS, 1)
+    assert other.export_procs() == procs.export_procs()
+
+
+def test_store_invalid():
+    procs = ProcStore(encoding="json")
+    with pytest.raises(ValidationError):
+        procs.import_procs({"total": PROCS["total"], "bad": {"op": "nope", "args": []}})
+    # JSON can't tell the Decimal literal from a string.
+    with pytest.raises(ValueError, match="JSON"):
+        procs.import_procs({"total": PROCS["total"], "rate": PROCS["rate"]})
+    assert len(procs) == 0
+    with pytest.raises(ValueError, match="encoding"):
+        ProcStore(encoding="xml")  # type: ignore
+
+
+def test_store_file(tmp_path: Path):
+    path = tmp_path / "procs.db"
+    with ProcStore(path) as procs:
+        procs.import_procs(PROCS)
+    procs = pickle.loads(pickle.dumps(ProcStore(path)))
+    assert procs.export_procs() == {k: Node.model_validate(v) for k, v in PROCS.items()}
+    writer = ProcStore(path)
+    procs["double"]
+    writer.put("double", {"op": "mul", "args": [{"key": "_0"}, 3]})
+    assert procs["double"] != writer["double"]
+    procs.invalidate("double")
+    assert procs["double"] == writer["double"]
+    with pytest.raises(TypeError):
+        pickle.dumps(ProcStore())
+
+
+def test_store_parallel(tmp_path: Path):
+    procs = ProcStore(tmp_path / "procs.db")
+    procs.import_procs(PROCS)
+    n = Node.model_validate({"op": "mul", "args": [{"key": "tax"}, {"proc": "rate"}]})
+    rows = [{"tax": Decimal(i), "levy": Decimal(2)} for i in range(20)]
+    res = list(evaluate(n, rows, procs, workers=2, chunk_size=7))
+    assert res == [n.reduce(r, procs) for r in rows]
@@ -0,0 +1,101 @@
+# pylama:ignore=D103
+"""Streaming row pipeline tests."""
+import io
+import json
+from decimal import Decimal
+from pathlib import Path
+
+import pytest
+
+from algencode.stream import RowWriter, chunked, evaluate, read_rows
+
+from .common import Node
+
+CSV = """\
+"044220087000","1610.00","91750","I-CFD04-1"
+"044220088000","1610.00","91750","I-CFD04-1"
+"044651001000","805.50","91750","I-CFD04-1"
+"""
+FIELDS = ["apn", "tax", "fund", "roll code"]
+
+LEVY = Node.model_validate({"op": "mul", "args": [{"key": "tax"}, 2]})
+APN = Node.model_validate(
+    {
+        "op": "join",
+        "args": [
+            "-",
+            {"op": "slice", "args": [{"key": "apn"}, 0, 3]},
+            {"op": "slice", "args": [{"key": "apn"}, 3, 6]},
+        ],
+    }
+)
+
+
+@pytest.fixture
+def roll(tmp_path: Path) -> Path:
+    path = tmp_path / "91750_FY_2021_2022.csv"
+    path.write_text(CSV)
+    return path
+
+
+def test_chunked():
+    assert list(chunked(range(5), 2)) == [[0, 1], [2, 3], [4]]
+
+
+def test_read_rows(roll: Path):
+    rows = list(read_rows(roll, fieldnames=FIELDS, keys=["apn", "tax"]))
+    assert rows[0] == {"apn": "044220087000", "tax": "1610.00"}
+    assert len(rows) == 3
+
+
+def test_evaluate_file(roll: Path):
+    res = evaluate(LEVY, roll, fieldnames=FIELDS, converters={"tax": Decimal})
+    assert list(res) == [Decimal("3220.00"), Decimal("3220.00"), Decimal("1611.00")]
+
+
+def test_evaluate_named(roll: Path):
+    res = evaluate(
+        {"apn": APN, "levy": LEVY},
+        roll,
+        keep=["roll code"],
+        chunk_size=2,
+        fieldnames=FIELDS,
+        converters={"tax": Decimal},
+    )
+    assert next(res) == {
+        "roll code": "I-CFD04-1",
+        "apn": "044-220",
+        "levy": Decimal("3220.00"),
+    }
+    assert len(list(res)) == 2
+
+
+def test_evaluate_is_lazy():
+    def rows():
+        yield {"tax": 1}
+        raise AssertionError("read too far")
+
+    assert next(evaluate(LEVY, rows(), chunk_size=1)) == 2
+
+
+def test_row_writer_csv(roll: Path, tmp_path: Path):
+    out = tmp_path / "out.csv"
+    with RowWriter(out, buffer_size=2) as w:
+        w.writerows(evaluate({"apn": APN}, roll, keep=["tax"], fieldnames=FIELDS))
+    assert out.read_text().splitlines() == [
+        "tax,apn",
+        "1610.00,044-220",
+        "1610.00,044-220",
+        "805.50,044-651",
+    ]
+
+
+def test_row_writer_jsonl():
+    f = io.StringIO()
+    w = RowWriter(f, "jsonl")
+    w.writerows(evaluate(LEVY, [{"tax": Decimal("1.5")}, {"tax": 2}]))
+    w.close()
+    assert [json.loads(line) for line in f.getvalue().splitlines()] == [
+        {"value": "3.0"},
+        {"value": 4},
+    ]
@@ -1,6 +1,9 @@
 # pylama:ignore=D103
 """String node tests."""
-from .common import node_test
+import pytest
+from pydantic import ValidationError
+
+from .common import Json, Node, node_test
 
 
 def test_string_slice():
@@ -119,3 +122,19 @@ def test_string_compound():
         {"msg": "hello world"},
         " ello wo-ow olle  ello wo-ow olle ",
     )
+
+
+@pytest.mark.parametrize(
+    "n, message",
+    [
+        ({"op": "slice", "args": ["a"]}, "slice expects 2 to 4 arguments, found 1"),
+        ({"op": "slice", "args": ["a", 1, 2, 3, 4]}, "found 5"),
+        ({"op": "fmt", "args": []}, "fmt expects at least 1 arguments, found 0"),
+        ({"op": "rep", "args": ["a"]}, "rep expects 2 arguments, found 1"),
+        ({"op": "join", "args": []}, "join expects at least 1"),
+        ({"op": "date", "args": ["%Y", None, None]}, "date expects 2"),
+    ],
+)
+def test_string_arity_validated(n: Json, message: str):
+    with pytest.raises(ValidationError, match=message):
+        Node.model_validate(n)
@@ -0,0 +1,243 @@
+# pylama:ignore=D103
+"""Batched (vectorized) reduction tests."""
+from datetime import date, datetime
+from decimal import Decimal
+
+import pytest
+
+from .common import Json, Node
+
+np = pytest.importorskip("numpy")
+
+COLUMNS = {
+    "tax": [1442.56, 693.54, 1456.42, 0.5],
+    "n": [1, 2, 3, 0],
+    "big": [2**70, 1, 2, 3],
+    "dec": [Decimal("1.10"), Decimal("2"), Decimal("3.5"), Decimal("0")],
+    "apn": ["001-180", "003-420", "007-070", "007-130"],
+    "due": [
+        date(2021, 12, 10),
+        date(2022, 4, 10),
+        datetime(2021, 12, 10, 8),
+        date.max,
+    ],
+    "fmt": ["{}", "{:>04}", "<{}>", "{0}{0}"],
+    "sep": ["-", "", "/", ", "],
+}
+PROCS: dict[str, Json] = {"half": {"op": "div", "args": [{"key": "_0"}, 2]}}
+
+PARAMS: list[Json] = [
+    {"op": "add", "args": [1, {"key": "tax"}, {"key": "n"}]},
+    {"op": "sub", "args": [{"key": "n"}, 3]},
+    {"op": "mul", "args": [{"key": "n"}, {"key": "n"}, 2]},
+    {"op": "mod", "args": [{"key": "tax"}, 7]},
+    {"op": "div", "args": [{"key": "tax"}, 4]},
+    {"op": "min", "args": [{"key": "tax"}, 700, {"key": "n"}]},
+    {"op": "max", "args": [{"key": "tax"}, 700]},
+    {"op": "round", "args": [{"key": "tax"}]},
+    {"op": "round", "args": [{"key": "tax"}, 1]},
+    {"op": "mean", "args": [{"key": "tax"}, {"key": "n"}, 3]},
+    {"op": "len", "args": [{"key": "tax"}, 1]},
+    {"op": "add", "args": [{"key": "big"}, 1]},
+    {"op": "add", "args": [{"key": "dec"}, 1]},
+    {"op": "add", "args": [{"proc": "half", "args": [{"key": "n"}]}, 1]},
+    {
+        "op": "fmt",
+        "args": ["{}:{}", {"key": "apn"}, {"op": "mul", "args": [{"key": "n"}, 2]}],
+    },
+    12,
+]
+
+STRING_PARAMS: list[Json] = [
+    {"op": "slice", "args": [{"key": "apn"}, 4]},
+    {"op": "slice", "args": [{"key": "apn"}, 0, 3]},
+    {"op": "slice", "args": [{"key": "apn"}, None, None, -1]},
+    {
+        "op": "slice",
+        "args": [{"key": "apn"}, {"key": "n"}, {"op": "add", "args": [{"key": "n"}, 2]}],
+    },
+    {"op": "rep", "args": [{"key": "apn"}, 2]},
+    {"op": "rep", "args": ["ab", {"key": "n"}]},
+    {"op": "join", "args": ["|"]},
+    {"op": "join", "args": ["|", {"key": "apn"}, "x"]},
+    {"op": "join", "args": [{"key": "sep"}, {"key": "apn"}, {"key": "apn"}]},
+    {
+        "op": "fmt",
+        "args": ["{:>08}|{:.1f}|{!r}", {"key": "n"}, {"key": "tax"}, {"key": "dec"}],
+    },
+    {"op": "fmt", "args": ["{1}{0}", {"key": "apn"}, {"key": "big"}]},
+    {"op": "fmt", "args": [{"key": "fmt"}, {"key": "n"}]},
+    {"op": "fmt", "args": ["{0.year}", {"key": "due"}]},
+    {"op": "date", "args": ["FY%Y-%m", {"key": "due"}]},
+    {"op": "date", "args": [{"key": "fmt"}, {"key": "due"}]},
+    {
+        "op": "join",
+        "args": [
+            "-",
+            {"op": "slice", "args": [{"key": "apn"}, 0, 3]},
+            {
+                "op": "fmt",
+                "args": ["{:>05}", {"op": "slice", "args": [{"key": "apn"}, 4]}],
+            },
+            {"op": "date", "args": ["%y", {"key": "due"}]},
+        ],
+    },
+]
+
+
+@pytest.mark.parametrize("n", PARAMS, ids=str)
+def test_reduce_many_matches_reduce(n: Json):
+    node = Node.model_validate(n)
+    res = node.reduce_many(COLUMNS, PROCS)
+    assert isinstance(res, np.ndarray)
+    assert res.shape == (4,)
+    for i, r in enumerate(res.tolist()):
+        vals = {k: v[i] for k, v in COLUMNS.items()}
+        assert r == node.reduce(vals, PROCS)
+
+
+@pytest.mark.parametrize("n", STRING_PARAMS, ids=str)
+def test_reduce_many_strings(n: Json):
+    node = Node.model_validate(n)
+    res = node.reduce_many(COLUMNS, PROCS)
+    assert res.dtype == object and res.shape == (4,)
+    for i, r in enumerate(res.tolist()):
+        expected = node.reduce({k: v[i] for k, v in COLUMNS.items()}, PROCS)
+        assert r == expected and type(r) is type(expected)
+
+
+@pytest.mark.parametrize(
+    "n",
+    [
+        {"op": "slice", "args": [{"key": "n"}, 1]},
+        {"op": "rep", "args": [{"key": "apn"}, {"key": "tax"}]},
+        {"op": "join", "args": ["-", {"key": "apn"}, {"key": "n"}]},
+        {"op": "date", "args": ["%Y", {"key": "apn"}]},
+        {"op": "fmt", "args": ["{} {}", {"key": "n"}]},
+        {"op": "fmt", "args": [{"key": "fmt"}, {"key": "apn"}, {"key": "nope"}]},
+    ],
+    ids=str,
+)
+def test_reduce_many_string_errors(n: Json):
+    node = Node.model_validate(n)
+    vals = {k: v[0] for k, v in COLUMNS.items()}
+    with pytest.raises(Exception) as expected:
+        node.reduce(vals)
+    with pytest.raises(expected.type):
+        node.reduce_many(COLUMNS)
+
+
+def test_reduce_many_string_fallback():
+    # Mistyped columns fall back to per-row evaluation, raising what reduce raises.
+    node = Node.model_validate(
+        {"op": "fmt", "args": ["{}", {"op": "slice", "args": [{"key": "s"}, 1]}]}
+    )
+    assert node.reduce_many({"s": ["ab", "cd"]}).tolist() == ["a", "c"]
+    with pytest.raises(TypeError):
+        node.reduce_many({"s": ["ab", 1]})
+    mixed = Node.model_validate({"op": "fmt", "args": ["{:>5}", {"key": "x"}]})
+    assert mixed.reduce_many({"x": [1, 1.0, True, "1"]}).tolist() == [
+        mixed.reduce({"x": x}) for x in [1, 1.0, True, "1"]
+    ]
+
+
+def test_reduce_many_string_checks_each_arg():
+    # The mistyped arg raises before later args are evaluated, as reduce raises.
+    node = Node.model_validate({"op": "join", "args": ["-", {"key": "s"}, {"proc": "p"}]})
+    with pytest.raises(TypeError) as expected:
+        node.reduce({"s": 1}, {})
+    with pytest.raises(TypeError) as res:
+        node.reduce_many({"s": [1, "a"]}, {})
+    assert str(res.value) == str(expected.value)
+
+    class Counted(list):
+        reads = 0
+
+        def __getitem__(self, i):
+            Counted.reads += 1
+            return super().__getitem__(i)
+
+    # Args already produced are reused row by row, rather than evaluated again.
+    node = Node.model_validate(
+        {"op": "rep", "args": ["ab", {"op": "add", "args": [{"key": "n"}, 1]}]}
+    )
+    assert node.reduce_many({"n": Counted([1, 2])}).tolist() == ["abab", "ababab"]
+    Counted.reads = 0
+    with pytest.raises(TypeError):
+        node.reduce_many({"n": Counted([1, 1.5])})
+    assert Counted.reads == 2
+
+
+def test_reduce_many_numpy_strings():
+    apn = {"op": "slice", "args": [{"key": "apn"}, 0, 3]}
+    node = Node.model_validate({"op": "join", "args": ["-", apn, "x"]})
+    res = node.reduce_many({"apn": np.array(["044220087", "001180"])})
+    assert res.tolist() == ["044-x", "001-x"]
+    assert all(type(r) is str for r in res)
+
+
+def test_reduce_many_numpy_columns():
+    node = Node.model_validate({"op": "mul", "args": [{"key": "a"}, 2]})
+    res = node.reduce_many({"a": np.arange(5)})
+    assert res.dtype == np.int64
+    assert res.tolist() == [0, 2, 4, 6, 8]
+
+
+def test_reduce_many_errors_per_row():
+    node = Node.model_validate({"op": "div", "args": [1, {"key": "n"}]})
+    with pytest.raises(ZeroDivisionError):
+        node.reduce_many(COLUMNS)
+    with pytest.raises(ValueError):
+        node.reduce_many({"n": [1], "m": [1, 2]})
+
+
+def test_reduce_many_projects_columns():
+    class Unused(list):
+        def __array__(self, *args, **kwargs):
+            raise AssertionError("converted unused column")
+
+    node = Node.model_validate({"op": "add", "args": [{"key": "n"}, 1]})
+    res = node.reduce_many({"n": [1, 2], "unused": Unused(["a", "b"])})
+    assert res.tolist() == [2, 3]
+
+
+def test_reduce_many_round_ndigits():
+    # NumPy would round the scaled float (2.675 to 2.68), Python the exact value.
+    node = Node.model_validate({"op": "round", "args": [{"key": "x"}, 2]})
+    res = node.reduce_many({"x": [2.675, 1442.565, 0.125, 7]})
+    assert res.tolist() == [2.67, 1442.57, 0.12, 7]
+    node = Node.model_validate({"op": "round", "args": [{"key": "n"}, -1]})
+    assert node.reduce_many({"n": [15, 25, -35]}).tolist() == [20, 20, -40]
+
+
+@pytest.mark.parametrize(
+    "n,cols",
+    [
+        ({"op": "add", "args": [{"key": "a"}, {"key": "a"}]}, {"a": [2**62, 1]}),
+        ({"op": "sub", "args": [{"key": "a"}, 2**62, 2**62]}, {"a": [-(2**62), 1]}),
+        ({"op": "mul", "args": [{"key": "a"}, 2**32]}, {"a": [2**31, -(2**33)]}),
+        ({"op": "add", "args": [{"key": "a"}, {"key": "a"}, 0.5]}, {"a": [2**62, 1]}),
+        ({"op": "div", "args": [{"key": "a"}, 3]}, {"a": [2**53 + 1, 2**60 + 7]}),
+        ({"op": "mean", "args": [{"key": "a"}, 1]}, {"a": [2**53 + 2, 2**62]}),
+        ({"op": "add", "args": [{"key": "a"}, 1]}, {"a": np.array([2**63], np.uint64)}),
+        ({"op": "sub", "args": [{"key": "a"}, 1]}, {"a": np.array([0, 5], np.uint8)}),
+        ({"op": "mul", "args": [{"key": "a"}, 4]}, {"a": np.array([2**30], np.int32)}),
+    ],
+    ids=str,
+)
+def test_reduce_many_exact_integers(n: Json, cols: dict):
+    # Results that int64 overflows or float64 rounds are evaluated per row.
+    node = Node.model_validate(n)
+    res = node.reduce_many(cols)
+    rows = [{"a": a} for a in np.asarray(cols["a"]).tolist()]
+    assert res.tolist() == [node.reduce(v) for v in rows]
+
+
+def test_reduce_many_float_mean():
+    # Python 3.12+ sums cancelling magnitudes compensated, 1e16 + 1.0 - 1e16 is 1.0.
+    node = Node.model_validate(
+        {"op": "mean", "args": [{"key": "a"}, {"key": "b"}, {"key": "c"}]}
+    )
+    cols = {"a": [1e16, 1.5], "b": [1.0, 2], "c": [-1e16, 3]}
+    rows = [dict(zip(cols, r)) for r in zip(*cols.values())]
+    assert node.reduce_many(cols).tolist() == [node.reduce(v) for v in rows]